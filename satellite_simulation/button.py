@@ -1,5 +1,5 @@
 import pygame
-button_font = pygame.font.SysFont(None, 24)
+button_font = None
 
 class Button:
     def __init__(self, x, y, width, height, text, action):
@@ -11,6 +11,9 @@ class Button:
         self.text_color = (0, 0, 0)
 
     def draw(self, surface):
+        global button_font
+        if button_font is None:
+            button_font = pygame.font.SysFont(None, 24)
         current_color = self.hover_color if self.is_hovered() else self.color
         pygame.draw.rect(surface, current_color, self.rect, border_radius=5)
         text_surface = button_font.render(self.text, True, self.text_color)
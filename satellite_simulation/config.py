@@ -1,16 +1,10 @@
 import random
-import pygame
 import math
 import os
 
 EARTH_IMAGE_FILENAME = "earth.jpg"
 
-earth_image = None
-
 WIDTH, HEIGHT = 1200, 900
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Project Kuiper Simulation")
-clock = pygame.time.Clock()
 
 BLACK = (0, 0, 0)
 DARK_SPACE = (10, 10, 30)
@@ -43,21 +37,6 @@ EARTH_POSITION = (WIDTH // 2, HEIGHT // 2)
 KUIPER_ALTITUDES_KM = [590.0, 610.0, 630.0]
 KUIPER_ORBIT_RADII_PIXELS = [(EARTH_RADIUS_KM + alt) * SCALE_FACTOR for alt in KUIPER_ALTITUDES_KM]
 
-try:
-    script_dir = os.path.dirname(__file__)
-    image_path = os.path.join(script_dir, EARTH_IMAGE_FILENAME)
-
-    _raw_earth_image = pygame.image.load(image_path).convert_alpha()
-    earth_diameter_pixels = int(EARTH_RADIUS_PIXELS * 2)
-    earth_image = pygame.transform.scale(_raw_earth_image, (earth_diameter_pixels, earth_diameter_pixels))
-    print(f"Successfully loaded and scaled {EARTH_IMAGE_FILENAME}")
-except FileNotFoundError:
-    print(f"Warning: Earth image '{EARTH_IMAGE_FILENAME}' not found. Drawing blue circle instead.")
-    earth_image = None
-except pygame.error as e:
-    print(f"Warning: Error loading image '{EARTH_IMAGE_FILENAME}': {e}. Drawing blue circle instead.")
-    earth_image = None
-
 STATION_MIN_DISTANCE = 40
 MIN_STATION_COMM_RADIUS = 50
 MAX_STATION_COMM_RADIUS = 400
@@ -74,10 +53,133 @@ STATION_DATA_LOSS_ON_REPAIR = 2
 
 
 SATELLITE_DAMAGE_PROBABILITY = 0.0003
+SATELLITE_CLASS_BY_COLOR = {SATELLITE_GREEN: "MIL", SATELLITE_BLUE: "COM"}
+DEFAULT_SATELLITE_CLASS = "COM"
 BLINK_DURATION_MS = 5000
 BLINK_INTERVAL_MS = 250
 
+#priority scheduling between satellite classes, higher weight wins a full station
+PRIORITY_WEIGHTS = {"MIL": 2.0, "COM": 1.0}
+PREEMPTION_ENABLED = True
+
+#onboard data generation (GB/s) and storage size (GB) per satellite class, generation beyond storage is lost
+SATELLITE_DATA_RATE_GBPS = {"MIL": 0.05, "COM": 0.02}
+SATELLITE_STORAGE_GB = {"MIL": 1000.0, "COM": 600.0}
+#a satellite holding no more than SATELLITE_DRAINED_GB releases its ground link (jammed data stays
+#onboard, so a jammed link never drains to exactly 0) and only asks for one again at SATELLITE_RELINK_GB
+SATELLITE_DRAINED_GB = 0.001
+SATELLITE_RELINK_GB = 0.5
+
+#inter-satellite links: satellites out of station range forward data over multi-hop paths
+ISL_ENABLED = False
+ISL_RANGE_PIXELS = 90
+ISL_NEIGHBOURS = 2
+ISL_RATE_GBPS = 0.25
+ISL_RELAY_RATE_GBPS = 0.5
+
+#weather over the station rim: cloud cover on a coarse grid drifting with the wind, thick cloud
+#slows a station's links by up to WEATHER_MAX_ATTENUATION; WEATHER_FILE replaces the generated
+#cover with a .npy/.csv grid (or a stack of grids played in a loop, WEATHER_FRAME_SEC apart)
+WEATHER_ENABLED = False
+WEATHER_FILE = None
+WEATHER_CELL_PIXELS = 40
+WEATHER_WIND_PIXELS_PER_SEC = (6.0, 1.5)
+WEATHER_CHANGE_SEC = 60.0
+WEATHER_FRAME_SEC = 10.0
+WEATHER_CLEAR_COVER = 0.45
+WEATHER_MAX_ATTENUATION = 0.8
+
+#debris on the KUIPER shells: fragments spread DEBRIS_SHELL_WIDTH_KM around each shell, drifting
+#along it up to DEBRIS_SPEED_SPREAD of the shell speed faster or slower; passing within
+#DEBRIS_HIT_KM of a satellite damages it, and a destroyed satellite breaks into more fragments
+DEBRIS_ENABLED = False
+DEBRIS_COUNT = 2000
+DEBRIS_SHELL_WIDTH_KM = 10.0
+DEBRIS_SPEED_SPREAD = 0.3
+DEBRIS_HIT_KM = 0.5
+DEBRIS_FRAGMENTS = 20
+
+#contact schedules: when set, satellite-station visibility comes from a schedule computed once
+#per geometry and cached under CONTACT_CACHE_DIR, least recently used entries evicted past the size
+CONTACT_CACHE_DIR = None
+CONTACT_CACHE_MAX_MB = 512
+CONTACT_MIN_HORIZON_SEC = 600
+
+#ground jammers (x, y, power, footprint radius in pixels); power is the share of a link's data
+#lost when the link passes through the jammer itself, fading to nothing at the footprint edge
+JAMMERS = [(EARTH_POSITION[0] + 250, EARTH_POSITION[1] - 250, 0.5, 120),
+           (EARTH_POSITION[0] - 300, EARTH_POSITION[1] + 170, 0.3, 160)]
+
 SIMULATION_SPEED = 1.0
 
+#station load (connected satellites) is sampled for the report charts at this sim-time interval
+LOAD_SAMPLE_INTERVAL_MS = 1000
+
 STAR_COUNT = 350
-stars = [(random.randint(0, WIDTH), random.randint(0, HEIGHT), random.uniform(0.5, 1.5)) for _ in range(STAR_COUNT)]
\ No newline at end of file
+
+#display, assets and the star field are created on first use, so importing config stays free of pygame
+_lazy = {}
+
+
+def get_screen():
+    if "screen" not in _lazy:
+        import pygame
+        _lazy["screen"] = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Project Kuiper Simulation")
+    return _lazy["screen"]
+
+
+def get_clock():
+    if "clock" not in _lazy:
+        import pygame
+        _lazy["clock"] = pygame.time.Clock()
+    return _lazy["clock"]
+
+
+def get_earth_image():
+    """ Loads and scales the Earth texture once; needs the display mode to be set. """
+    if "earth_image" not in _lazy:
+        import pygame
+        from simlog import get_logger
+        log = get_logger("config")
+        earth_image = None
+        try:
+            script_dir = os.path.dirname(__file__)
+            image_path = os.path.join(script_dir, EARTH_IMAGE_FILENAME)
+
+            _raw_earth_image = pygame.image.load(image_path).convert_alpha()
+            earth_diameter_pixels = int(EARTH_RADIUS_PIXELS * 2)
+            earth_image = pygame.transform.scale(_raw_earth_image, (earth_diameter_pixels, earth_diameter_pixels))
+            log.info("Successfully loaded and scaled %s", EARTH_IMAGE_FILENAME)
+        except FileNotFoundError:
+            log.warning("Earth image '%s' not found. Drawing blue circle instead.", EARTH_IMAGE_FILENAME)
+        except pygame.error as e:
+            log.warning("Error loading image '%s': %s. Drawing blue circle instead.", EARTH_IMAGE_FILENAME, e)
+        _lazy["earth_image"] = earth_image
+    return _lazy["earth_image"]
+
+
+def get_stars():
+    if "stars" not in _lazy:
+        _lazy["stars"] = [(random.randint(0, WIDTH), random.randint(0, HEIGHT), random.uniform(0.5, 1.5)) for _ in range(STAR_COUNT)]
+    return _lazy["stars"]
+
+
+def draw_background(surface):
+    import pygame
+    surface.fill(DARK_SPACE)
+    for x, y, r in get_stars(): pygame.draw.circle(surface, STAR_COLOR, (int(x), int(y)), int(r))
+    earth_image = get_earth_image()
+    if earth_image:
+        surface.blit(earth_image, earth_image.get_rect(center=EARTH_POSITION))
+    else:
+        pygame.draw.circle(surface, (0, 80, 180), EARTH_POSITION, EARTH_RADIUS_PIXELS)
+
+
+_LAZY_ATTRIBUTES = {"screen": get_screen, "clock": get_clock, "earth_image": get_earth_image, "stars": get_stars}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,285 @@
+import hashlib
+import math
+import os
+import struct
+from config import *
+from simlog import get_logger
+
+log = get_logger("contacts")
+
+#bump when the schedule layout or the visibility rule changes, so old entries are never reused
+CONTACT_FORMAT = 1
+CONTACT_ANGLE_SAMPLES = 1024
+CONTACT_BISECTIONS = 48
+SCHEDULE_ARRAYS = ("start", "end", "sat", "station", "end_order")
+
+TWO_PI = 2 * math.pi
+
+
+def _sees(radius, sx, sy, comm_radius, base_angle, theta):
+    """ Station.is_satellite_in_range for a satellite at theta on an orbit of the given radius, on arrays. """
+    import numpy as np
+
+    dx = EARTH_POSITION[0] + radius * np.cos(theta) - sx
+    dy = EARTH_POSITION[1] + radius * np.sin(theta) - sy
+    diff = (np.arctan2(dy, dx) - base_angle + math.pi) % TWO_PI - math.pi
+    return (np.sqrt(dx * dx + dy * dy) <= comm_radius) & (np.abs(diff) <= math.radians(STATION_COMM_ANGLE_DEG) / 2 + 1e-9)
+
+
+def contact_arcs(radius, stations):
+    """ Arcs of one orbit each station sees, as (station index, start angle, width) arrays.
+
+    stations is a (stations x 4) array of x, y, comm_radius and base angle. Arcs are found
+    on a grid of CONTACT_ANGLE_SAMPLES angles and their ends refined by bisection.
+    """
+    import numpy as np
+
+    step = TWO_PI / CONTACT_ANGLE_SAMPLES
+    theta = np.arange(CONTACT_ANGLE_SAMPLES) * step
+    sx, sy, comm_radius, base_angle = (stations[:, k][:, None] for k in range(4))
+    seen = _sees(radius, sx, sy, comm_radius, base_angle, theta[None, :])
+
+    def refine(rows, inside, outside):
+        params = [p[rows, 0] for p in (sx, sy, comm_radius, base_angle)]
+        for _ in range(CONTACT_BISECTIONS):
+            mid = (inside + outside) / 2
+            hit = _sees(radius, *params, mid)
+            inside, outside = np.where(hit, mid, inside), np.where(hit, outside, mid)
+        return inside
+
+    rise_rows, rise_at = np.nonzero(seen & ~np.roll(seen, 1, axis=1))
+    fall_rows, fall_at = np.nonzero(seen & ~np.roll(seen, -1, axis=1))
+    starts = refine(rise_rows, theta[rise_at], theta[rise_at] - step)
+    ends = refine(fall_rows, theta[fall_at], theta[fall_at] + step)
+
+    #every row has as many rises as falls; a run across angle 0 ends at the row's first fall
+    counts = np.bincount(rise_rows, minlength=len(stations))
+    first = np.cumsum(counts) - counts
+    wraps = np.zeros(len(stations), dtype=np.int64)
+    has = counts > 0
+    wraps[has] = fall_at[first[has]] < rise_at[first[has]]
+    position = np.arange(len(rise_rows)) - first[rise_rows]
+    partner = first[rise_rows] + (position + wraps[rise_rows]) % np.maximum(counts[rise_rows], 1)
+    widths = (ends[partner] - starts) % TWO_PI
+
+    always = np.flatnonzero(seen.all(axis=1))
+    return (np.concatenate((rise_rows, always)),
+            np.concatenate((starts % TWO_PI, np.zeros(len(always)))),
+            np.concatenate((widths, np.full(len(always), TWO_PI))))
+
+
+def compute_schedule(shells, angles, stations, horizon_sec):
+    """ Every contact of every satellite with every station within horizon_sec, sorted by start.
+
+    shells and angles give each satellite's OrbitShell and angle at time 0; satellites on
+    one shell share its arcs, and a satellite enters an arc once per orbital period.
+    """
+    import numpy as np
+
+    columns = {name: [] for name in SCHEDULE_ARRAYS[:4]}
+    by_shell = {}
+    for i, shell in enumerate(shells):
+        by_shell.setdefault(shell, []).append(i)
+    for shell, members in by_shell.items():
+        arc_station, arc_start, arc_width = contact_arcs(shell.orbit_radius_pixels, stations)
+        if not len(arc_station):
+            continue
+        omega = shell.angular_speed_rad_per_sec
+        members = np.array(members)
+        #angle travelled past each arc start, satellites x arcs
+        past = (angles[members][:, None] - arc_start[None, :]) % TWO_PI
+        width = np.broadcast_to(arc_width[None, :], past.shape)
+        sat = np.broadcast_to(members[:, None], past.shape)
+        station = np.broadcast_to(arc_station[None, :], past.shape)
+
+        inside = past <= width
+        full = width >= TWO_PI
+        columns["start"].append(np.zeros(inside.sum()))
+        columns["end"].append(np.where(full, np.inf, (width - past) / omega)[inside])
+        columns["sat"].append(sat[inside])
+        columns["station"].append(station[inside])
+
+        period = TWO_PI / omega
+        entry = (TWO_PI - past) / omega
+        repeats = np.where(full | (entry > horizon_sec), 0, np.floor((horizon_sec - entry) / period) + 1).astype(np.int64).ravel()
+        offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        start = np.repeat(entry.ravel(), repeats) + offsets * period
+        columns["start"].append(start)
+        columns["end"].append(start + np.repeat(width.ravel(), repeats) / omega)
+        columns["sat"].append(np.repeat(sat.ravel(), repeats))
+        columns["station"].append(np.repeat(station.ravel(), repeats))
+
+    start = np.concatenate(columns["start"]) if columns["start"] else np.zeros(0)
+    order = np.argsort(start, kind="stable")
+    schedule = {"start": start[order]}
+    schedule["end"] = (np.concatenate(columns["end"]) if columns["end"] else np.zeros(0))[order]
+    schedule["sat"] = (np.concatenate(columns["sat"]) if columns["sat"] else np.zeros(0))[order].astype(np.int32)
+    schedule["station"] = (np.concatenate(columns["station"]) if columns["station"] else np.zeros(0))[order].astype(np.int32)
+    schedule["end_order"] = np.argsort(schedule["end"], kind="stable").astype(np.int64)
+    return schedule
+
+
+def geometry_key(shells, angles, stations, horizon_sec):
+    """ Content hash of everything a contact schedule depends on. """
+    digest = hashlib.sha256()
+    digest.update(struct.pack("<iddddi", CONTACT_FORMAT, EARTH_POSITION[0], EARTH_POSITION[1],
+                              STATION_COMM_ANGLE_DEG, float(horizon_sec), CONTACT_ANGLE_SAMPLES))
+    digest.update(struct.pack(f"<{len(shells)}d", *[shell.altitude_km for shell in shells]))
+    digest.update(angles.astype("<f8").tobytes())
+    digest.update(stations.astype("<f8").tobytes())
+    return digest.hexdigest()
+
+
+class ContactCache:
+    """ Contact schedules on disk, one directory of .npy arrays per geometry hash, evicted least recently used past max_bytes. """
+
+    def __init__(self, directory=CONTACT_CACHE_DIR, max_bytes=CONTACT_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self, key):
+        import numpy as np
+
+        if not self.directory:
+            return None
+        path = os.path.join(self.directory, key)
+        try:
+            schedule = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r") for name in SCHEDULE_ARRAYS}
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return schedule
+
+    def store(self, key, schedule):
+        import numpy as np
+
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        partial = f"{path}.tmp{os.getpid()}"
+        os.makedirs(partial, exist_ok=True)
+        for name in SCHEDULE_ARRAYS:
+            np.save(os.path.join(partial, name + ".npy"), schedule[name])
+        try:
+            os.rename(partial, path)
+        except OSError:
+            #another run stored the same geometry first
+            self._remove(partial)
+        self.evict()
+
+    def _remove(self, path):
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+        os.rmdir(path)
+
+    def entries(self):
+        """ (last used, bytes, path) of every complete entry. """
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if ".tmp" in name or not os.path.isdir(path):
+                continue
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                self._remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+
+
+class ContactTracker:
+    """ Which stations see which satellites, advanced along a contact schedule one change at a time. """
+
+    def __init__(self, schedule, satellites, stations, t0_ms, horizon_ms):
+        import numpy as np
+
+        self.start = schedule["start"]
+        self.end = schedule["end"]
+        self.sat = schedule["sat"]
+        self.station = schedule["station"]
+        self.end_order = schedule["end_order"]
+        self._ends = np.asarray(self.end)[self.end_order]
+        self.t0_ms = t0_ms
+        self.horizon_ms = horizon_ms
+        self.rows = {sat: i for i, sat in enumerate(satellites)}
+        self.stations = list(stations)
+        self.columns = {st: j for j, st in enumerate(self.stations)}
+        self._geometry = [(st.x, st.y, st.comm_radius) for st in self.stations]
+        self.visible = [set() for _ in satellites]
+        self._started = 0
+        self._ended = 0
+
+    def valid_for(self, stations, now_ms):
+        """ False once the stations changed or the schedule's horizon has passed. """
+        if now_ms > self.t0_ms + self.horizon_ms or len(stations) != len(self.stations):
+            return False
+        return all(st is known and (st.x, st.y, st.comm_radius) == geometry
+                   for st, known, geometry in zip(stations, self.stations, self._geometry))
+
+    def advance(self, now_ms):
+        import numpy as np
+
+        t = (now_ms - self.t0_ms) / 1000.0
+        visible = self.visible
+        started = int(np.searchsorted(self.start, t, side="right"))
+        if started > self._started:
+            for s, j in zip(self.sat[self._started:started].tolist(), self.station[self._started:started].tolist()):
+                visible[s].add(j)
+            self._started = started
+        ended = int(np.searchsorted(self._ends, t, side="left"))
+        if ended > self._ended:
+            for k in self.end_order[self._ended:ended].tolist():
+                visible[self.sat[k]].discard(int(self.station[k]))
+            self._ended = ended
+
+    def in_range(self, station, satellite):
+        row, column = self.rows.get(satellite), self.columns.get(station)
+        if row is None or column is None:
+            return station.is_satellite_in_range(satellite)
+        return satellite.status == 'operational' and column in self.visible[row]
+
+    def stations_for(self, satellite, stations):
+        """ The stations in range of a satellite, in the order of stations. """
+        row = self.rows.get(satellite)
+        if row is None:
+            return [st for st in stations if st.is_satellite_in_range(satellite)]
+        if satellite.status != 'operational' or not self.visible[row]:
+            return []
+        return [self.stations[j] for j in sorted(self.visible[row])]
+
+
+def contact_tracker(satellites, stations, now_ms, horizon_ms, cache):
+    """ A tracker for the current geometry, from cache when it has the schedule. """
+    import numpy as np
+
+    shells = [sat.shell for sat in satellites]
+    angles = np.fromiter((sat.angle for sat in satellites), np.float64, len(satellites))
+    geometry = np.array([(st.x, st.y, st.comm_radius, st.base_angle_rad) for st in stations], dtype=np.float64).reshape(-1, 4)
+    horizon_sec = horizon_ms / 1000.0
+    key = geometry_key(shells, angles, geometry, horizon_sec)
+    schedule = cache.load(key)
+    if schedule is None:
+        schedule = compute_schedule(shells, angles, geometry, horizon_sec)
+        cache.store(key, schedule)
+        log.info("Contact schedule %s computed: %d contacts", key[:12], len(schedule["start"]))
+    tracker = ContactTracker(schedule, satellites, stations, now_ms, horizon_ms)
+    tracker.advance(now_ms)
+    return tracker
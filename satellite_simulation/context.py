@@ -0,0 +1,53 @@
+import random
+from config import *
+from draws import StreamDraws
+from jamming import JammerField
+from stats import RunStats
+from storage import FleetStorage
+
+
+class SimulationContext:
+    """ Mutable per-run state: parameters, logs, counters and the random stream. """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        #damage draws; draws.DamageDraws for common random numbers and importance sampling
+        self.draws = StreamDraws(self.rng)
+
+        self.satellite_damage_probability = SATELLITE_DAMAGE_PROBABILITY
+        self.satellite_repair_time_seconds = BLINK_DURATION_MS / 1000
+        self.station_damage_probability = STATION_DAMAGE_PROBABILITY
+        self.station_repair_time_ms = STATION_REPAIR_TIME_MS
+        self.simulation_speed = SIMULATION_SPEED
+
+        self.destroyed_satellites_log = []
+        self.stats = RunStats()
+        self.fleet = FleetStorage()
+        self.jammers = JammerField()
+
+        self.station_id_counter = 0
+        self.satellite_counter = 0
+
+    def next_station_id(self):
+        station_id = self.station_id_counter
+        self.station_id_counter += 1
+        return station_id
+
+    def derive(self, seed=None):
+        """ Fresh context for a new run that keeps this run's damage and repair parameters and jammers. """
+        ctx = SimulationContext(seed)
+        ctx.satellite_damage_probability = self.satellite_damage_probability
+        ctx.satellite_repair_time_seconds = self.satellite_repair_time_seconds
+        ctx.station_damage_probability = self.station_damage_probability
+        ctx.station_repair_time_ms = self.station_repair_time_ms
+        ctx.jammers = self.jammers.derive()
+        return ctx
+
+    def apply_params(self, params):
+        self.station_damage_probability = float(params.get("station_damage_prob", self.station_damage_probability))
+        self.station_repair_time_ms = float(params.get("station_recovery_time_sec", self.station_repair_time_ms / 1000.0)) * 1000
+        self.satellite_damage_probability = float(params.get("satellite_damage_prob", self.satellite_damage_probability))
+        self.satellite_repair_time_seconds = float(params.get("satellite_recovery_time_sec", self.satellite_repair_time_seconds))
+
+
+default_context = SimulationContext()
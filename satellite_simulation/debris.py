@@ -0,0 +1,147 @@
+import math
+from config import *
+from orbit import orbit_shell
+from simlog import get_logger, event
+
+log = get_logger("debris")
+
+TWO_PI = 2 * math.pi
+
+
+def sweep_pairs(sorted_angles, angles, reach):
+    """ (query, fragment) index pairs less than reach radians apart, wrapping at 2 pi.
+
+    Two binary searches per query in the sorted fragment angles give the window of
+    candidates, so the cost is O(queries log fragments + pairs).
+    """
+    import numpy as np
+
+    n = len(sorted_angles)
+    if not n or not len(angles):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    #the fragments near either end of the circle are repeated past the other end
+    head = np.searchsorted(sorted_angles, reach, side="right")
+    tail = np.searchsorted(sorted_angles, TWO_PI - reach, side="left")
+    wrapped = np.concatenate((sorted_angles[tail:] - TWO_PI, sorted_angles, sorted_angles[:head] + TWO_PI))
+    lo = np.searchsorted(wrapped, angles - reach, side="left")
+    hi = np.searchsorted(wrapped, angles + reach, side="right")
+    counts = hi - lo
+    queries = np.repeat(np.arange(len(angles)), counts)
+    first = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    fragments = (first + np.arange(len(queries)) - (n - tail)) % n
+    return queries, fragments
+
+
+class DebrisField:
+    """ Debris on the KUIPER shells, screened against the satellites on them with a sorted-angle sweep. """
+
+    def __init__(self, count=DEBRIS_COUNT, seed=None, shell_width_km=DEBRIS_SHELL_WIDTH_KM,
+                 speed_spread=DEBRIS_SPEED_SPREAD, hit_km=DEBRIS_HIT_KM, fragments=DEBRIS_FRAGMENTS):
+        import numpy as np
+
+        self.rng = np.random.default_rng(seed)
+        self.shell_width_km = shell_width_km
+        self.speed_spread = speed_spread
+        self.hit_km = hit_km
+        self.fragments = fragments
+        self.shells = [orbit_shell(altitude) for altitude in KUIPER_ALTITUDES_KM]
+        self._shell_index = {shell.altitude_km: k for k, shell in enumerate(self.shells)}
+        #per shell: angle, radial offset from the shell (km) and angular speed of every fragment
+        self.angle, self.offset, self.speed = [], [], []
+        for k in range(len(self.shells)):
+            n = count // len(self.shells) + (k < count % len(self.shells))
+            angle, offset, speed = self._fragments(k, self.rng.uniform(0.0, TWO_PI, n))
+            order = np.argsort(angle)
+            self.angle.append(angle[order])
+            self.offset.append(offset[order])
+            self.speed.append(speed[order])
+        self.hits = 0
+        self.spawned = 0
+
+    def __len__(self):
+        return sum(len(angle) for angle in self.angle)
+
+    def _fragments(self, k, angles):
+        n = len(angles)
+        offset = self.rng.uniform(-self.shell_width_km / 2, self.shell_width_km / 2, n)
+        speed = self.shells[k].angular_speed_rad_per_sec * (1.0 + self.rng.uniform(-self.speed_spread, self.speed_spread, n))
+        return angles, offset, speed
+
+    def spawn(self, k, angle, count):
+        """ Adds count fragments scattered around angle on shell k. """
+        import numpy as np
+
+        scatter = 4 * self.hit_km / self.shells[k].orbit_radius_km
+        angles, offset, speed = self._fragments(k, (angle + self.rng.normal(0.0, scatter, count)) % TWO_PI)
+        self.angle[k] = np.concatenate((self.angle[k], angles))
+        self.offset[k] = np.concatenate((self.offset[k], offset))
+        self.speed[k] = np.concatenate((self.speed[k], speed))
+        self.spawned += count
+
+    def step(self, satellites, current_ticks, delta_time_ms):
+        """ Moves the debris on by a tick and damages the operational satellites it hit; returns the hits.
+
+        Called after the satellites moved and before destroyed ones leave the list, so each
+        destroyed satellite is broken up exactly once.
+        """
+        import numpy as np
+
+        dt_sec = delta_time_ms / 1000.0
+        on_shell = [[] for _ in self.shells]
+        for sat in satellites:
+            k = self._shell_index.get(sat.shell.altitude_km)
+            if k is None:
+                continue
+            if sat.status == 'operational':
+                on_shell[k].append(sat)
+            elif sat.status == 'destroyed' and self.fragments:
+                self.spawn(k, sat.angle, self.fragments)
+
+        hit = []
+        for k, shell in enumerate(self.shells):
+            angle = (self.angle[k] + self.speed[k] * dt_sec) % TWO_PI
+            order = np.argsort(angle, kind="stable")
+            angle = self.angle[k] = angle[order]
+            offset = self.offset[k] = self.offset[k][order]
+            speed = self.speed[k] = self.speed[k][order]
+            sats = on_shell[k]
+            if not sats or not len(angle):
+                continue
+
+            radius = shell.orbit_radius_km
+            omega = shell.angular_speed_rad_per_sec
+            sat_angle = np.fromiter((sat.angle for sat in sats), np.float64, len(sats))
+            reach = self.hit_km / radius
+            drift = float(np.abs(speed - omega).max()) * dt_sec
+            s, d = sweep_pairs(angle, sat_angle, reach + drift)
+            if not len(s):
+                continue
+            #separation along the shell at the end of the tick and at its start
+            after = (angle[d] - sat_angle[s] + math.pi) % TWO_PI - math.pi
+            before = after - (speed[d] - omega) * dt_sec
+            closest = np.where(before * after <= 0.0, 0.0, np.minimum(np.abs(before), np.abs(after)))
+            close = (closest * radius) ** 2 + offset[d] ** 2 <= self.hit_km ** 2
+            hit.extend(sats[i] for i in np.unique(s[close]).tolist())
+
+        for sat in hit:
+            self.hits += 1
+            sat.ctx.stats.on_debris_hit(sat)
+            log.warning("Satellite %s hit by debris!", sat.name, extra=event("ERROR", sat.ctx.stats.now_ms))
+            sat.damage(current_ticks)
+        return len(hit)
+
+    def positions(self):
+        """ x, y pixel arrays of every fragment. """
+        import numpy as np
+
+        xs, ys = [], []
+        for k, shell in enumerate(self.shells):
+            r = (shell.orbit_radius_km + self.offset[k]) * SCALE_FACTOR
+            xs.append(EARTH_POSITION[0] + r * np.cos(self.angle[k]))
+            ys.append(EARTH_POSITION[1] + r * np.sin(self.angle[k]))
+        return np.concatenate(xs), np.concatenate(ys)
+
+
+def debris_for(ctx, count=None):
+    """ A debris field seeded from the run's random stream. """
+    return DebrisField(DEBRIS_COUNT if count is None else count, seed=ctx.rng.getrandbits(32))
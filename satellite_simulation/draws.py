@@ -0,0 +1,90 @@
+""" Damage draws: the run's random stream by default, or uniforms keyed by (seed, tick, slot).
+
+variance.py builds on the keyed draws for common random numbers, antithetic pairs and
+importance sampling of rare damage.
+"""
+import math
+
+#proposal probabilities stay below this, so misses keep a usable likelihood ratio
+MAX_PROPOSAL_PROBABILITY = 0.5
+
+
+class StreamDraws:
+    """ Damage draws taken from the run's random stream in call order; the default. """
+
+    log_weight = 0.0
+    weight = 1.0
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def begin_tick(self, fleet_size, station_count):
+        pass
+
+    def satellite(self, slot, probability):
+        return self.rng.random() < probability
+
+    def station(self, station_id, probability):
+        return self.rng.random() < probability
+
+
+def _ratio_terms(probability, proposal):
+    """ (log ratio on a hit, log ratio on a miss) of a draw made with proposal instead of probability. """
+    if proposal == probability:
+        return 0.0, 0.0
+    if proposal <= 0:
+        raise ValueError(f"Importance proposal {proposal} never draws damage of probability {probability}")
+    hit = math.log(probability / proposal) if probability > 0 else -math.inf
+    return hit, math.log1p(-probability) - math.log1p(-proposal)
+
+
+class DamageDraws:
+    """ Damage draws keyed by (seed, tick, slot), optionally antithetic and importance-sampled. """
+
+    def __init__(self, seed, antithetic=False, proposal=None):
+        self.seed = seed
+        self.antithetic = antithetic
+        if proposal is not None:
+            if len(proposal) != 2:
+                raise ValueError(f"Importance proposal needs (satellite, station) probabilities, got {proposal!r}")
+            for q in proposal:
+                if not 0.0 <= q <= 1.0:
+                    raise ValueError(f"Importance proposal probability {q} is outside [0, 1]")
+        self.proposal = None if proposal is None else tuple(min(q, MAX_PROPOSAL_PROBABILITY) for q in proposal)
+        self.tick = 0
+        self.log_weight = 0.0
+        self._satellite = self._station = None
+        self._terms = {}
+
+    @property
+    def weight(self):
+        return math.exp(self.log_weight)
+
+    def begin_tick(self, fleet_size, station_count):
+        import numpy as np
+
+        blocks = []
+        for stream, size in enumerate((fleet_size, station_count)):
+            u = np.random.default_rng([self.seed, self.tick, stream]).random(size)
+            blocks.append(1.0 - u if self.antithetic else u)
+        self._satellite, self._station = blocks
+        self.tick += 1
+
+    def _draw(self, u, probability, kind):
+        if self.proposal is None:
+            return u < probability
+        q = self.proposal[kind]
+        terms = self._terms.get((probability, q))
+        if terms is None:
+            terms = self._terms[(probability, q)] = _ratio_terms(probability, q)
+        if u < q:
+            self.log_weight += terms[0]
+            return True
+        self.log_weight += terms[1]
+        return False
+
+    def satellite(self, slot, probability):
+        return self._draw(self._satellite[slot], probability, 0)
+
+    def station(self, station_id, probability):
+        return self._draw(self._station[station_id], probability, 1)
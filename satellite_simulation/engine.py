@@ -0,0 +1,229 @@
+import time
+from config import CONTACT_CACHE_DIR, CONTACT_MIN_HORIZON_SEC, DEBRIS_ENABLED, ISL_ENABLED, WEATHER_ENABLED
+from contacts import ContactCache, contact_tracker
+from context import SimulationContext
+from debris import debris_for
+from draws import DamageDraws
+from routing import LinkRouter
+from scheduler import PriorityScheduler
+from stats import LoadSeries
+from startsimulation import start_simulation
+from weather import weather_for
+
+HEADLESS_TICK_MS = 1000 / 60
+ASYNC_YIELD_EVERY_TICKS = 60
+
+
+class Simulation:
+    """ Entities and per-tick logic of one simulation run, independent of the pygame UI. """
+
+    def __init__(self, ctx=None):
+        self.ctx = ctx if ctx is not None else SimulationContext()
+        self.satellites = []
+        self.stations = []
+        self.active_losses = {}
+        self.connection_loss_log = []
+        self.elapsed_simulation_time_ms = 0.0
+        self.total_duration_ms = 0.0
+        self.scheduler = PriorityScheduler()
+        self.router = LinkRouter() if ISL_ENABLED else None
+        self.weather = weather_for(self.ctx) if WEATHER_ENABLED else None
+        self.debris = debris_for(self.ctx) if DEBRIS_ENABLED else None
+        #contact schedules for visibility, None to test geometry every tick
+        self.contact_cache = ContactCache(CONTACT_CACHE_DIR) if CONTACT_CACHE_DIR else None
+        self.contacts = None
+        self.load_series = LoadSeries()
+        self.recorder = None
+        self.exporter = None
+        self.metrics = None
+        self._last_conn = None
+
+    def reset(self, ctx=None):
+        self.ctx = ctx if ctx is not None else self.ctx.derive()
+        self.satellites.clear()
+        self.stations.clear()
+        self.active_losses.clear()
+        self.connection_loss_log.clear()
+        self.elapsed_simulation_time_ms = 0.0
+        self.total_duration_ms = 0.0
+        self.scheduler.reset()
+        self.router = LinkRouter() if ISL_ENABLED else None
+        self.weather = weather_for(self.ctx) if WEATHER_ENABLED else None
+        self.debris = debris_for(self.ctx) if DEBRIS_ENABLED else None
+        #contact schedules for visibility, None to test geometry every tick
+        self.contact_cache = ContactCache(CONTACT_CACHE_DIR) if CONTACT_CACHE_DIR else None
+        self.contacts = None
+        self.load_series = LoadSeries()
+        self.recorder = None
+        if self.exporter:
+            self.exporter.close()
+        self.exporter = None
+        self._last_conn = None
+
+    def current_connections(self):
+        return {sat: sat.connected_to for sat in self.satellites if sat.status != 'destroyed'}
+
+    def remaining_ms(self):
+        return max(0.0, self.total_duration_ms - self.elapsed_simulation_time_ms)
+
+    def contact_tracker(self):
+        """ The contact tracker for the current geometry and time, or None when schedules are off. """
+        if self.contact_cache is None:
+            return None
+        now = self.elapsed_simulation_time_ms
+        if self.contacts is None or not self.contacts.valid_for(self.stations, now):
+            horizon = max(self.remaining_ms(), CONTACT_MIN_HORIZON_SEC * 1000.0)
+            self.contacts = contact_tracker(self.satellites, self.stations, now, horizon, self.contact_cache)
+        else:
+            self.contacts.advance(now)
+        return self.contacts
+
+    def step(self, current_ticks, delta_time_ms):
+        tick_start = time.perf_counter()
+        #connections as they were at the end of the previous tick, before any UI edits
+        prev_conn = self._last_conn if self._last_conn is not None else self.current_connections()
+        self.elapsed_simulation_time_ms += delta_time_ms
+        self.ctx.stats.now_ms = self.elapsed_simulation_time_ms
+        self.ctx.stats.on_generation(*self.ctx.fleet.generate(delta_time_ms))
+        self.ctx.draws.begin_tick(len(self.ctx.fleet.data), self.ctx.station_id_counter)
+        self.ctx.jammers.evaluate(self.satellites, len(self.ctx.fleet.data))
+        if self.weather:
+            self.weather.update(self.stations, delta_time_ms)
+
+        for sat in list(self.satellites):
+            sat.update(current_ticks, self.stations, delta_time_ms)
+        self.ctx.jammers.settle(self.ctx.stats)
+        for station in self.stations:
+            station.update(current_ticks)
+        if self.debris is not None:
+            self.debris.step(self.satellites, current_ticks, delta_time_ms)
+
+        self.satellites[:] = [sat for sat in self.satellites if sat.status != 'destroyed']
+
+        contacts = self.contact_tracker()
+        in_range = contacts.in_range if contacts else lambda station, sat: station.is_satellite_in_range(sat)
+        for station in self.stations:
+            for sat in list(station.connected_satellites):
+                if not in_range(station, sat) or sat.status != 'operational':
+                    station.disconnect_satellite(sat)
+        self.scheduler.assign(self.satellites, self.stations, self.elapsed_simulation_time_ms, contacts)
+        if self.router:
+            self.router.forward(self.satellites, delta_time_ms, self.scheduler.weight_of)
+
+        #outages are timed on the simulation clock, so seeded runs report the same ones
+        now_sec = self.elapsed_simulation_time_ms / 1000.0
+        current_conn = self.current_connections()
+        for sat, old_station in prev_conn.items():
+            if sat not in current_conn or current_conn[sat] is None:
+                if old_station is not None:
+                    key = (sat, old_station)
+                    if key not in self.active_losses:
+                        self.active_losses[key] = {'start_time': now_sec, 'sat_pos': (sat.x, sat.y), 'st_pos': (old_station.x, old_station.y)}
+        for sat, new_station in current_conn.items():
+            if new_station is not None:
+                key = (sat, new_station)
+                if key in self.active_losses:
+                    info = self.active_losses.pop(key)
+                    duration = now_sec - info['start_time']
+                    self.connection_loss_log.append({'sat': sat.name, 'station': new_station.id, 'start_time': info['start_time'], 'duration': duration})
+                    self.ctx.stats.on_outage(duration)
+        self.load_series.sample(self.elapsed_simulation_time_ms, self.stations)
+        if self.recorder:
+            self.recorder.record_tick(self, current_ticks, prev_conn, current_conn)
+        if self.exporter:
+            self.exporter.record_tick(self, prev_conn, current_conn)
+        self._last_conn = current_conn
+        if self.metrics:
+            self.metrics.record_tick(self, (time.perf_counter() - tick_start) * 1000.0)
+
+    def close_active_losses(self):
+        now = self.elapsed_simulation_time_ms / 1000.0
+        for (sat, station), info in self.active_losses.items():
+            duration = now - info['start_time']
+            self.connection_loss_log.append({
+                'sat': sat.name,
+                'station': station.id if station else 'None',
+                'start_time': info['start_time'],
+                'duration': duration
+            })
+            self.ctx.stats.on_outage(duration)
+        self.active_losses.clear()
+
+    def class_metrics(self):
+        return self.scheduler.summary(self.satellites + self.ctx.destroyed_satellites_log, self.elapsed_simulation_time_ms)
+
+
+def setup_simulation(params, seed=None):
+    sim = Simulation(SimulationContext(seed))
+    sim.total_duration_ms = (int(params["duration"]) * 60 + int(params["duration_seconds"])) * 1000.0
+    start_simulation(sim.satellites, sim.stations, lambda: None, params, sim.ctx)
+    sim.scheduler.preemption = bool(params.get("preemption", sim.scheduler.preemption))
+    if params.get("inter_satellite_links", ISL_ENABLED):
+        sim.router = LinkRouter()
+    #True for generated weather, or the path of a weather file
+    weather = params.get("weather", WEATHER_ENABLED)
+    if isinstance(weather, str) or (weather and sim.weather is None):
+        sim.weather = weather_for(sim.ctx, weather if isinstance(weather, str) else None)
+    elif not weather:
+        sim.weather = None
+    #True for DEBRIS_COUNT fragments, or a fragment count
+    debris = params.get("debris", DEBRIS_ENABLED)
+    if not debris:
+        sim.debris = None
+    elif debris is not True or sim.debris is None:
+        sim.debris = debris_for(sim.ctx, None if debris is True else int(debris))
+    #a directory for cached contact schedules, True to compute them for this run only
+    contact_cache = params.get("contact_cache", CONTACT_CACHE_DIR)
+    if contact_cache:
+        sim.contact_cache = ContactCache(contact_cache if isinstance(contact_cache, str) else None)
+    else:
+        sim.contact_cache = None
+    #damage draws keyed by (seed, tick, slot); mirrored, or drawn with the (satellite, station)
+    #damage probabilities of an importance proposal, for variance reduction
+    proposal = params.get("importance_proposal")
+    if params.get("common_random_numbers") or params.get("antithetic") or proposal:
+        draws_seed = seed if seed is not None else sim.ctx.rng.getrandbits(63)
+        sim.ctx.draws = DamageDraws(draws_seed, bool(params.get("antithetic")), proposal)
+    return sim
+
+
+def run_simulation(params, seed=None, tick_ms=HEADLESS_TICK_MS, export_dir=None):
+    """ Runs one simulation to completion without a display, on the simulation clock.
+
+    With export_dir, the event log and result tables are exported there as the run goes.
+    """
+    sim = setup_simulation(params, seed)
+    if export_dir:
+        from export import ResultsExporter
+        sim.exporter = ResultsExporter(export_dir)
+        sim.exporter.start(sim)
+    while sim.remaining_ms() > 0:
+        sim.step(sim.elapsed_simulation_time_ms, tick_ms * sim.ctx.simulation_speed)
+    sim.close_active_losses()
+    if sim.exporter:
+        sim.exporter.finish(sim)
+    return sim
+
+
+async def run_simulation_async(params, seed=None, tick_ms=HEADLESS_TICK_MS):
+    import asyncio
+
+    sim = setup_simulation(params, seed)
+    ticks = 0
+    while sim.remaining_ms() > 0:
+        sim.step(sim.elapsed_simulation_time_ms, tick_ms * sim.ctx.simulation_speed)
+        ticks += 1
+        if ticks % ASYNC_YIELD_EVERY_TICKS == 0:
+            await asyncio.sleep(0)
+    sim.close_active_losses()
+    return sim
+
+
+def run_simulations(param_sets, seeds=None, max_workers=None):
+    """ Runs independent simulations concurrently on a thread pool, one context per run. """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if seeds is None:
+        seeds = [None] * len(param_sets)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run_simulation, param_sets, seeds))
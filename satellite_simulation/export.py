@@ -0,0 +1,189 @@
+import csv
+import os
+from simlog import get_logger
+
+log = get_logger("export")
+
+EXPORT_DIRECTORY = "simulation_results"
+EXPORT_CHUNK_ROWS = 65536
+
+EVENT_COLUMNS = ["time_ms", "event", "satellite", "station", "value"]
+RUN_COLUMNS = ["elapsed_sec", "satellites", "stations", "total_delivered_gb", "delivery_rate_gbps",
+               "generated_gb", "overflow_lost_gb", "routed_gb", "repair_lost_gb", "jamming_lost_gb", "station_damage_events", "stations_down",
+               "satellites_damaged", "satellites_destroyed", "debris_hits", "outages", "outage_mean_sec", "outage_max_sec"]
+STATION_COLUMNS = ["station", "x", "y", "comm_radius", "capacity", "received_gb", "status",
+                   "uptime", "damage_events", "connected"]
+SATELLITE_COLUMNS = ["satellite", "priority_class", "altitude_km", "status", "onboard_gb",
+                     "overflow_gb", "delivered_gb", "drain_rate_gbps"]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+class _CsvSink:
+    def __init__(self, path, columns):
+        self.path = path + ".csv"
+        self.file = open(self.path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.columns = columns
+
+    def write(self, data):
+        self.writer.writerows(zip(*(data[name] for name in self.columns)))
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetSink:
+    def __init__(self, path, columns, pa):
+        self.path = path + ".parquet"
+        self.columns = columns
+        self.pa = pa
+        self.writer = None
+
+    def write(self, data):
+        table = self.pa.table({name: data[name] for name in self.columns})
+        if self.writer is None:
+            #the schema is taken from the first chunk
+            self.writer = self.pa.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ResultsExporter:
+    """ Writes a run as columnar tables while it is running, Parquet with pyarrow, CSV otherwise. """
+
+    def __init__(self, directory=EXPORT_DIRECTORY, chunk_rows=EXPORT_CHUNK_ROWS, fmt=None):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.pa = _pyarrow() if fmt in (None, "parquet") else None
+        if fmt == "parquet" and self.pa is None:
+            raise ImportError("pyarrow is required for Parquet export")
+        self.format = "parquet" if self.pa else "csv"
+        self.events = None
+        self._buffer = {name: [] for name in EVENT_COLUMNS}
+        self._rows = 0
+        self.event_count = 0
+        self._loss_cursor = 0
+        self._sat_status = {}
+        self._st_status = {}
+
+    def _sink(self, name, columns):
+        path = os.path.join(self.directory, name)
+        if self.pa:
+            return _ParquetSink(path, columns, self.pa)
+        return _CsvSink(path, columns)
+
+    def _write_table(self, name, columns, rows):
+        sink = self._sink(name, columns)
+        sink.write({col: [row[i] for row in rows] for i, col in enumerate(columns)})
+        sink.close()
+
+    def _emit(self, time_ms, event, satellite="", station=-1, value=0.0):
+        buf = self._buffer
+        buf["time_ms"].append(float(time_ms))
+        buf["event"].append(event)
+        buf["satellite"].append(satellite)
+        buf["station"].append(station)
+        buf["value"].append(float(value))
+        self._rows += 1
+        self.event_count += 1
+        if self._rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self._rows:
+            self.events.write(self._buffer)
+            self._buffer = {name: [] for name in EVENT_COLUMNS}
+            self._rows = 0
+
+    def start(self, sim):
+        os.makedirs(self.directory, exist_ok=True)
+        self.events = self._sink("events", EVENT_COLUMNS)
+        for sat in sim.satellites:
+            self._sat_status[sat] = sat.status
+        for st in sim.stations:
+            self._st_status[st] = st.status
+        self._loss_cursor = len(sim.connection_loss_log)
+
+    def record_tick(self, sim, prev_conn, current_conn):
+        time_ms = sim.elapsed_simulation_time_ms
+
+        for sat, old_station in prev_conn.items():
+            new_station = current_conn.get(sat)
+            if old_station is not None and new_station is not old_station:
+                self._emit(time_ms, "disconnect", sat.name, old_station.id)
+        for sat, new_station in current_conn.items():
+            if new_station is not None and prev_conn.get(sat) is not new_station:
+                self._emit(time_ms, "connect", sat.name, new_station.id)
+
+        current = set(sim.satellites)
+        for sat, old_status in list(self._sat_status.items()):
+            status = sat.status if sat in current else 'destroyed'
+            if status == old_status:
+                continue
+            if status == 'destroyed':
+                if old_status == 'operational':
+                    self._emit(time_ms, "satellite_damaged", sat.name)
+                self._emit(time_ms, "satellite_destroyed", sat.name)
+                del self._sat_status[sat]
+                continue
+            if status == 'damaging':
+                self._emit(time_ms, "satellite_damaged", sat.name)
+            self._sat_status[sat] = status
+        for sat in sim.satellites:
+            if sat not in self._sat_status:
+                self._sat_status[sat] = sat.status
+        for st in sim.stations:
+            old_status = self._st_status.get(st, st.status)
+            if st.status != old_status:
+                if st.status == 'damaged':
+                    self._emit(time_ms, "station_damaged", station=st.id)
+                else:
+                    lost = st.damage_log[-1][2] if st.damage_log and len(st.damage_log[-1]) > 2 else 0.0
+                    self._emit(time_ms, "station_repaired", station=st.id, value=lost)
+            self._st_status[st] = st.status
+
+        log = sim.connection_loss_log
+        for ev in log[self._loss_cursor:]:
+            station = ev['station'] if isinstance(ev['station'], int) else -1
+            self._emit(time_ms, "outage", ev['sat'], station, ev['duration'])
+        self._loss_cursor = len(log)
+
+    def finish(self, sim):
+        """ Flushes the event log and writes the run, station and satellite tables. """
+        self.record_tick(sim, {}, {})
+        self.flush()
+        self.close()
+
+        stats = sim.ctx.stats
+        summary = stats.summary()
+        summary["satellites"] = len(sim.satellites) + len(sim.ctx.destroyed_satellites_log)
+        summary["stations"] = len(sim.stations)
+        self._write_table("run", RUN_COLUMNS, [[summary[col] for col in RUN_COLUMNS]])
+
+        elapsed_ms = sim.elapsed_simulation_time_ms
+        self._write_table("stations", STATION_COLUMNS, [
+            [st.id, float(st.x), float(st.y), float(st.comm_radius), st.capacity, float(st.received_data), st.status,
+             stats.station_uptime(st.id, elapsed_ms), len(st.damage_log), len(st.connected_satellites)]
+            for st in sim.stations])
+        self._write_table("satellites", SATELLITE_COLUMNS, [
+            [sat.name, sat.priority_class, float(sat.altitude_km), sat.status, float(sat.data_amount),
+             float(sat.overflow_lost), float(sat.delivered_data), stats.drain_rate(sat.name, elapsed_ms)]
+            for sat in sim.satellites + sim.ctx.destroyed_satellites_log])
+        log.info("Results export: %s/ (%s, %d events)", self.directory, self.format, self.event_count)
+
+    def close(self):
+        if self.events is not None:
+            self.events.close()
+            self.events = None
@@ -0,0 +1,138 @@
+""" Immutable render frames of a simulation, for drawing on a thread that does not own it.
+
+A frame copies what the UI draws into flat arrays and small records once per tick; after
+capture nothing in it refers to live simulation objects, so the UI thread can draw and
+pick stations from it while the simulation steps on.
+"""
+import threading
+from collections import namedtuple
+from station import Station
+
+#connection loss lines stay on screen this long, in simulated seconds
+LOSS_LINE_SEC = 1.5
+
+SAT_STATUSES = ('operational', 'damaging', 'destroyed')
+_STATUS_CODE = {status: code for code, status in enumerate(SAT_STATUSES)}
+
+#the attributes sprites.draw_satellites reads from a satellite
+SatelliteRow = namedtuple("SatelliteRow", "name x y angle status initial_color color blink_on "
+                                          "transferring is_in_burst data_amount connected_to")
+
+
+class StationRow:
+    """ A station as it stood at capture; connected_satellites holds the satellite row indexes. """
+
+    __slots__ = ("id", "x", "y", "comm_radius", "size", "capacity", "received_data", "status",
+                 "base_angle_rad", "connected_satellites", "surface")
+
+    #drawn by the same code as a live station
+    draw = Station.draw
+
+    def __init__(self, station, connected):
+        self.id = station.id
+        self.x = station.x
+        self.y = station.y
+        self.comm_radius = station.comm_radius
+        self.size = station.size
+        self.capacity = station.capacity
+        self.received_data = station.received_data
+        self.status = station.status
+        self.base_angle_rad = station.base_angle_rad
+        self.connected_satellites = connected
+        self.surface = None
+
+
+class SatelliteRows:
+    """ Column arrays of every satellite in a frame; indexing builds a SatelliteRow. """
+
+    def __init__(self, satellites, station_rows):
+        import numpy as np
+
+        n = len(satellites)
+        index = {row.id: j for j, row in enumerate(station_rows)}
+        self.stations = station_rows
+        self.x = np.fromiter((sat.x for sat in satellites), np.float64, n)
+        self.y = np.fromiter((sat.y for sat in satellites), np.float64, n)
+        self.angle = np.fromiter((sat.angle for sat in satellites), np.float64, n)
+        self.data = np.fromiter((sat.data_amount for sat in satellites), np.float64, n)
+        self.status = np.fromiter((_STATUS_CODE[sat.status] for sat in satellites), np.uint8, n)
+        #bit 0 transferring, bit 1 blink on, bit 2 in burst
+        self.flags = np.fromiter((sat.transferring | sat.blink_on << 1 | sat.is_in_burst << 2
+                                  for sat in satellites), np.uint8, n)
+        self.link = np.fromiter((-1 if sat.connected_to is None else index.get(sat.connected_to.id, -1)
+                                 for sat in satellites), np.int32, n)
+        self.names = tuple(sat.name for sat in satellites)
+        self.colors = tuple(sat.initial_color for sat in satellites)
+        self.current_colors = tuple(sat.color for sat in satellites)
+        for array in (self.x, self.y, self.angle, self.data, self.status, self.flags, self.link):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        flags = int(self.flags[i])
+        link = int(self.link[i])
+        return SatelliteRow(self.names[i], float(self.x[i]), float(self.y[i]), float(self.angle[i]),
+                            SAT_STATUSES[self.status[i]], self.colors[i], self.current_colors[i],
+                            bool(flags & 2), bool(flags & 1), bool(flags & 4), float(self.data[i]),
+                            self.stations[link] if link >= 0 else None)
+
+    def pixel_colors(self, indexes, damaging_color):
+        """ Colour of each indexed satellite when drawn as a single pixel. """
+        damaging = _STATUS_CODE['damaging']
+        return [damaging_color if self.status[i] == damaging else self.colors[i] for i in indexes.tolist()]
+
+
+class RenderFrame:
+    """ What the UI draws of one tick: satellites, stations, loss lines, overlays and the clock. """
+
+    def __init__(self, sim):
+        stations = sim.stations
+        sat_rows = {sat: j for j, sat in enumerate(sim.satellites)}
+        self.stations = tuple(StationRow(st, tuple(sat_rows[sat] for sat in st.connected_satellites if sat in sat_rows))
+                              for st in stations)
+        self.satellites = SatelliteRows(sim.satellites, self.stations)
+        self.elapsed_ms = sim.elapsed_simulation_time_ms
+        self.remaining_ms = sim.remaining_ms()
+        self.speed = sim.ctx.simulation_speed
+        now = sim.elapsed_simulation_time_ms / 1000.0
+        live_stations = set(stations)
+        self.losses = tuple((info['sat_pos'], info['st_pos']) for (sat, station), info in list(sim.active_losses.items())
+                            if now - info['start_time'] < LOSS_LINE_SEC and sat in sat_rows and station in live_stations)
+        self.jammers = tuple(sim.ctx.jammers.jammers)
+        self.weather = sim.weather.frozen() if sim.weather else None
+        self.debris = sim.debris.positions() if sim.debris is not None else None
+
+    def station(self, station_id):
+        """ The row of the station with station_id, or None if it is gone. """
+        for row in self.stations:
+            if row.id == station_id:
+                return row
+        return None
+
+
+class FrameBuffer:
+    """ Two frame slots: the writer fills the back slot and flips, the reader takes the front one. """
+
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._lock = threading.Lock()
+        self._taken = True
+
+    def wanted(self):
+        """ True once the reader took the front frame, so a new capture will be seen. """
+        return self._taken
+
+    def publish(self, frame):
+        back = 1 - self._front
+        self._slots[back] = frame
+        with self._lock:
+            self._front = back
+            self._taken = False
+
+    def latest(self):
+        with self._lock:
+            self._taken = True
+            return self._slots[self._front]
@@ -0,0 +1,135 @@
+from array import array
+from config import *
+
+#a link keeps one bit per jammer covering it, to count when a link enters a footprint
+JAMMER_LIMIT = 64
+
+
+def link_factors(jammers, sx, sy, tx, ty):
+    """ Share of data every jammer takes from every link (jammers x links).
+
+    jammers is a (jammers x 4) array of x, y, power, footprint; a link is the segment from
+    a satellite (sx, sy) to its station (tx, ty). A jammer takes its power where the link
+    passes through it, fading quadratically to nothing at the footprint edge.
+    """
+    import numpy as np
+
+    jx, jy, power, radius = (jammers[:, k][:, None] for k in range(4))
+    dx, dy = tx - sx, ty - sy
+    length_sq = np.maximum(dx * dx + dy * dy, 1e-12)
+    t = np.clip(((jx - sx) * dx + (jy - sy) * dy) / length_sq, 0.0, 1.0)
+    px, py = sx + t * dx - jx, sy + t * dy - jy
+    reach = np.clip(1.0 - np.sqrt(px * px + py * py) / radius, 0.0, 1.0)
+    return power * reach * reach
+
+
+def link_masks(factors):
+    """ Bitmask of the jammers covering each link. """
+    import numpy as np
+
+    bits = np.left_shift(np.uint64(1), np.arange(len(factors), dtype=np.uint64))
+    return np.where(factors > 0, bits[:, None], np.uint64(0)).sum(axis=0, dtype=np.uint64)
+
+
+def onsets(factors, masks, previous):
+    """ Per jammer, how many links entered its footprint since the previous tick. """
+    import numpy as np
+
+    bits = np.left_shift(np.uint64(1), np.arange(len(factors), dtype=np.uint64))
+    fresh = masks & ~previous
+    return ((fresh[None, :] & bits[:, None]) != 0).sum(axis=1)
+
+
+def loss_shares(factors):
+    """ How the loss of each link splits between the jammers on it (jammers x links). """
+    import numpy as np
+
+    #the kept share is a product over jammers, so each one's part of the loss follows its log
+    weight = -np.log1p(-np.minimum(factors, 1.0 - 1e-12))
+    total = weight.sum(axis=0)
+    return np.divide(weight, total, out=np.zeros_like(weight), where=total > 0)
+
+
+class JammerField:
+    """ Ground jammers of a run and what they took from each of them. """
+
+    def __init__(self, jammers=JAMMERS):
+        self.jammers = []
+        self.lost = array('d')
+        self.events = array('q')
+        #per fleet slot: share of this tick's transfer that gets through, and what jamming took
+        self.kept = array('d')
+        self.taken = array('d')
+        self.masks = array('Q')
+        #fleet slots, loss shares and footprint entries of the links evaluated this tick
+        self._links = None
+        for x, y, power, radius in jammers:
+            self.add(x, y, power, radius)
+
+    def add(self, x, y, power, radius):
+        if len(self.jammers) >= JAMMER_LIMIT:
+            raise ValueError(f"At most {JAMMER_LIMIT} jammers are supported")
+        if not 0.0 <= power <= 1.0 or radius <= 0:
+            raise ValueError(f"Invalid jammer power {power} or footprint {radius}")
+        self.jammers.append((float(x), float(y), float(power), float(radius)))
+        self.lost.append(0.0)
+        self.events.append(0)
+
+    def derive(self):
+        """ Same jammers with nothing lost yet, for a new run. """
+        return JammerField(self.jammers)
+
+    def factor(self, slot):
+        return self.kept[slot] if slot < len(self.kept) else 1.0
+
+    def reserve(self, size):
+        """ Makes room for fleet slots below size. """
+        missing = size - len(self.kept)
+        if missing > 0:
+            self.kept.extend([1.0] * missing)
+            self.taken.extend([0.0] * missing)
+            self.masks.extend([0] * missing)
+
+    def evaluate(self, satellites, fleet_size):
+        """ Sets the kept share of every active ground link for this tick; fleet_size is the run's slot count. """
+        if not self.jammers:
+            return
+        import numpy as np
+
+        links = [sat for sat in satellites if sat.connected_to is not None and sat.status == 'operational']
+        self.reserve(fleet_size)
+        masks = np.frombuffer(self.masks, dtype=np.uint64)
+        n = len(links)
+        slots = np.fromiter((sat.slot for sat in links), np.int64, n)
+        factors = link_factors(np.array(self.jammers),
+                               np.fromiter((sat.x for sat in links), np.float64, n),
+                               np.fromiter((sat.y for sat in links), np.float64, n),
+                               np.fromiter((sat.connected_to.x for sat in links), np.float64, n),
+                               np.fromiter((sat.connected_to.y for sat in links), np.float64, n))
+        current = link_masks(factors)
+        entered = onsets(factors, current, masks[slots])
+        np.frombuffer(self.events, dtype=np.int64)[:] += entered
+        #links that ended are out of every footprint
+        masks[:] = 0
+        masks[slots] = current
+        np.frombuffer(self.kept)[slots] = np.prod(1.0 - factors, axis=0)
+        self._links = (slots, loss_shares(factors), int(entered.sum()))
+
+    def settle(self, stats):
+        """ Adds what jamming took this tick to the per-jammer totals and the run stats. """
+        if self._links is None:
+            return
+        import numpy as np
+
+        slots, shares, entered = self._links
+        self._links = None
+        taken = np.frombuffer(self.taken)
+        lost = taken[slots]
+        np.frombuffer(self.lost)[:] += shares @ lost
+        taken[slots] = 0.0
+        np.frombuffer(self.kept)[slots] = 1.0
+        stats.on_jamming(float(lost.sum()), entered)
+
+    def table(self):
+        """ (x, y, power, footprint, GB lost, events) per jammer. """
+        return [(*jammer, lost, events) for jammer, lost, events in zip(self.jammers, self.lost, self.events)]
@@ -0,0 +1,186 @@
+""" Optional localhost metrics endpoint for a running simulation.
+
+The simulation thread publishes an immutable tuple of samples by swapping a single
+reference; the asyncio server on its own thread only ever reads that reference, so
+scrapes take no locks and never touch live simulation objects.
+
+    python metrics.py [port]      prints the JSON metrics of a running simulation
+"""
+import json
+import sys
+import threading
+import time
+from simlog import get_logger
+
+log = get_logger("metrics")
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+METRICS_PUBLISH_INTERVAL_MS = 250
+METRICS_PREFIX = "satsim_"
+
+#(name, type, help) in output order
+METRICS = [
+    ("sim_time_seconds", "gauge", "Elapsed simulation time"),
+    ("satellites", "gauge", "Satellites still in orbit"),
+    ("stations", "gauge", "Ground stations"),
+    ("active_links", "gauge", "Satellite to station links currently open"),
+    ("data_delivered_gb_total", "counter", "Data delivered to stations"),
+    ("data_delivered_gb_per_second", "gauge", "Delivery rate since the previous publish, per simulated second"),
+    ("stations_damaged", "gauge", "Stations currently damaged"),
+    ("station_damage_events_total", "counter", "Station damage events"),
+    ("satellites_damaged_total", "counter", "Satellite damage events"),
+    ("satellites_destroyed_total", "counter", "Satellites destroyed"),
+    ("outages_total", "counter", "Closed satellite outages"),
+    ("tick_latency_ms", "gauge", "Wall time of the last simulation tick"),
+    ("tick_latency_ms_max", "gauge", "Worst tick wall time since the previous publish"),
+    ("ticks_total", "counter", "Simulation ticks"),
+]
+
+
+class MetricsServer:
+    """ Serves the latest published metrics as Prometheus text (/metrics) or JSON (/metrics.json). """
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT, publish_interval_ms=METRICS_PUBLISH_INTERVAL_MS):
+        self.host = host
+        self.port = port
+        self.publish_interval_ms = publish_interval_ms
+        #replaced wholesale by publish(), never mutated
+        self._samples = ()
+        self._ticks = 0
+        self._max_latency_ms = 0.0
+        self._next_publish = 0.0
+        self._last_delivered = 0.0
+        self._last_sim_ms = 0.0
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._listening = False
+        self._ready = threading.Event()
+
+    # ——— simulation thread ———
+
+    def record_tick(self, sim, latency_ms):
+        """ Called after every tick; builds a new sample tuple at most once per publish interval. """
+        self._ticks += 1
+        self._max_latency_ms = max(self._max_latency_ms, latency_ms)
+        now = time.perf_counter()
+        if now < self._next_publish:
+            return
+        self._next_publish = now + self.publish_interval_ms / 1000.0
+        self.publish(sim, latency_ms)
+
+    def publish(self, sim, latency_ms=0.0):
+        stats = sim.ctx.stats
+        sim_ms = sim.elapsed_simulation_time_ms
+        if sim_ms < self._last_sim_ms:
+            #a new run started on the same server
+            self._last_sim_ms = 0.0
+            self._last_delivered = 0.0
+        delta_sec = (sim_ms - self._last_sim_ms) / 1000.0
+        rate = (stats.total_delivered - self._last_delivered) / delta_sec if delta_sec > 0 else 0.0
+        self._last_delivered = stats.total_delivered
+        self._last_sim_ms = sim_ms
+        values = (
+            sim_ms / 1000.0,
+            len(sim.satellites),
+            len(sim.stations),
+            sum(len(station.connected_satellites) for station in sim.stations),
+            stats.total_delivered,
+            rate,
+            len(stats.station_down_since),
+            stats.station_damage_events,
+            stats.satellites_damaged,
+            stats.satellites_destroyed,
+            stats.outage_count,
+            latency_ms,
+            self._max_latency_ms,
+            self._ticks,
+        )
+        self._max_latency_ms = 0.0
+        self._samples = values
+
+    # ——— server thread ———
+
+    def render_prometheus(self):
+        samples = self._samples
+        lines = []
+        for (name, kind, help_text), value in zip(METRICS, samples):
+            lines.append(f"# HELP {METRICS_PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} {kind}")
+            lines.append(f"{METRICS_PREFIX}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def render_json(self):
+        return json.dumps({name: value for (name, _, _), value in zip(METRICS, self._samples)})
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            #drain the headers, the request line is all we route on
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if path == "/metrics":
+                status, body, ctype = "200 OK", self.render_prometheus(), "text/plain; version=0.0.4"
+            elif path == "/metrics.json":
+                status, body, ctype = "200 OK", self.render_json(), "application/json"
+            else:
+                status, body, ctype = "404 Not Found", "not found\n", "text/plain"
+            data = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        import asyncio
+
+        self._loop = asyncio.get_running_loop()
+        self._stop = self._loop.create_future()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._listening = True
+        self._ready.set()
+        async with server:
+            await self._stop
+
+    def _run(self):
+        import asyncio
+
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self._ready.set()
+
+    def start(self):
+        """ Starts serving on a daemon thread; port 0 picks a free port, stored in self.port. """
+        self._thread = threading.Thread(target=self._run, name="metrics-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if not self._listening:
+            raise OSError(f"Metrics server could not listen on {self.host}:{self.port}")
+        log.info("Metrics:       http://%s:%s/metrics", self.host, self.port)
+        return self
+
+    def stop(self):
+        if self._listening and not self._stop.done():
+            self._loop.call_soon_threadsafe(self._stop.set_result, None)
+            self._thread.join()
+
+
+def fetch_metrics(port=METRICS_PORT, host=METRICS_HOST, path="/metrics.json", timeout=2.0):
+    """ Local client: returns the parsed JSON metrics, or the raw text for /metrics. """
+    from urllib.request import urlopen
+
+    with urlopen(f"http://{host}:{port}{path}", timeout=timeout) as response:
+        body = response.read().decode("utf-8")
+    return json.loads(body) if path.endswith(".json") else body
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else METRICS_PORT
+    for name, value in fetch_metrics(port).items():
+        print(f"{name}: {value}")
@@ -0,0 +1,31 @@
+import math
+from config import EARTH_RADIUS_KM, G_KM, EARTH_MASS_KG, SCALE_FACTOR
+
+#altitude (km) -> OrbitShell, shells are immutable so one per altitude is shared by every run
+_shells = {}
+
+
+class OrbitShell:
+    """ Orbital constants of one circular altitude shell, shared by every satellite flying it. """
+
+    __slots__ = ("altitude_km", "orbit_radius_km", "speed_km_per_sec", "period_sec",
+                 "angular_speed_rad_per_sec", "orbit_radius_pixels")
+
+    def __init__(self, altitude_km):
+        self.altitude_km = altitude_km
+        self.orbit_radius_km = EARTH_RADIUS_KM + altitude_km
+        self.speed_km_per_sec = math.sqrt(G_KM * EARTH_MASS_KG / self.orbit_radius_km)
+        self.period_sec = (2 * math.pi * self.orbit_radius_km) / self.speed_km_per_sec
+        self.angular_speed_rad_per_sec = 2 * math.pi / self.period_sec
+        self.orbit_radius_pixels = self.orbit_radius_km * SCALE_FACTOR
+
+    def __repr__(self):
+        return f"OrbitShell({self.altitude_km!r})"
+
+
+def orbit_shell(altitude_km):
+    """ The cached OrbitShell of an altitude. """
+    shell = _shells.get(altitude_km)
+    if shell is None:
+        shell = _shells[altitude_km] = OrbitShell(altitude_km)
+    return shell
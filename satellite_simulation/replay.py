@@ -0,0 +1,336 @@
+import bisect
+import math
+import struct
+from array import array
+
+from config import *
+from snapshot import Snapshot
+
+REPLAY_MAGIC = b"KRPL"
+REPLAY_VERSION = 1
+KEYFRAME_INTERVAL_MS = 5000
+
+EV_CONNECT = 1
+EV_DISCONNECT = 2
+EV_SAT_DAMAGED = 3
+EV_SAT_DESTROYED = 4
+EV_STATION_DAMAGED = 5
+EV_STATION_REPAIRED = 6
+_LINK_EVENTS = (EV_CONNECT, EV_DISCONNECT)
+
+_HEADER = struct.Struct("<4sHIII")
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """ Records a run as periodic snapshot keyframes plus a delta-encoded event stream. """
+
+    def __init__(self, keyframe_interval_ms=KEYFRAME_INTERVAL_MS):
+        self.keyframe_interval_ms = keyframe_interval_ms
+        self.events = bytearray()
+        self.event_count = 0
+        self.names = []
+        self._name_index = {}
+        #(sim time ms, event byte offset, event count, time of the last event before it, snapshot bytes)
+        self.keyframes = []
+        self._last_event_ms = 0
+        self._next_keyframe_ms = 0
+        self._sat_status = {}
+        self._st_status = {}
+
+    def _sat_id(self, sat):
+        if sat.name not in self._name_index:
+            self._name_index[sat.name] = len(self.names)
+            self.names.append(sat.name)
+        return self._name_index[sat.name]
+
+    def _emit(self, time_ms, kind, a, b=0):
+        _write_varint(self.events, time_ms - self._last_event_ms)
+        self.events.append(kind)
+        _write_varint(self.events, a)
+        if kind in _LINK_EVENTS:
+            _write_varint(self.events, b)
+        self._last_event_ms = time_ms
+        self.event_count += 1
+
+    def _keyframe(self, sim, current_ticks, time_ms):
+        #keyframes only need entity state, the append-only logs would grow every one of them
+        snapshot = Snapshot.capture(sim, current_ticks, logs=False)
+        self.keyframes.append((time_ms, len(self.events), self.event_count, self._last_event_ms, snapshot.data))
+        self._next_keyframe_ms = time_ms + self.keyframe_interval_ms
+
+    def start(self, sim, current_ticks):
+        for sat in sim.satellites:
+            self._sat_id(sat)
+            self._sat_status[sat] = sat.status
+        for st in sim.stations:
+            self._st_status[st] = st.status
+        self._keyframe(sim, current_ticks, int(sim.elapsed_simulation_time_ms))
+
+    def record_tick(self, sim, current_ticks, prev_conn, current_conn):
+        time_ms = max(int(sim.elapsed_simulation_time_ms), self._last_event_ms)
+
+        for sat, old_station in prev_conn.items():
+            new_station = current_conn.get(sat)
+            if old_station is not None and new_station is not old_station:
+                self._emit(time_ms, EV_DISCONNECT, self._sat_id(sat), old_station.id)
+        for sat, new_station in current_conn.items():
+            if new_station is not None and prev_conn.get(sat) is not new_station:
+                self._emit(time_ms, EV_CONNECT, self._sat_id(sat), new_station.id)
+
+        current = set(sim.satellites)
+        for sat, old_status in list(self._sat_status.items()):
+            status = sat.status if sat in current else 'destroyed'
+            if status == old_status:
+                continue
+            if status == 'damaging':
+                self._emit(time_ms, EV_SAT_DAMAGED, self._sat_id(sat))
+            elif status == 'destroyed':
+                if old_status == 'operational':
+                    self._emit(time_ms, EV_SAT_DAMAGED, self._sat_id(sat))
+                self._emit(time_ms, EV_SAT_DESTROYED, self._sat_id(sat))
+                del self._sat_status[sat]
+                continue
+            self._sat_status[sat] = status
+        for st in sim.stations:
+            old_status = self._st_status.get(st, st.status)
+            if st.status != old_status:
+                self._emit(time_ms, EV_STATION_DAMAGED if st.status == 'damaged' else EV_STATION_REPAIRED, st.id)
+            self._st_status[st] = st.status
+
+        if time_ms >= self._next_keyframe_ms:
+            self._keyframe(sim, current_ticks, time_ms)
+
+    def finish(self, sim, current_ticks):
+        self._keyframe(sim, current_ticks, max(int(sim.elapsed_simulation_time_ms), self._last_event_ms))
+
+    def save(self, filename):
+        out = bytearray(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.keyframe_interval_ms,
+                                     len(self.keyframes), self.event_count))
+        encoded_names = [name.encode("utf-8") for name in self.names]
+        out += struct.pack("<I", len(encoded_names))
+        for name in encoded_names:
+            out += struct.pack("<H", len(name)) + name
+        for time_ms, offset, count, base_ms, data in self.keyframes:
+            out += struct.pack("<QIIQI", time_ms, offset, count, base_ms, len(data))
+            out += data
+        out += struct.pack("<I", len(self.events))
+        out += self.events
+        with open(filename, "wb") as f:
+            f.write(out)
+
+
+class ReplayPlayer:
+    """ Seeks a recorded replay from the nearest keyframe at or before the target time. """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            data = f.read()
+        magic, version, self.keyframe_interval_ms, keyframe_count, self.event_count = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("Not a replay file")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"Unsupported replay version {version}")
+        pos = _HEADER.size
+        name_count, = struct.unpack_from("<I", data, pos)
+        pos += 4
+        self.names = []
+        for _ in range(name_count):
+            length, = struct.unpack_from("<H", data, pos)
+            pos += 2
+            self.names.append(data[pos:pos + length].decode("utf-8"))
+            pos += length
+        self.keyframe_times = array('q')
+        self.keyframes = []
+        for _ in range(keyframe_count):
+            time_ms, offset, count, base_ms, size = struct.unpack_from("<QIIQI", data, pos)
+            pos += struct.calcsize("<QIIQI")
+            self.keyframe_times.append(time_ms)
+            self.keyframes.append((offset, base_ms, Snapshot(data[pos:pos + size])))
+            pos += size
+        if not self.keyframes:
+            raise ReplayError("Replay has no keyframes")
+        size, = struct.unpack_from("<I", data, pos)
+        self.events = data[pos + 4:pos + 4 + size]
+
+        self.sim = None
+        self.time_ms = 0
+        self._keyframe_index = -1
+        self._event_pos = 0
+        self._event_time = 0
+        self._sats = {}
+        self._stations = {}
+        self._moved_at = {}
+        self._damaged_at = {}
+
+    @property
+    def duration_ms(self):
+        return self.keyframe_times[-1]
+
+    def _load_keyframe(self, index):
+        offset, base_ms, snapshot = self.keyframes[index]
+        self.sim = snapshot.restore(0)
+        self._keyframe_index = index
+        self._event_pos = offset
+        self._event_time = base_ms
+        self.time_ms = self.keyframe_times[index]
+        self._sats = {sat.name: sat for sat in self.sim.satellites}
+        self._stations = {st.id: st for st in self.sim.stations}
+        self._moved_at = {sat: self.time_ms for sat in self.sim.satellites}
+        #restored onto tick 0, so blink_start_time is now relative to the keyframe
+        self._damaged_at = {sat: self.time_ms + sat.blink_start_time
+                            for sat in self.sim.satellites if sat.status == 'damaging'}
+
+    def _advance(self, sat, time_ms):
+        if sat.status == 'operational':
+            sat.angle = (sat.angle + sat.angular_speed_rad_per_sec * (time_ms - self._moved_at[sat]) / 1000.0) % (2 * math.pi)
+            sat.x = EARTH_POSITION[0] + sat.orbit_radius_pixels * math.cos(sat.angle)
+            sat.y = EARTH_POSITION[1] + sat.orbit_radius_pixels * math.sin(sat.angle)
+        self._moved_at[sat] = time_ms
+
+    def _apply_events(self, until_ms):
+        data = self.events
+        pos = self._event_pos
+        while pos < len(data):
+            delta, next_pos = _read_varint(data, pos)
+            time_ms = self._event_time + delta
+            if time_ms > until_ms:
+                break
+            kind = data[next_pos]
+            a, next_pos = _read_varint(data, next_pos + 1)
+            if kind in _LINK_EVENTS:
+                b, next_pos = _read_varint(data, next_pos)
+            pos = next_pos
+            self._event_time = time_ms
+
+            if kind in (EV_STATION_DAMAGED, EV_STATION_REPAIRED):
+                st = self._stations.get(a)
+                if st:
+                    st.status = 'damaged' if kind == EV_STATION_DAMAGED else 'operational'
+                continue
+            sat = self._sats.get(self.names[a])
+            if sat is None:
+                continue
+            self._advance(sat, time_ms)
+            if kind == EV_CONNECT:
+                st = self._stations.get(b)
+                if st and sat not in st.connected_satellites:
+                    st.connected_satellites.append(sat)
+                    sat.connected_to = st
+            elif kind == EV_DISCONNECT:
+                st = self._stations.get(b)
+                if st and sat in st.connected_satellites:
+                    st.connected_satellites.remove(sat)
+                if sat.connected_to is st:
+                    sat.connected_to = None
+            elif kind == EV_SAT_DAMAGED:
+                sat.status = 'damaging'
+                sat.is_blinking = True
+                self._damaged_at[sat] = time_ms
+            elif kind == EV_SAT_DESTROYED:
+                sat.status = 'destroyed'
+                sat.is_blinking = False
+                self.sim.satellites.remove(sat)
+                del self._sats[sat.name]
+        self._event_pos = pos
+
+    def seek(self, time_ms):
+        time_ms = max(0, min(int(time_ms), self.duration_ms))
+        index = max(0, bisect.bisect_right(self.keyframe_times, time_ms) - 1)
+        #stepping forward inside the current keyframe interval needs no restore
+        if index != self._keyframe_index or time_ms < self.time_ms:
+            self._load_keyframe(index)
+        self._apply_events(time_ms)
+        for sat in self.sim.satellites:
+            self._advance(sat, time_ms)
+            sat.transferring = sat.connected_to is not None
+            if sat.status == 'damaging':
+                sat.blink_on = ((time_ms - self._damaged_at.get(sat, time_ms)) // BLINK_INTERVAL_MS) % 2 == 0
+        self.time_ms = time_ms
+        return self.sim
+
+
+def run_replay_viewer(screen, clock, filename, capacity_font, info_font):
+    import pygame
+    from sprites import draw_satellites
+
+    player = ReplayPlayer(filename)
+    player.seek(0)
+    playing = True
+    playback_speed = 1.0
+    bar = pygame.Rect(60, HEIGHT - 40, WIDTH - 120, 10)
+    dragging = False
+
+    running = True
+    while running:
+        delta_time_ms = clock.tick(60)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                step = 60000 if event.mod & pygame.KMOD_SHIFT else 10000
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    playing = not playing
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.time_ms + step)
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.time_ms - step)
+                elif event.key == pygame.K_HOME:
+                    player.seek(0)
+                elif event.key == pygame.K_END:
+                    player.seek(player.duration_ms)
+                elif event.key == pygame.K_UP:
+                    playback_speed = min(64.0, playback_speed * 2)
+                elif event.key == pygame.K_DOWN:
+                    playback_speed = max(0.25, playback_speed / 2)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and bar.inflate(0, 20).collidepoint(event.pos):
+                dragging = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                dragging = False
+            if dragging and event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                ratio = max(0.0, min(1.0, (event.pos[0] - bar.x) / bar.width))
+                player.seek(ratio * player.duration_ms)
+
+        if playing and not dragging and player.time_ms < player.duration_ms:
+            player.seek(player.time_ms + delta_time_ms * playback_speed)
+        sim = player.sim
+
+        draw_background(screen)
+        for station in sim.stations: station.draw(screen, False, capacity_font)
+        draw_satellites(screen, sim.satellites)
+
+        pygame.draw.rect(screen, (100, 100, 100), bar, border_radius=5)
+        progress = player.time_ms / player.duration_ms if player.duration_ms else 0.0
+        pygame.draw.rect(screen, YELLOW, (bar.x, bar.y, int(bar.width * progress), bar.height), border_radius=5)
+        total_sec = player.time_ms / 1000.0
+        state = "Playing" if playing else "Paused"
+        info_text = (f"Replay {int(total_sec // 60):02d}:{total_sec % 60:04.1f} / {player.duration_ms / 60000.0:.1f} min"
+                     f" | {state} {playback_speed:g}x | Space play/pause, Left/Right seek (Shift = 1 min), Up/Down speed, Esc quit")
+        info_surface = info_font.render(info_text, True, WHITE)
+        screen.blit(info_surface, (WIDTH // 2 - info_surface.get_width() // 2, HEIGHT - 70))
+
+        pygame.display.flip()
@@ -0,0 +1,394 @@
+import io
+import heapq
+import math
+import time
+import textwrap
+import config
+from simlog import get_logger
+
+log = get_logger("report")
+
+#tables longer than this are summarised as top-N rows plus a histogram
+REPORT_TABLE_LIMIT = 100
+REPORT_TOP_N = 20
+#chart sizes: points per line plot, raster cells of the load heatmap, stations drawn with labels
+REPORT_MAX_POINTS = 2000
+REPORT_HEATMAP_COLUMNS = 800
+REPORT_HEATMAP_ROWS = 200
+REPORT_LABELLED_BARS = 50
+REPORT_LOAD_HEATMAP = True
+
+
+def _report_backends():
+    """ Imports the plotting and PDF backends on first use, keeping them out of simulation startup. """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+    return plt, canvas, LETTER, ImageReader
+
+
+def _load_arrays(load_time_series):
+    """ (times, loads) arrays from a LoadSeries or a list of (time_ms, loads) pairs. """
+    import numpy as np
+
+    if load_time_series is None or len(load_time_series) == 0:
+        return np.empty(0), np.empty((0, 0))
+    if hasattr(load_time_series, "to_arrays"):
+        return load_time_series.to_arrays()
+    times = np.array([t for t, _ in load_time_series], dtype=np.float64)
+    width = max(len(row) for _, row in load_time_series)
+    loads = np.full((len(times), width), np.nan)
+    for i, (_, row) in enumerate(load_time_series):
+        loads[i, :len(row)] = row
+    return times, loads
+
+
+def _minmax_decimate(values, max_points):
+    """ Indices keeping the min and max of each bucket, so peaks survive downsampling. """
+    import numpy as np
+
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max_points // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    width = int(np.diff(edges).max())
+    #pad to equal-width buckets so one argmin/argmax pass covers them all
+    idx = np.minimum(edges[:-1, None] + np.arange(width), edges[1:, None] - 1)
+    chunk = values[idx]
+    picks = np.concatenate((idx[np.arange(buckets), np.nanargmin(chunk, axis=1)],
+                            idx[np.arange(buckets), np.nanargmax(chunk, axis=1)]))
+    return np.unique(picks)
+
+
+def _heatmap_grid(times, loads, columns, rows):
+    """ Max-pools loads (time x station) down to at most columns x rows cells, stations on the y axis. """
+    import numpy as np
+
+    grid = loads
+    #pool the long time axis first, while rows are still contiguous
+    if grid.shape[0] > columns:
+        grid = np.fmax.reduceat(grid, np.linspace(0, grid.shape[0], columns, endpoint=False).astype(np.int64), axis=0)
+    if grid.shape[1] > rows:
+        grid = np.fmax.reduceat(grid, np.linspace(0, grid.shape[1], rows, endpoint=False).astype(np.int64), axis=1)
+    extent = (times[0], times[-1] if len(times) > 1 else times[0] + 1, 0, loads.shape[1])
+    return np.nan_to_num(grid.T), extent
+
+
+def _render_chart(plt, image_reader):
+    """ Renders the current figure to PNG in memory, as an image reportlab can draw. """
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png")
+    plt.close()
+    buf.seek(0)
+    return image_reader(buf)
+
+
+class ReportWriter:
+    """ Writes the text report and the PDF side by side, one page of lines at a time. """
+
+    def __init__(self, txt_filename, pdf_filename, canvas, pagesize, title):
+        self.txt = open(txt_filename, "w", encoding="utf-8")
+        self.pdf = canvas.Canvas(pdf_filename, pagesize=pagesize)
+        self.width, self.height = pagesize
+        self.margin = 40
+        self.line_h = 14
+        self.wrap_width = int((self.width - 2 * self.margin) / 7)
+        self.page_lines = int((self.height - 2 * self.margin) / self.line_h)
+        self.page = []
+
+        self.pdf.setFont("Helvetica-Bold", 16)
+        self.pdf.drawString(self.margin, self.height - self.margin, title)
+        #the title takes two lines of the first page
+        self.room = self.page_lines - 2
+
+    def line(self, text=""):
+        self.txt.write(text + "\n")
+        for sub in textwrap.wrap(text, width=self.wrap_width) if len(text) > self.wrap_width else [text]:
+            if len(self.page) >= self.room:
+                self._new_page()
+            self.page.append(sub)
+
+    def _flush_page(self):
+        if not self.page:
+            return
+        text = self.pdf.beginText(self.margin, self.margin + self.room * self.line_h)
+        text.setFont("Helvetica", 12)
+        text.setLeading(self.line_h)
+        text.textLines(self.page)
+        self.pdf.drawText(text)
+        self.room -= len(self.page)
+        self.page = []
+
+    def _new_page(self):
+        self._flush_page()
+        self.pdf.showPage()
+        self.room = self.page_lines
+
+    def image(self, chart, caption):
+        """ Draws chart under what is already on the page, on a new page only if it does not fit. """
+        self._flush_page()
+        img_w = self.width - 2 * self.margin
+        img_h = img_w * 0.6
+        #the chart, its caption and a blank line after it
+        needed = math.ceil(img_h / self.line_h) + 2
+        if needed > self.room:
+            self._new_page()
+        top = self.margin + self.room * self.line_h
+        self.pdf.drawImage(chart, self.margin, top - img_h,
+                           width=img_w, height=img_h, preserveAspectRatio=True)
+        self.pdf.setFont("Helvetica-Bold", 14)
+        self.pdf.drawString(self.margin, top - img_h - self.line_h, caption)
+        self.room -= needed
+
+    def close(self):
+        self._flush_page()
+        self.pdf.save()
+        self.txt.close()
+
+
+def generate_report(satellites_list,
+                    stations_list,
+                    conn_loss_log,
+                    final_elapsed_sim_time_ms,
+                    load_time_series=None,             # default to None to allow omission
+                    class_metrics=None,
+                    ctx=None):
+    plt, canvas, LETTER, ImageReader = _report_backends()
+
+    import numpy as np
+
+    # normalize the time series into a (samples x stations) array
+    times, loads = _load_arrays(load_time_series)
+    has_series = len(times) > 0
+
+    # Generate station load bar chart; many stations are plotted by position, not by label
+    num_stations = len(stations_list)
+    if num_stations <= REPORT_LABELLED_BARS:
+        station_ids = [str(station.id) for station in stations_list]
+    else:
+        station_ids = np.array([station.id for station in stations_list])
+    station_loads = np.fromiter((station.received_data for station in stations_list), dtype=np.float64, count=num_stations)
+    plt.figure()
+    plt.bar(station_ids, station_loads)
+    plt.xlabel('Station ID')
+    plt.ylabel('Data Received (GB)')
+    plt.title('Station Load')
+    plt.tight_layout()
+    bar_chart = _render_chart(plt, ImageReader)
+
+    # —— Maximum Connected Satellites per Station Bar Chart ——
+    # if time series exists, use max from series; else use final connections
+    max_connections = np.fromiter((len(station.connected_satellites) for station in stations_list),
+                                  dtype=np.float64, count=num_stations)
+    if has_series:
+        series_max = np.nan_to_num(np.nanmax(loads, axis=0))[:num_stations]
+        max_connections[:len(series_max)] = np.maximum(max_connections[:len(series_max)], series_max)
+
+    plt.figure()
+    plt.bar(station_ids, max_connections)
+    plt.xlabel('Station ID')
+    plt.ylabel('Max Connected Satellites')
+    plt.title('Maximum Connected Satellites per Station')
+    plt.tight_layout()
+    max_conn_chart = _render_chart(plt, ImageReader)
+
+    # —— Station-load Min/Avg/Max over time, reduced per sample and decimated ——
+    if has_series:
+        #NaN-aware reductions only when stations came and went during the run
+        padded = np.isnan(loads).any()
+        plt.figure()
+        for label, series in (('Min Load', np.nanmin(loads, axis=1) if padded else loads.min(axis=1)),
+                              ('Avg Load', np.nanmean(loads, axis=1) if padded else loads.mean(axis=1)),
+                              ('Max Load', np.nanmax(loads, axis=1) if padded else loads.max(axis=1))):
+            keep = _minmax_decimate(series, REPORT_MAX_POINTS)
+            plt.plot(times[keep], series[keep], label=label, marker='o' if len(keep) <= 200 else None)
+        plt.xlabel('Virtual Time (ms)')
+        plt.ylabel('Connected Satellites')
+        plt.title('Station Load Min/Avg/Max Over Time')
+        plt.legend()
+        plt.tight_layout()
+        stats_chart = _render_chart(plt, ImageReader)
+
+        # heatmap of every station against time, binned to the raster size and drawn as one image
+        heatmap_chart = None
+        if REPORT_LOAD_HEATMAP:
+            grid, extent = _heatmap_grid(times, loads, REPORT_HEATMAP_COLUMNS, REPORT_HEATMAP_ROWS)
+            plt.figure()
+            plt.imshow(grid, aspect='auto', interpolation='nearest', origin='lower', extent=extent)
+            plt.colorbar(label='Max Connected Satellites')
+            plt.xlabel('Virtual Time (ms)')
+            plt.ylabel('Station Index')
+            plt.title('Station Load Heatmap')
+            plt.tight_layout()
+            heatmap_chart = _render_chart(plt, ImageReader)
+    else:
+        log.info("No load_time_series data; skipping Min/Avg/Max plots.")
+    del times, loads
+
+    # ——— Write the text and PDF reports, streamed line by line ———
+    total_data = sum(station.received_data for station in stations_list)
+    stats = ctx.stats if ctx else None
+    if stats:
+        lost_data_damage = stats.repair_lost
+    else:
+        lost_data_damage = 0.0
+        for station in stations_list:
+            for entry in station.damage_log:
+                if len(entry) > 2 and entry[1] is not None:
+                    lost_data_damage += entry[2]
+    destroyed_sats_log = ctx.destroyed_satellites_log if ctx else []
+
+    txt_filename = "simulation_report.txt"
+    pdf_filename = "simulation_report.pdf"
+    out = ReportWriter(txt_filename, pdf_filename, canvas, LETTER, "Simulation Report")
+    emit = out.line
+
+    emit("Simulation Report")
+    emit("=====================")
+    emit(f"Report Generated At: {time.ctime()}")
+    # Simulation time formatting
+    sim_time_sec = final_elapsed_sim_time_ms / 1000.0
+    sim_min = int(sim_time_sec // 60)
+    sim_sec = sim_time_sec % 60
+    emit(f"Total Simulation Time Elapsed: {sim_min}m {sim_sec:.1f}s")
+    emit(f"Final Simulation Speed: {ctx.simulation_speed if ctx else config.SIMULATION_SPEED:.1f}x")
+    emit(f"Total Satellites Simulated: {len(satellites_list) + len(destroyed_sats_log)}")
+    emit(f"Total Stations Simulated: {len(stations_list)}")
+    emit(f"Total Data Transferred to Stations: {total_data:.2f} GB")
+    emit(f"Estimated Data Lost due to Station Repair: {lost_data_damage:.2f} GB")
+    if stats:
+        emit(f"Data Lost due to Jamming: {stats.jamming_lost:.2f} GB ({stats.jamming_events} events)")
+        emit(f"Data Generated Onboard: {stats.generated:.2f} GB")
+        if stats.debris_hits:
+            emit(f"Satellites Hit by Debris: {stats.debris_hits}")
+        if stats.routed:
+            emit(f"Data Routed over Inter-Satellite Links: {stats.routed:.2f} GB")
+        emit(f"Data Lost to Full Onboard Storage: {stats.overflow_lost:.2f} GB")
+        emit(f"Onboard Backlog at End: {sum(sat.data_amount for sat in satellites_list):.2f} GB")
+    emit()
+
+    # Per-class QoS
+    if class_metrics:
+        emit("Priority Classes:")
+        for row in class_metrics:
+            emit(
+                f" {row['class']} (weight {row['weight']:.1f}): Delivered {row['delivered_gb']:.2f} GB "
+                f"({row['throughput_gbps']:.3f} GB/s), Connections: {row['connections']}, "
+                f"Preempted: {row['preempted']}, Wait avg/max: {row['mean_wait_ms'] / 1000.0:.2f}/{row['max_wait_ms'] / 1000.0:.2f} s"
+            )
+        emit()
+
+    if stats:
+        # Station uptime and satellite drain, from the running aggregates
+        emit("Station Uptime:")
+        uptimes = [(stats.station_uptime(station.id, final_elapsed_sim_time_ms), station.id) for station in stations_list]
+        if len(uptimes) > REPORT_TABLE_LIMIT:
+            emit(f" Lowest {REPORT_TOP_N} of {len(uptimes)} stations, mean {sum(u for u, _ in uptimes) / len(uptimes) * 100:.1f}%")
+            uptimes = heapq.nsmallest(REPORT_TOP_N, uptimes)
+        for uptime, station_id in uptimes:
+            emit(f" Station {station_id}: {uptime * 100:.1f}%")
+        emit()
+        emit("Top Satellite Drain Rates:")
+        top = stats.top_drain_rates(5, final_elapsed_sim_time_ms)
+        if not top:
+            emit("  None")
+        for name, rate in top:
+            emit(f" {name}: {rate:.3f} GB/s")
+        emit()
+        emit(f"Outage Durations ({stats.outage_count}, mean {stats.outage_total_sec / stats.outage_count if stats.outage_count else 0.0:.2f} s, max {stats.outage_max_sec:.2f} s):")
+        for label, count in stats.histogram_rows():
+            emit(f" {label}: {count}")
+        emit()
+
+    if ctx and ctx.jammers.jammers:
+        emit("Jammers:")
+        for x, y, power, radius, lost, events in ctx.jammers.table():
+            emit(f" At ({x:.0f}, {y:.0f}), power {power * 100:.0f}%, footprint {radius:.0f} px: "
+                 f"Lost {lost:.2f} GB, {events} links entered")
+        emit()
+
+    # Destroyed satellites
+    emit(f"Destroyed Satellites ({len(destroyed_sats_log)}):")
+    if not destroyed_sats_log:
+        emit("  None")
+    else:
+        shown = destroyed_sats_log if len(destroyed_sats_log) <= REPORT_TABLE_LIMIT else destroyed_sats_log[:REPORT_TOP_N]
+        for i, sat_info in enumerate(shown, start=1):
+            name = getattr(sat_info, "name", "Unknown")
+            destroy_time = getattr(sat_info, "destroyed_time", None)
+            pos_x = getattr(sat_info, "x", "N/A")
+            pos_y = getattr(sat_info, "y", "N/A")
+            time_str = time.ctime(destroy_time) if destroy_time else "N/A"
+            emit(f" {i}. {name} Destroyed at {time_str} | Last Pos: ({pos_x:.1f}, {pos_y:.1f})")
+        if len(shown) < len(destroyed_sats_log):
+            emit(f" ... and {len(destroyed_sats_log) - len(shown)} more")
+    emit()
+
+    # Damaged stations timeline
+    emit("Damaged Stations Timeline:")
+    damage_events = sum(len(station.damage_log) for station in stations_list)
+    if not damage_events:
+        emit("  None")
+    elif damage_events > REPORT_TABLE_LIMIT:
+        #one summary row per station, worst stations first
+        damaged = [station for station in stations_list if station.damage_log]
+        emit(f" {damage_events} damage events on {len(damaged)} stations; top {min(REPORT_TOP_N, len(damaged))} by data lost:")
+        worst = heapq.nlargest(REPORT_TOP_N, damaged,
+                               key=lambda st: sum(e[2] for e in st.damage_log if len(e) > 2 and e[1] is not None))
+        for station in worst:
+            lost = sum(e[2] for e in station.damage_log if len(e) > 2 and e[1] is not None)
+            open_now = " (still damaged)" if station.damage_log[-1][1] is None else ""
+            emit(f" Station {station.id}: {len(station.damage_log)} events, Lost: {lost:.2f} GB{open_now}")
+    else:
+        for station in stations_list:
+            if station.damage_log:
+                emit(f" Station {station.id}:")
+                for entry in station.damage_log:
+                    dmg_time = time.ctime(entry[0])
+                    if entry[1]:
+                        rep_time = time.ctime(entry[1])
+                        loss = entry[2] if len(entry) > 2 else 0.0
+                        emit(f"  - Damaged: {dmg_time}, Repaired: {rep_time}, Lost: {loss:.2f} GB")
+                    else:
+                        emit(f"  - Damaged: {dmg_time}, Not repaired by sim end.")
+    emit()
+
+    # Connection loss events
+    emit(f"Connection Loss Events ({len(conn_loss_log)}):")
+    if not conn_loss_log:
+        emit("  None")
+    elif len(conn_loss_log) > REPORT_TABLE_LIMIT:
+        #the duration histogram is above; list only the longest outages
+        emit(f" Longest {REPORT_TOP_N}:")
+        longest = heapq.nlargest(REPORT_TOP_N, conn_loss_log, key=lambda ev: ev["duration"])
+        for i, ev in enumerate(longest, start=1):
+            emit(
+                f" {i}. Sat: {ev['sat']}, Station: {ev['station']}, "
+                f"Outage Start: {ev['start_time']:.1f} s, Duration: {ev['duration']:.2f} s"
+            )
+    else:
+        for i, ev in enumerate(sorted(conn_loss_log, key=lambda x: x["start_time"]), start=1):
+            emit(
+                f" {i}. Sat: {ev['sat']}, Station: {ev['station']}, "
+                f"Outage Start: {ev['start_time']:.1f} s, Duration: {ev['duration']:.2f} s"
+            )
+
+    # Embed the charts rendered in memory
+    out.image(bar_chart, "Figure: Station Load by Data Received (GB)")
+    out.image(max_conn_chart, "Figure: Maximum Connected Satellites per Station")
+    if has_series:
+        out.image(stats_chart, "Figure: Station Load Min/Avg/Max Over Time")
+        if heatmap_chart:
+            out.image(heatmap_chart, "Figure: Station Load Heatmap")
+    out.close()
+
+    log.info("Text report:   %s", txt_filename)
+    log.info("PDF report:    %s", pdf_filename)
+
+    # Clear destroyed log
+    if ctx:
+        ctx.destroyed_satellites_log.clear()
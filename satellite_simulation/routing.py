@@ -0,0 +1,134 @@
+from collections import deque
+from config import *
+
+#link ids pack the two fleet slots of a link, lower slot first
+_SLOT_BITS = 32
+
+
+class LinkRouter:
+    """ Inter-satellite links and multi-hop forwarding to satellites with a ground link. """
+
+    def __init__(self, range_pixels=ISL_RANGE_PIXELS, neighbours=ISL_NEIGHBOURS,
+                 rate_gbps=ISL_RATE_GBPS, relay_rate_gbps=ISL_RELAY_RATE_GBPS):
+        self.range_pixels = range_pixels
+        self.neighbours = neighbours
+        self.rate_gbps = rate_gbps
+        self.relay_rate_gbps = relay_rate_gbps
+        self.adjacency = {}
+        self.version = 0
+        self.rebuilds = 0
+        self.links_added = 0
+        self.links_removed = 0
+        self._links = None
+        self._gateways = frozenset()
+        self._table_version = -1
+        #slot -> (hops, parent slot, gateway slot)
+        self._routes = {}
+
+    def _current_links(self, nodes):
+        import numpy as np
+
+        n = len(nodes)
+        if n < 2:
+            return np.zeros(0, dtype=np.int64)
+        slots = np.fromiter((sat.slot for sat in nodes), np.int64, n)
+        x = np.fromiter((sat.x for sat in nodes), np.float64, n)
+        y = np.fromiter((sat.y for sat in nodes), np.float64, n)
+        order = np.argsort(np.fromiter((sat.angle for sat in nodes), np.float64, n), kind="stable")
+        keys = []
+        for j in range(1, min(self.neighbours, n - 1) + 1):
+            a, b = order, np.roll(order, -j)
+            close = (x[a] - x[b]) ** 2 + (y[a] - y[b]) ** 2 <= self.range_pixels ** 2
+            lo = np.minimum(slots[a], slots[b])[close]
+            hi = np.maximum(slots[a], slots[b])[close]
+            keys.append((lo << _SLOT_BITS) | hi)
+        return np.unique(np.concatenate(keys))
+
+    def update(self, satellites):
+        """ Brings links, gateways and, when they changed, the routing table up to date. """
+        import numpy as np
+
+        nodes = [sat for sat in satellites if sat.status == 'operational']
+        links = self._current_links(nodes)
+        if self._links is None:
+            added, removed = links, links[:0]
+        else:
+            added = np.setdiff1d(links, self._links, assume_unique=True)
+            removed = np.setdiff1d(self._links, links, assume_unique=True)
+        self._links = links
+
+        adjacency = self.adjacency
+        mask = (1 << _SLOT_BITS) - 1
+        for key in removed.tolist():
+            a, b = key >> _SLOT_BITS, key & mask
+            adjacency[a].discard(b)
+            adjacency[b].discard(a)
+        for key in added.tolist():
+            a, b = key >> _SLOT_BITS, key & mask
+            adjacency.setdefault(a, set()).add(b)
+            adjacency.setdefault(b, set()).add(a)
+        self.links_added += len(added)
+        self.links_removed += len(removed)
+
+        gateways = frozenset(sat.slot for sat in nodes
+                             if sat.connected_to is not None and sat.connected_to.status == 'operational')
+        if len(added) or len(removed) or gateways != self._gateways:
+            self._gateways = gateways
+            self.version += 1
+
+    def routes(self):
+        """ slot -> (hops, parent, gateway) for every node with a path to a gateway, cached per topology version. """
+        if self._table_version != self.version:
+            routes = {slot: (0, slot, slot) for slot in self._gateways}
+            queue = deque(self._gateways)
+            adjacency = self.adjacency
+            while queue:
+                slot = queue.popleft()
+                hops, _, gateway = routes[slot]
+                for other in adjacency.get(slot, ()):
+                    if other not in routes:
+                        routes[other] = (hops + 1, slot, gateway)
+                        queue.append(other)
+            self._routes = routes
+            self._table_version = self.version
+            self.rebuilds += 1
+        return self._routes
+
+    def path(self, slot):
+        """ Slots from a satellite to its gateway, or None when it has no route. """
+        routes = self.routes()
+        if slot not in routes:
+            return None
+        path = [slot]
+        while routes[path[-1]][0]:
+            path.append(routes[path[-1]][1])
+        return path
+
+    def forward(self, satellites, delta_time_ms, weight_of):
+        """ Moves data from satellites without a ground link to their gateways' stations; returns GB moved. """
+        self.update(satellites)
+        routes = self.routes()
+        by_slot = {sat.slot: sat for sat in satellites}
+        dt_sec = delta_time_ms / 1000.0
+        senders = [sat for sat in satellites
+                   if sat.status == 'operational' and sat.connected_to is None and sat.data_amount > 0
+                   and sat.slot in routes]
+        #higher priority classes first, then shorter paths
+        senders.sort(key=lambda sat: (-weight_of(sat), routes[sat.slot][0]))
+        budget = {}
+        moved = 0.0
+        for sat in senders:
+            gateway = by_slot[routes[sat.slot][2]]
+            station = gateway.connected_to
+            left = budget.get(gateway.slot, self.relay_rate_gbps * station.weather_factor * dt_sec)
+            amount = min(self.rate_gbps * dt_sec, sat.data_amount, left)
+            if amount <= 0:
+                continue
+            budget[gateway.slot] = left - amount
+            sat.data_amount -= amount
+            sat.delivered_data += amount
+            sat.transferring = True
+            station.receive_data(amount)
+            sat.ctx.stats.on_routed(sat, station, amount)
+            moved += amount
+        return moved
@@ -1,40 +1,71 @@
-import random
-import pygame
 import math
 from config import *
+from context import default_context
+from orbit import orbit_shell
+from simlog import get_logger, event
 import time
 
-JAMMING_PROBABILITY = 0.01
-JAMMING_DATA_LOSS_FACTOR = 0.5
+log = get_logger("satellite")
 
-class Satellite:
-    destroyed_satellites_log = []
-    jamming_log = []
+def _initial_data(color):
+    if color == SATELLITE_GREEN:
+        return 700.0
+    elif color == SATELLITE_BLUE:
+        return 300.0
+    return 500.0
 
-    satellite_damage_probability = SATELLITE_DAMAGE_PROBABILITY
-    satellite_repair_time_seconds = BLINK_DURATION_MS / 1000
 
-    def __init__(self, altitude_km, name, color, initial_angle=None):
+class Satellite:
+    def __init__(self, altitude_km, name, color, initial_angle=None, priority_class=None, ctx=None):
+        ctx = ctx if ctx is not None else default_context
+        shell = orbit_shell(altitude_km)
+        if priority_class is None:
+            priority_class = SATELLITE_CLASS_BY_COLOR.get(color, DEFAULT_SATELLITE_CLASS)
+        if initial_angle is None:
+             initial_angle = ctx.rng.uniform(0, 2 * math.pi)
+        x = EARTH_POSITION[0] + shell.orbit_radius_pixels * math.cos(initial_angle)
+        y = EARTH_POSITION[1] + shell.orbit_radius_pixels * math.sin(initial_angle)
+        self._setup(shell, name, color, initial_angle, x, y, priority_class, ctx)
+        self.slot = ctx.fleet.add(priority_class, _initial_data(color))
+
+    @classmethod
+    def create_shell(cls, altitude_km, names, colors, angles, priority_classes=None, ctx=None):
+        """ Builds every satellite of one altitude shell in a batch.
+
+        The orbital constants are computed once for the shell, positions in one NumPy pass
+        and the onboard storage slots in one extend, so each satellite only costs its own
+        lightweight state.
+        """
+        import numpy as np
+
+        ctx = ctx if ctx is not None else default_context
+        shell = orbit_shell(altitude_km)
+        if priority_classes is None:
+            priority_classes = [SATELLITE_CLASS_BY_COLOR.get(color, DEFAULT_SATELLITE_CLASS) for color in colors]
+        angles = np.asarray(angles, dtype=np.float64)
+        xs = (EARTH_POSITION[0] + shell.orbit_radius_pixels * np.cos(angles)).tolist()
+        ys = (EARTH_POSITION[1] + shell.orbit_radius_pixels * np.sin(angles)).tolist()
+        first = ctx.fleet.extend(priority_classes, [_initial_data(color) for color in colors])
+        satellites = []
+        for i, (name, color, angle, priority_class) in enumerate(zip(names, colors, angles.tolist(), priority_classes)):
+            sat = cls.__new__(cls)
+            sat._setup(shell, name, color, angle, xs[i], ys[i], priority_class, ctx)
+            sat.slot = first + i
+            satellites.append(sat)
+        return satellites
+
+    def _setup(self, shell, name, color, angle, x, y, priority_class, ctx):
+        self.ctx = ctx
         self.name = name
-        self.altitude_km = altitude_km
-        self.orbit_radius_km = EARTH_RADIUS_KM + self.altitude_km
-
-        #calculations of speed, period, angular speed
-        self.speed_km_per_sec = math.sqrt(G_KM * EARTH_MASS_KG / self.orbit_radius_km)
-        self.period_sec = (2 * math.pi * self.orbit_radius_km) / self.speed_km_per_sec
-        self.angular_speed_rad_per_sec = 2 * math.pi / self.period_sec
-        self.orbit_radius_pixels = self.orbit_radius_km * SCALE_FACTOR
+        self.priority_class = priority_class
+        #orbital constants live on the shared shell
+        self.shell = shell
 
         self.initial_color = color
         self.color = color
-
-        if initial_angle is None:
-             self.angle = random.uniform(0, 2 * math.pi)
-        else:
-             self.angle = initial_angle
-
-        self.x = EARTH_POSITION[0] + self.orbit_radius_pixels * math.cos(self.angle)
-        self.y = EARTH_POSITION[1] + self.orbit_radius_pixels * math.sin(self.angle)
+        self.angle = angle
+        self.x = x
+        self.y = y
 
         self.status = 'operational'
         self.is_blinking = False
@@ -42,14 +73,9 @@ class Satellite:
         self.blink_on = False
         self.connected_to = None
 
-        if color == SATELLITE_GREEN:
-            self.data_amount = 700.0
-        elif color == SATELLITE_BLUE:
-            self.data_amount = 300.0
-        else:
-             self.data_amount = 500.0
-
+        #onboard data lives in the run's fleet arrays (self.slot), generated in one batch per tick
         self.transfer_rate = 0.5 #GB per second
+        self.delivered_data = 0.0
         self.transferring = False
         self.destroyed_time = None
 
@@ -59,6 +85,42 @@ class Satellite:
         self.burst_start_time = None
         self.connected_stations_set = set()
 
+    @property
+    def altitude_km(self):
+        return self.shell.altitude_km
+
+    @property
+    def orbit_radius_km(self):
+        return self.shell.orbit_radius_km
+
+    @property
+    def speed_km_per_sec(self):
+        return self.shell.speed_km_per_sec
+
+    @property
+    def period_sec(self):
+        return self.shell.period_sec
+
+    @property
+    def angular_speed_rad_per_sec(self):
+        return self.shell.angular_speed_rad_per_sec
+
+    @property
+    def orbit_radius_pixels(self):
+        return self.shell.orbit_radius_pixels
+
+    @property
+    def data_amount(self):
+        return self.ctx.fleet.data[self.slot]
+
+    @data_amount.setter
+    def data_amount(self, value):
+        self.ctx.fleet.data[self.slot] = value
+
+    @property
+    def overflow_lost(self):
+        return self.ctx.fleet.overflow[self.slot]
+
     def update(self, current_ticks, stations, delta_time_ms):
         if self.connected_to and (self.status != 'operational' or self.connected_to not in stations):
             if self.connected_to in stations:
@@ -68,13 +130,14 @@ class Satellite:
 
         if self.status == 'operational':
             #update angle based on angular speed and time elapsed
+            shell = self.shell
             delta_time_sec = delta_time_ms / 1000.0
-            self.angle += self.angular_speed_rad_per_sec * delta_time_sec
+            self.angle += shell.angular_speed_rad_per_sec * delta_time_sec
             self.angle %= (2 * math.pi)
 
             #update position based on pixel radius
-            self.x = EARTH_POSITION[0] + self.orbit_radius_pixels * math.cos(self.angle)
-            self.y = EARTH_POSITION[1] + self.orbit_radius_pixels * math.sin(self.angle)
+            self.x = EARTH_POSITION[0] + shell.orbit_radius_pixels * math.cos(self.angle)
+            self.y = EARTH_POSITION[1] + shell.orbit_radius_pixels * math.sin(self.angle)
 
             #data Transfer Logic
             if self.connected_to and self.data_amount > 0:
@@ -92,22 +155,24 @@ class Satellite:
                     self.is_in_burst = False
                     current_transfer_rate = self.transfer_rate
 
-                #calculate transferred data based on time
-                transferred = current_transfer_rate * delta_time_sec
+                #calculate transferred data based on time, slowed by the weather over the station
+                transferred = current_transfer_rate * self.connected_to.weather_factor * delta_time_sec
                 transferred = min(transferred, self.data_amount) # Don't transfer more than available
 
-                #jamming
-                if random.random() < JAMMING_PROBABILITY:
-                    jammed_transferred = transferred * JAMMING_DATA_LOSS_FACTOR
-                    lost_due_to_jamming = transferred - jammed_transferred
-                    Satellite.jamming_log.append((self.name, time.ctime(), lost_due_to_jamming))
-                    transferred = jammed_transferred
+                #jamming, from the link geometry evaluated at the start of the tick
+                kept = self.ctx.jammers.factor(self.slot)
+                if kept < 1.0:
+                    self.ctx.jammers.taken[self.slot] = transferred * (1.0 - kept)
+                    transferred *= kept
 
                 if transferred > 0:
                     self.data_amount -= transferred
+                    self.delivered_data += transferred
                     self.connected_to.receive_data(transferred)
+                    self.ctx.stats.on_transfer(self, self.connected_to, transferred)
 
-                if self.data_amount <= 0:
+                #drained, the slot goes to another satellite while this one refills
+                if self.data_amount <= SATELLITE_DRAINED_GB:
                     self.connected_to.disconnect_satellite(self)
                     self.connected_to = None
                     self.transferring = False
@@ -117,73 +182,36 @@ class Satellite:
                  self.is_in_burst = False
 
             #damage Check
-            if random.random() < Satellite.satellite_damage_probability:
-                self.status = 'damaging'
-                self.is_blinking = True
-                self.blink_start_time = current_ticks
-                print(f"Satellite {self.name} damaged!")
-                if self.connected_to:
-                    self.connected_to.disconnect_satellite(self)
-                    self.connected_to = None
-                self.transferring = False
-                self.is_in_burst = False
+            if self.ctx.draws.satellite(self.slot, self.ctx.satellite_damage_probability):
+                log.warning("Satellite %s damaged!", self.name, extra=event("ERROR", self.ctx.stats.now_ms))
+                self.damage(current_ticks)
 
         elif self.status == 'damaging':
             #blinking and destruction logic
             elapsed_blink_time = current_ticks - self.blink_start_time
-            if elapsed_blink_time > Satellite.satellite_repair_time_seconds * 1000:
+            if elapsed_blink_time > self.ctx.satellite_repair_time_seconds * 1000:
                 self.status = 'destroyed'
                 self.is_blinking = False
                 self.destroyed_time = time.time()
-                Satellite.destroyed_satellites_log.append(self)
-                print(f"Satellite {self.name} destroyed!")
+                self.ctx.fleet.stop(self.slot)
+                self.ctx.destroyed_satellites_log.append(self)
+                self.ctx.stats.on_satellite_destroyed(self)
+                log.warning("Satellite %s destroyed!", self.name, extra=event("ERROR", self.ctx.stats.now_ms))
             else:
                 self.blink_on = (elapsed_blink_time // BLINK_INTERVAL_MS) % 2 == 0
 
-    def draw(self, surface):
-        if self.status == 'destroyed':
-            return
-
-        x, y = int(self.x), int(self.y)
-
-        body_radius = 5
-        panel_length = 10
-        panel_width = 2
-
-        current_body_color = self.initial_color
-        if self.status == 'damaging':
-            current_body_color = BLINK_RED if self.blink_on else DAMAGED_SATELLITE_COLOR
-        elif self.transferring:
-             if pygame.time.get_ticks() // 250 % 2 == 0:
-                  current_body_color = self.color
-
-        pygame.draw.circle(surface, current_body_color, (x, y), body_radius)
-
-        panel_color = OPERATIONAL_PANEL_COLOR
-        if self.status == 'damaging':
-            panel_color = BLINK_RED if self.blink_on else DAMAGED_PANEL_COLOR
-
-        angle_rad = self.angle
-        p1_end_x = x + math.cos(angle_rad + math.pi/4) * (body_radius + panel_length)
-        p1_end_y = y + math.sin(angle_rad + math.pi/4) * (body_radius + panel_length)
-        p2_end_x = x + math.cos(angle_rad - math.pi/4) * (body_radius + panel_length)
-        p2_end_y = y + math.sin(angle_rad - math.pi/4) * (body_radius + panel_length)
-
-        pygame.draw.line(surface, panel_color, (x, y), (int(p1_end_x), int(p1_end_y)), panel_width)
-        pygame.draw.line(surface, panel_color, (x, y), (int(p2_end_x), int(p2_end_y)), panel_width)
-
+    def damage(self, current_ticks):
+        """ Starts the damaging -> destroyed sequence and drops the satellite's link. """
+        self.status = 'damaging'
+        self.is_blinking = True
+        self.blink_start_time = current_ticks
+        self.ctx.stats.on_satellite_damaged(self)
         if self.connected_to:
-            line_color = YELLOW if self.is_in_burst else COMM_LINE_COLOR
-            pygame.draw.line(surface, line_color, (x, y),
-                             (int(self.connected_to.x), int(self.connected_to.y)), 1)
-
-        if self.status != 'destroyed':
-            data_text = f"{int(self.data_amount)}GB"
-            data_font = pygame.font.SysFont(None, 16)
-            data_surface = data_font.render(data_text, True, WHITE)
-            surface.blit(data_surface, (x + body_radius + 2, y - data_surface.get_height() // 2))
-
-            name_font = pygame.font.SysFont(None, 14)
-            name_surface = name_font.render(self.name, True, WHITE)
-            name_rect = name_surface.get_rect(center=(x, y - body_radius - 8))
-            surface.blit(name_surface, name_rect)
\ No newline at end of file
+            self.connected_to.disconnect_satellite(self)
+            self.connected_to = None
+        self.transferring = False
+        self.is_in_burst = False
+
+    def draw(self, surface, view=None, labels=True):
+        from sprites import draw_satellites
+        draw_satellites(surface, (self,), view, labels)
@@ -0,0 +1,173 @@
+import heapq
+import itertools
+from config import *
+
+
+class ClassMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.connections = 0
+        self.preempted = 0
+        self.wait_samples = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record_wait(self, wait_ms):
+        self.wait_samples += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def mean_wait_ms(self):
+        return self.total_wait_ms / self.wait_samples if self.wait_samples else 0.0
+
+
+class PriorityScheduler:
+    """ Assigns free satellites to stations, preempting lower-priority links on full stations. """
+
+    def __init__(self, weights=None, preemption=PREEMPTION_ENABLED):
+        self.weights = dict(PRIORITY_WEIGHTS if weights is None else weights)
+        self.preemption = preemption
+        self.metrics = {}
+        #station -> min-heap of (weight, connect_seq, satellite), lowest priority link on top
+        self._links = {}
+        self._seq = itertools.count()
+        #satellite -> connect_seq of its current link; heap entries of older links are stale
+        self._generation = {}
+        #satellite -> sim time (ms) it started waiting while in range of a full station
+        self._waiting_since = {}
+
+    def weight_of(self, satellite):
+        return self.weights.get(satellite.priority_class, 1.0)
+
+    def class_metrics(self, priority_class):
+        if priority_class not in self.metrics:
+            self.metrics[priority_class] = ClassMetrics(priority_class)
+        return self.metrics[priority_class]
+
+    def reset(self):
+        self.metrics.clear()
+        self._links.clear()
+        self._generation.clear()
+        self._waiting_since.clear()
+
+    def _live(self, station, entry):
+        satellite = entry[2]
+        return satellite.connected_to is station and self._generation.get(satellite) == entry[1]
+
+    def _track(self, station, satellite):
+        heap = self._links.setdefault(station, [])
+        #a reconnect supersedes whatever entry the previous link left behind
+        seq = self._generation[satellite] = next(self._seq)
+        heapq.heappush(heap, (self.weight_of(satellite), seq, satellite))
+        #links dropped elsewhere stay in the heap until they surface, keep it bounded
+        if len(heap) > 4 * station.capacity + 8:
+            live = [e for e in heap if self._live(station, e)]
+            heapq.heapify(live)
+            self._links[station] = live
+
+    def _lowest_link(self, station):
+        heap = self._links.get(station)
+        if not heap:
+            return None
+        while heap and not self._live(station, heap[0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def link(self, station, satellite):
+        """ Puts back a link captured elsewhere (a snapshot, a shard), past can_connect, and tracks it. """
+        if satellite.connected_to is not None and satellite.connected_to is not station:
+            satellite.connected_to.disconnect_satellite(satellite)
+        if satellite not in station.connected_satellites:
+            station.connected_satellites.append(satellite)
+        satellite.connected_to = station
+        self._track(station, satellite)
+
+    def _connect(self, station, satellite, now_ms):
+        if not station.connect_satellite(satellite):
+            return False
+        self._track(station, satellite)
+        metrics = self.class_metrics(satellite.priority_class)
+        metrics.connections += 1
+        since = self._waiting_since.pop(satellite, None)
+        if since is not None:
+            metrics.record_wait(now_ms - since)
+        return True
+
+    def assign(self, satellites, stations, now_ms, contacts=None):
+        """ Links waiting satellites; contacts, a ContactTracker, replaces the per-station range test. """
+        for station in list(self._links):
+            if station not in stations:
+                del self._links[station]
+        #destroyed satellites leave the fleet linked to nothing, forget their generations
+        if len(self._generation) > 2 * len(satellites) + 64:
+            self._generation = {sat: seq for sat, seq in self._generation.items() if sat.connected_to is not None}
+
+        pending = [sat for sat in satellites
+                   if sat.status == 'operational' and not sat.connected_to and sat.data_amount >= SATELLITE_RELINK_GB]
+        #highest weight first, so MIL satellites get the free slots before COM ones
+        pending.sort(key=self.weight_of, reverse=True)
+
+        for sat in pending:
+            if sat.connected_to:
+                continue
+            best_free = None
+            best_free_dist = float('inf')
+            victim_station = None
+            victim_key = None
+            in_range = False
+            sat_weight = self.weight_of(sat)
+
+            for station in (stations if contacts is None else contacts.stations_for(sat, stations)):
+                if station.status != 'operational' or (contacts is None and not station.is_satellite_in_range(sat)):
+                    continue
+                in_range = True
+                dist_sq = (station.x - sat.x)**2 + (station.y - sat.y)**2
+                if station.can_connect():
+                    if dist_sq < best_free_dist:
+                        best_free_dist = dist_sq
+                        best_free = station
+                elif self.preemption and best_free is None:
+                    lowest = self._lowest_link(station)
+                    if lowest and lowest[0] < sat_weight:
+                        key = (lowest[0], dist_sq)
+                        if victim_key is None or key < victim_key:
+                            victim_key = key
+                            victim_station = station
+
+            if best_free:
+                self._connect(best_free, sat, now_ms)
+            elif victim_station:
+                victim = heapq.heappop(self._links[victim_station])[2]
+                victim_station.disconnect_satellite(victim)
+                victim.transferring = False
+                victim.is_in_burst = False
+                self.class_metrics(victim.priority_class).preempted += 1
+                self._waiting_since[victim] = now_ms
+                self._connect(victim_station, sat, now_ms)
+                #the preempted satellite can still take a free slot elsewhere this tick
+                pending.append(victim)
+            elif in_range:
+                self._waiting_since.setdefault(sat, now_ms)
+            else:
+                self._waiting_since.pop(sat, None)
+
+    def summary(self, all_satellites, elapsed_ms):
+        delivered = {}
+        for sat in all_satellites:
+            delivered[sat.priority_class] = delivered.get(sat.priority_class, 0.0) + sat.delivered_data
+        elapsed_sec = elapsed_ms / 1000.0
+        rows = []
+        for priority_class in sorted(set(delivered) | set(self.metrics), key=lambda c: -self.weights.get(c, 1.0)):
+            metrics = self.class_metrics(priority_class)
+            data = delivered.get(priority_class, 0.0)
+            rows.append({
+                'class': priority_class,
+                'weight': self.weights.get(priority_class, 1.0),
+                'connections': metrics.connections,
+                'preempted': metrics.preempted,
+                'mean_wait_ms': metrics.mean_wait_ms(),
+                'max_wait_ms': metrics.max_wait_ms,
+                'delivered_gb': data,
+                'throughput_gbps': data / elapsed_sec if elapsed_sec > 0 else 0.0,
+            })
+        return rows
@@ -0,0 +1,199 @@
+""" Sequential stopping for replica batches over a sweep of run parameters.
+
+Every configuration keeps running means and variances of the report metrics (Welford's
+update, one replica at a time). Free worker slots go to the configuration whose widest
+confidence interval, projected over the replicas it already has in flight, is furthest
+from the target precision, and a configuration stops as soon as every metric is within
+target. Cheap, quiet configurations stop after a few runs; noisy ones get the CPU.
+
+    python sequential.py [relative precision] [workers]    runs a small sweep to precision
+"""
+import math
+import os
+from statistics import NormalDist
+from simlog import get_logger
+from variance import CONFIDENCE
+
+log = get_logger("sequential")
+
+#delivered data, data lost to repairs, jamming and full buffers, and total outage time
+REPORT_METRICS = ("total_delivered_gb", "lost_gb", "outage_sec")
+SEQUENTIAL_MIN_RUNS = 5
+SEQUENTIAL_MAX_RUNS = 200
+SEQUENTIAL_RELATIVE_PRECISION = 0.05
+
+
+class RunningStat:
+    """ Count, mean and sum of squared deviations of a metric, updated one value at a time. """
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else math.inf
+
+    def half_width(self, z, extra=0):
+        """ Confidence half-width, or what it would be with extra more values of the same spread. """
+        if self.n < 2:
+            return math.inf
+        return z * math.sqrt(self.variance / (self.n + extra))
+
+
+def report_metrics(summary):
+    """ REPORT_METRICS of one run from its RunStats summary. """
+    return {
+        "total_delivered_gb": summary["total_delivered_gb"],
+        "lost_gb": summary["repair_lost_gb"] + summary["jamming_lost_gb"] + summary["overflow_lost_gb"],
+        "outage_sec": summary["outage_mean_sec"] * summary["outages"],
+    }
+
+
+def _replica(params, seed):
+    from engine import run_simulation
+
+    return report_metrics(run_simulation(params, seed).ctx.stats.summary())
+
+
+class Configuration:
+    """ One parameter set of a sweep: its running statistics and how many replicas it has out. """
+
+    def __init__(self, params, metrics, first_seed):
+        self.params = params
+        self.stats = {metric: RunningStat() for metric in metrics}
+        self.next_seed = first_seed
+        self.in_flight = 0
+        self.done = False
+        self.converged = False
+
+    @property
+    def runs(self):
+        return next(iter(self.stats.values())).n
+
+    def shortfall(self, z, relative, absolute, extra=0):
+        """ Largest ratio of a metric's half-width to its target; at most 1 once precise enough. """
+        worst = 0.0
+        for metric, stat in self.stats.items():
+            target = max(relative * abs(stat.mean), absolute.get(metric, 0.0))
+            width = stat.half_width(z, extra)
+            if width > 0:
+                worst = max(worst, width / target if target > 0 else math.inf)
+        return worst
+
+    def result(self, z):
+        return {
+            "params": self.params,
+            "runs": self.runs,
+            "converged": self.converged,
+            "mean": {metric: stat.mean for metric, stat in self.stats.items()},
+            "half_width": {metric: stat.half_width(z) for metric, stat in self.stats.items()},
+        }
+
+
+class SequentialExperiment:
+    """ Runs replicas of each parameter set until its confidence intervals reach the target. """
+
+    def __init__(self, param_sets, metrics=REPORT_METRICS, relative=SEQUENTIAL_RELATIVE_PRECISION,
+                 absolute=None, confidence=CONFIDENCE, min_runs=SEQUENTIAL_MIN_RUNS,
+                 max_runs=SEQUENTIAL_MAX_RUNS, first_seed=1):
+        self.configurations = [Configuration(params, metrics, first_seed) for params in param_sets]
+        self.relative = relative
+        self.absolute = absolute or {}
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.min_runs = max(2, min_runs)
+        self.max_runs = max_runs
+        self.total_runs = 0
+
+    def _next(self):
+        """ The configuration the next free slot should run, or None if none needs one. """
+        best, best_need = None, 1.0
+        for config in self.configurations:
+            if config.done or config.runs + config.in_flight >= self.max_runs:
+                continue
+            if config.runs + config.in_flight < self.min_runs:
+                return config
+            if config.runs < self.min_runs:
+                continue
+            #runs already in flight will narrow the interval too, do not count on them twice
+            need = config.shortfall(self.z, self.relative, self.absolute, config.in_flight)
+            if need > best_need:
+                best, best_need = config, need
+        return best
+
+    def _take(self, config):
+        seed = config.next_seed
+        config.next_seed += 1
+        config.in_flight += 1
+        return seed
+
+    def _record(self, config, metrics):
+        config.in_flight -= 1
+        self.total_runs += 1
+        for metric, stat in config.stats.items():
+            stat.add(metrics[metric])
+        if config.done or config.runs < self.min_runs:
+            return
+        if config.shortfall(self.z, self.relative, self.absolute) <= 1.0:
+            config.done = config.converged = True
+            log.info("Configuration %d reached the target precision after %d runs.",
+                     self.configurations.index(config), config.runs)
+        elif config.runs >= self.max_runs:
+            config.done = True
+            log.warning("Configuration %d stopped at the %d run limit short of the target precision.",
+                        self.configurations.index(config), config.runs)
+
+    def run(self, workers=None):
+        """ Runs the sweep on a pool of worker processes; returns one result dict per configuration. """
+        workers = max(1, workers or os.cpu_count() or 1)
+        if workers == 1:
+            while (config := self._next()) is not None:
+                self._record(config, _replica(config.params, self._take(config)))
+            return self.results()
+
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        pending = {}
+        with ProcessPoolExecutor(workers) as pool:
+            while True:
+                while len(pending) < workers and (config := self._next()) is not None:
+                    pending[pool.submit(_replica, config.params, self._take(config))] = config
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    self._record(pending.pop(future), future.result())
+        return self.results()
+
+    def results(self):
+        return [config.result(self.z) for config in self.configurations]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from simlog import setup_logging
+
+    setup_logging()
+    relative = float(sys.argv[1]) if len(sys.argv) > 1 else SEQUENTIAL_RELATIVE_PRECISION
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    base = {"duration": 0, "duration_seconds": 10, "num_satellites": 30, "num_stations": 4,
+            "satellite_damage_prob": 0.0, "station_damage_prob": 0.0}
+    sweep = [base, dict(base, num_stations=8), dict(base, satellite_damage_prob=0.0005, station_damage_prob=0.0005)]
+    experiment = SequentialExperiment(sweep, relative=relative, absolute={"lost_gb": 2.0, "outage_sec": 1.0})
+    start = time.perf_counter()
+    results = experiment.run(workers)
+    log.info("%d runs in %.1fs", experiment.total_runs, time.perf_counter() - start)
+    for k, result in enumerate(results):
+        log.info("Configuration %d: %d runs%s", k, result["runs"], "" if result["converged"] else " (not converged)")
+        for metric in REPORT_METRICS:
+            log.info("  %-20s %10.2f +- %.2f", metric, result["mean"][metric], result["half_width"][metric])
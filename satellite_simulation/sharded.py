@@ -0,0 +1,421 @@
+import math
+import os
+import numpy as np
+from config import *
+from draws import DamageDraws
+from engine import HEADLESS_TICK_MS, setup_simulation
+from jamming import link_factors, link_masks, loss_shares, onsets
+from stats import OUTAGE_HISTOGRAM_EDGES_SEC
+
+SAT_OPERATIONAL, SAT_DAMAGING, SAT_DESTROYED = 0, 1, 2
+STATION_OPERATIONAL, STATION_DAMAGED = 0, 1
+BURST_DURATION_MS = 3000
+
+#per-worker counters, summed by the coordinator at the end of the run
+STAT_FIELDS = ["delivered", "jamming_lost", "jamming_events", "repair_lost", "station_damage_events",
+               "satellites_damaged", "satellites_destroyed", "connections", "handoffs", "generated", "overflow_lost",
+               "outages", "outage_total_sec"]
+
+#name -> (dtype, per satellite / per station / other)
+SAT_ARRAYS = [("angle", "f8"), ("radius", "f8"), ("angular_speed", "f8"), ("x", "f8"), ("y", "f8"),
+              ("status", "i1"), ("blink_start", "f8"), ("data", "f8"), ("delivered", "f8"),
+              ("rate", "f8"), ("weight", "f8"), ("connected", "i4"), ("proposal", "i4"),
+              ("proposal_dist", "f8"), ("burst_start", "f8"), ("in_burst", "i1"), ("tx", "f8"),
+              ("tx_to", "i4"), ("owner", "i4"), ("gen_rate", "f8"), ("storage", "f8"), ("overflow", "f8"),
+              ("jam_mask", "u8"), ("last_connected", "i4")]
+STATION_ARRAYS = [("x", "f8"), ("y", "f8"), ("base_angle", "f8"), ("comm_radius", "f8"), ("capacity", "i4"),
+                  ("status", "i1"), ("damage_start", "f8"), ("received", "f8"), ("max_data", "f8")]
+
+
+def _sector_of(angle, sectors):
+    return np.minimum((angle * (sectors / (2 * math.pi))).astype(np.int32), sectors - 1)
+
+
+def _attach(spec):
+    from multiprocessing import shared_memory
+
+    blocks, arrays = [], {}
+    for key, (name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        blocks.append(shm)
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+
+def _in_range(sx, sy, st, stations):
+    """ Station-major visibility mask (stations x satellites), Station.is_satellite_in_range on arrays. """
+    dx = sx[None, :] - st["st_x"][stations][:, None]
+    dy = sy[None, :] - st["st_y"][stations][:, None]
+    close = dx * dx + dy * dy <= st["st_comm_radius"][stations][:, None] ** 2
+    half_arc = math.radians(STATION_COMM_ANGLE_DEG) / 2
+    diff = (np.arctan2(dy, dx) - st["st_base_angle"][stations][:, None] + math.pi) % (2 * math.pi) - math.pi
+    return close & (np.abs(diff) <= half_arc + 1e-9), dx * dx + dy * dy
+
+
+def _worker(sector, sectors, spec, ticks, tick_ms, params, seed, barrier):
+    blocks, a = _attach(spec)
+    try:
+        _run_sector(a, sector, sectors, ticks, tick_ms, params, seed, barrier)
+    finally:
+        #every view into the blocks has to be gone before they can be closed
+        a.clear()
+        for shm in blocks:
+            shm.close()
+
+
+def _run_sector(a, sector, sectors, ticks, tick_ms, params, seed, barrier):
+    rng = np.random.default_rng(None if seed is None else [seed, sector])
+    stats = a["stats"][sector]
+    jammers, jam_stats = a["jammers"], a["jam_stats"][sector]
+    own_stations = np.nonzero(a["st_owner"] == sector)[0]
+    #stations whose range can reach a satellite in this sector
+    candidates = np.nonzero(a["candidates"][sector])[0]
+    sat_prob, sat_repair_ms, st_prob, st_repair_ms = params
+    dt_sec = tick_ms / 1000.0
+    n_stations = len(a["st_x"])
+
+    for tick in range(ticks):
+        now = (tick + 1) * tick_ms
+        now_sec = now / 1000.0
+
+        # ——— phase 1: satellites in this sector move, transfer, take damage and propose links ———
+        status = a["status"]
+        mine = np.nonzero((a["owner"] == sector) & (status != SAT_DESTROYED))[0]
+        a["proposal"][mine] = -1
+
+        #onboard generation into bounded storage, as FleetStorage.generate
+        generated = a["gen_rate"][mine] * dt_sec
+        data = a["data"][mine] + generated
+        lost = np.maximum(data - a["storage"][mine], 0.0)
+        a["data"][mine] = data - lost
+        a["overflow"][mine] += lost
+        stats[9] += float(generated.sum())
+        stats[10] += float(lost.sum())
+
+        dying = mine[(status[mine] == SAT_DAMAGING) & (now - a["blink_start"][mine] > sat_repair_ms)]
+        status[dying] = SAT_DESTROYED
+        a["gen_rate"][dying] = 0.0
+        stats[6] += len(dying)
+
+        live = mine[status[mine] == SAT_OPERATIONAL]
+        angle = (a["angle"][live] + a["angular_speed"][live] * dt_sec) % (2 * math.pi)
+        a["angle"][live] = angle
+        sx = EARTH_POSITION[0] + a["radius"][live] * np.cos(angle)
+        sy = EARTH_POSITION[1] + a["radius"][live] * np.sin(angle)
+        a["x"][live] = sx
+        a["y"][live] = sy
+
+        linked = live[(a["connected"][live] >= 0) & (a["data"][live] > 0)]
+        bursting = (a["in_burst"][linked] == 1) & (now - a["burst_start"][linked] <= BURST_DURATION_MS)
+        a["in_burst"][linked] = bursting
+        sent = np.minimum(a["rate"][linked] * np.where(bursting, 2.0, 1.0) * dt_sec, a["data"][linked])
+        if len(jammers):
+            #the same per-link evaluation as JammerField, on this sector's links
+            target = a["connected"][linked]
+            factors = link_factors(jammers, a["x"][linked], a["y"][linked], a["st_x"][target], a["st_y"][target])
+            masks = link_masks(factors)
+            entered = onsets(factors, masks, a["jam_mask"][linked])
+            a["jam_mask"][mine] = 0
+            a["jam_mask"][linked] = masks
+            jammed = sent * (1.0 - np.prod(1.0 - factors, axis=0))
+            jam_stats[:, 0] += loss_shares(factors) @ jammed
+            jam_stats[:, 1] += entered
+            stats[1] += float(jammed.sum())
+            stats[2] += int(entered.sum())
+            sent = sent - jammed
+        a["data"][linked] -= sent
+        a["delivered"][linked] += sent
+        a["tx"][linked] = sent
+        a["tx_to"][linked] = a["connected"][linked]
+        stats[0] += float(sent.sum())
+
+        damaged = live[rng.random(len(live)) < sat_prob]
+        status[damaged] = SAT_DAMAGING
+        a["blink_start"][damaged] = now
+        a["in_burst"][damaged] = 0
+        stats[5] += len(damaged)
+
+        conn = a["connected"]
+        conn[mine[status[mine] != SAT_OPERATIONAL]] = -1
+        conn[live[a["data"][live] <= SATELLITE_DRAINED_GB]] = -1
+        live = live[status[live] == SAT_OPERATIONAL]
+        if len(candidates) and len(live):
+            visible, dist_sq = _in_range(a["x"][live], a["y"][live], a, candidates)
+            visible &= (a["st_status"][candidates] == STATION_OPERATIONAL)[:, None]
+            # drop links that left range
+            linked_live = conn[live] >= 0
+            if linked_live.any():
+                pos = np.searchsorted(candidates, conn[live])
+                pos = np.minimum(pos, len(candidates) - 1)
+                still = (candidates[pos] == conn[live]) & visible[pos, np.arange(len(live))]
+                conn[live[linked_live & ~still]] = -1
+            # nearest visible station for the rest
+            free = (conn[live] < 0) & (a["data"][live] >= SATELLITE_RELINK_GB)
+            if free.any():
+                d = np.where(visible, dist_sq, np.inf)[:, free]
+                best = np.argmin(d, axis=0)
+                best_d = d[best, np.arange(d.shape[1])]
+                ok = np.isfinite(best_d)
+                props = live[free][ok]
+                a["proposal"][props] = candidates[best[ok]]
+                a["proposal_dist"][props] = best_d[ok]
+
+        barrier.wait()
+
+        # ——— phase 2: stations in this sector take data, fail or repair and accept proposals ———
+        conn = a["connected"]
+        tx_to = a["tx_to"]
+        receiving = tx_to >= 0
+        received = np.bincount(tx_to[receiving], weights=a["tx"][receiving], minlength=n_stations)
+        st_status = a["st_status"]
+        for s in own_stations:
+            if st_status[s] == STATION_OPERATIONAL:
+                a["st_received"][s] = min(a["st_received"][s] + received[s], a["st_max_data"][s])
+                if rng.random() < st_prob:
+                    st_status[s] = STATION_DAMAGED
+                    a["st_damage_start"][s] = now
+                    stats[4] += 1
+            elif now - a["st_damage_start"][s] > st_repair_ms:
+                st_status[s] = STATION_OPERATIONAL
+                lost = a["st_received"][s] / STATION_DATA_LOSS_ON_REPAIR
+                a["st_received"][s] -= lost
+                stats[3] += lost
+
+        down = own_stations[st_status[own_stations] == STATION_DAMAGED]
+        if len(down):
+            conn[np.isin(conn, down)] = -1
+        counts = np.bincount(conn[conn >= 0], minlength=n_stations)
+        proposal = a["proposal"]
+        asking = np.nonzero(np.isin(proposal, own_stations) & (proposal >= 0))[0]
+        asking = asking[st_status[proposal[asking]] == STATION_OPERATIONAL]
+        if len(asking):
+            #per station: highest weight first, then nearest
+            order = np.lexsort((a["proposal_dist"][asking], -a["weight"][asking], proposal[asking]))
+            asking = asking[order]
+            target = proposal[asking]
+            starts = np.searchsorted(target, target, side="left")
+            rank = np.arange(len(asking)) - starts
+            accepted = asking[rank < a["st_capacity"][target] - counts[target]]
+            conn[accepted] = proposal[accepted]
+            #a first contact with a station starts a transfer burst
+            visited = a["visited"]
+            byte, bit = proposal[accepted] // 8, (1 << (proposal[accepted] % 8)).astype(np.uint8)
+            fresh = (visited[accepted, byte] & bit) == 0
+            visited[accepted[fresh], byte[fresh]] |= bit[fresh]
+            a["in_burst"][accepted[fresh]] = 1
+            a["burst_start"][accepted[fresh]] = now
+            stats[7] += len(accepted)
+
+        barrier.wait()
+
+        # ——— phase 3: clear this tick's transfers and time outages, as Simulation.step ———
+        a["tx"][mine] = 0.0
+        a["tx_to"][mine] = -1
+
+        #a link that ended without a new one starts an outage, the next link to that station ends it
+        loss_start = a["loss_start"]
+        previous, current = a["last_connected"][mine], conn[mine]
+        dropped = (previous >= 0) & (current < 0)
+        left, left_from = mine[dropped], previous[dropped]
+        fresh = np.isnan(loss_start[left, left_from])
+        loss_start[left[fresh], left_from[fresh]] = now_sec
+        back, back_to = mine[current >= 0], current[current >= 0]
+        began = loss_start[back, back_to]
+        ended = ~np.isnan(began)
+        if ended.any():
+            durations = now_sec - began[ended]
+            loss_start[back[ended], back_to[ended]] = np.nan
+            stats[11] += len(durations)
+            stats[12] += float(durations.sum())
+            a["outage_max"][sector] = max(a["outage_max"][sector], float(durations.max()))
+            a["outage_hist"][sector] += np.bincount(np.searchsorted(OUTAGE_HISTOGRAM_EDGES_SEC, durations, side="left"),
+                                                    minlength=len(OUTAGE_HISTOGRAM_EDGES_SEC) + 1)
+        a["last_connected"][mine] = current
+
+        # hand satellites that crossed a sector boundary to the neighbour for the next tick
+        moved = mine[a["status"][mine] != SAT_DESTROYED]
+        new_owner = _sector_of(a["angle"][moved], sectors)
+        crossed = moved[new_owner != sector]
+        a["owner"][crossed] = new_owner[new_owner != sector]
+        stats[8] += len(crossed)
+
+        barrier.wait()
+
+
+class ShardedSimulation:
+    """ Headless run split across worker processes, one per angular sector; refuses features it cannot run. """
+
+    def __init__(self, params, seed=None, sectors=None):
+        sim = self.sim = setup_simulation(params, seed)
+        unsupported = [name for name, enabled in (("preemption", sim.scheduler.preemption),
+                                                  ("inter_satellite_links", sim.router is not None),
+                                                  ("weather", sim.weather is not None),
+                                                  ("debris", sim.debris is not None),
+                                                  ("keyed damage draws", isinstance(sim.ctx.draws, DamageDraws)))
+                       if enabled]
+        if unsupported:
+            raise ValueError(f"The sharded engine does not support {', '.join(unsupported)}; "
+                             f"run this configuration with engine.run_simulation")
+        self.seed = seed
+        self.sectors = max(1, sectors or os.cpu_count() or 1)
+        self.stats = {}
+
+    def _allocate(self):
+        from multiprocessing import shared_memory
+
+        sim = self.sim
+        n, s = len(sim.satellites), len(sim.stations)
+        shapes = {f"{name}": ((n,), dtype) for name, dtype in SAT_ARRAYS}
+        shapes.update({f"st_{name}": ((s,), dtype) for name, dtype in STATION_ARRAYS})
+        shapes.update({"st_owner": ((s,), "i4"), "visited": ((n, (s + 7) // 8), "u1"),
+                       "candidates": ((self.sectors, s), "?"), "stats": ((self.sectors, len(STAT_FIELDS)), "f8"),
+                       "jammers": ((len(sim.ctx.jammers.jammers), 4), "f8"),
+                       "jam_stats": ((self.sectors, len(sim.ctx.jammers.jammers), 2), "f8"),
+                       #start (sim seconds) of the ongoing outage of every satellite and station pair, NaN if none
+                       "loss_start": ((n, s), "f8"), "outage_max": ((self.sectors,), "f8"),
+                       "outage_hist": ((self.sectors, len(OUTAGE_HISTOGRAM_EDGES_SEC) + 1), "f8")})
+
+        self._blocks, spec, arrays = [], {}, {}
+        for key, (shape, dtype) in shapes.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks.append(shm)
+            spec[key] = (shm.name, shape, dtype)
+            arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            arrays[key].fill(0)
+        return spec, arrays
+
+    def _load(self, a):
+        sim = self.sim
+        sats, stations = sim.satellites, sim.stations
+        weights = sim.scheduler
+        a["angle"][:] = [sat.angle for sat in sats]
+        a["radius"][:] = [sat.orbit_radius_pixels for sat in sats]
+        a["angular_speed"][:] = [sat.angular_speed_rad_per_sec for sat in sats]
+        a["x"][:] = [sat.x for sat in sats]
+        a["y"][:] = [sat.y for sat in sats]
+        a["data"][:] = [sat.data_amount for sat in sats]
+        a["rate"][:] = [sat.transfer_rate for sat in sats]
+        fleet = sim.ctx.fleet
+        slots = [sat.slot for sat in sats]
+        a["gen_rate"][:] = [fleet.rate[i] for i in slots]
+        a["storage"][:] = [fleet.capacity[i] for i in slots]
+        a["overflow"][:] = [fleet.overflow[i] for i in slots]
+        a["weight"][:] = [weights.weight_of(sat) for sat in sats]
+        a["connected"][:] = -1
+        a["last_connected"][:] = -1
+        a["loss_start"].fill(np.nan)
+        a["proposal"][:] = -1
+        a["tx_to"][:] = -1
+        a["owner"][:] = _sector_of(a["angle"], self.sectors)
+        if sim.ctx.jammers.jammers:
+            a["jammers"][:] = sim.ctx.jammers.jammers
+
+        a["st_x"][:] = [st.x for st in stations]
+        a["st_y"][:] = [st.y for st in stations]
+        a["st_base_angle"][:] = [st.base_angle_rad for st in stations]
+        a["st_comm_radius"][:] = [st.comm_radius for st in stations]
+        a["st_capacity"][:] = [st.capacity for st in stations]
+        a["st_max_data"][:] = [st.max_data_capacity for st in stations]
+        a["st_owner"][:] = _sector_of(a["st_base_angle"] % (2 * math.pi), self.sectors)
+
+        #a station can reach satellites whose orbit angle is within reach of its own angle
+        ground = np.hypot(a["st_x"] - EARTH_POSITION[0], a["st_y"] - EARTH_POSITION[1])
+        orbit = a["radius"].min() if len(sats) else 0.0
+        cos_reach = (ground ** 2 + orbit ** 2 - a["st_comm_radius"] ** 2) / np.maximum(2 * ground * orbit, 1e-9)
+        reach = np.arccos(np.clip(cos_reach, -1.0, 1.0)) + 2 * math.pi / self.sectors
+        width = 2 * math.pi / self.sectors
+        for k in range(self.sectors):
+            centre = (k + 0.5) * width
+            gap = np.abs((a["st_base_angle"] - centre + math.pi) % (2 * math.pi) - math.pi)
+            a["candidates"][k] = gap <= reach + width / 2
+
+    def _store(self, a):
+        sim = self.sim
+        statuses = ['operational', 'damaging', 'destroyed']
+        for i, sat in enumerate(sim.satellites):
+            sat.angle = float(a["angle"][i])
+            sat.x, sat.y = float(a["x"][i]), float(a["y"][i])
+            sat.status = statuses[a["status"][i]]
+            sat.data_amount = float(a["data"][i])
+            sat.delivered_data = float(a["delivered"][i])
+            sim.ctx.fleet.overflow[sat.slot] = float(a["overflow"][i])
+            if sat.status == 'destroyed':
+                sim.ctx.fleet.stop(sat.slot)
+        for i, st in enumerate(sim.stations):
+            st.received_data = float(a["st_received"][i])
+            st.status = 'damaged' if a["st_status"][i] == STATION_DAMAGED else 'operational'
+            st.connected_satellites = []
+        for i, station_idx in enumerate(a["connected"]):
+            sat = sim.satellites[i]
+            sat.connected_to = None
+            if station_idx >= 0 and sat.status == 'operational':
+                sim.scheduler.link(sim.stations[station_idx], sat)
+        destroyed = [sat for sat in sim.satellites if sat.status == 'destroyed']
+        sim.satellites[:] = [sat for sat in sim.satellites if sat.status != 'destroyed']
+        sim.ctx.destroyed_satellites_log.extend(destroyed)
+
+        run_stats = sim.ctx.stats
+        run_stats.now_ms = sim.elapsed_simulation_time_ms
+        run_stats.total_delivered = self.stats["delivered"]
+        run_stats.jamming_lost = self.stats["jamming_lost"]
+        run_stats.jamming_events = int(self.stats["jamming_events"])
+        run_stats.repair_lost = self.stats["repair_lost"]
+        run_stats.generated = self.stats["generated"]
+        run_stats.overflow_lost = self.stats["overflow_lost"]
+        run_stats.station_damage_events = int(self.stats["station_damage_events"])
+        run_stats.satellites_damaged = int(self.stats["satellites_damaged"])
+        run_stats.satellites_destroyed = int(self.stats["satellites_destroyed"])
+        for sat in sim.satellites + destroyed:
+            run_stats.satellite_drained[sat.name] = sat.delivered_data
+        jammers = sim.ctx.jammers
+        for i, (lost, events) in enumerate(a["jam_stats"].sum(axis=0).tolist()):
+            jammers.lost[i] = lost
+            jammers.events[i] = int(events)
+
+        run_stats.outage_count = int(self.stats["outages"])
+        run_stats.outage_total_sec = self.stats["outage_total_sec"]
+        run_stats.outage_max_sec = float(a["outage_max"].max())
+        run_stats.outage_histogram = [int(count) for count in a["outage_hist"].sum(axis=0).tolist()]
+        #outages still open at the end count up to it, as Simulation.close_active_losses
+        open_sats, open_stations = np.nonzero(~np.isnan(a["loss_start"]))
+        for start in a["loss_start"][open_sats, open_stations].tolist():
+            run_stats.on_outage(sim.elapsed_simulation_time_ms / 1000.0 - start)
+
+    def run(self, tick_ms=HEADLESS_TICK_MS):
+        """ Runs to the end of the configured duration and returns the engine Simulation with the final state. """
+        import multiprocessing
+
+        sim = self.sim
+        step_ms = tick_ms * sim.ctx.simulation_speed
+        ticks = int(math.ceil(sim.total_duration_ms / step_ms))
+        spec, arrays = self._allocate()
+        try:
+            self._load(arrays)
+            ctx = sim.ctx
+            params = (ctx.satellite_damage_probability, ctx.satellite_repair_time_seconds * 1000,
+                      ctx.station_damage_probability, ctx.station_repair_time_ms)
+            barrier = multiprocessing.Barrier(self.sectors)
+            workers = [multiprocessing.Process(target=_worker, args=(k, self.sectors, spec, ticks, step_ms,
+                                                                     params, self.seed, barrier))
+                       for k in range(self.sectors)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            if any(w.exitcode != 0 for w in workers):
+                raise RuntimeError("A sector worker failed")
+
+            self.stats = dict(zip(STAT_FIELDS, arrays["stats"].sum(axis=0).tolist()))
+            sim.elapsed_simulation_time_ms = ticks * step_ms
+            self._store(arrays)
+        finally:
+            arrays.clear()
+            for shm in self._blocks:
+                shm.close()
+                shm.unlink()
+        return sim
+
+
+def run_sharded_simulation(params, seed=None, sectors=None, tick_ms=HEADLESS_TICK_MS):
+    return ShardedSimulation(params, seed, sectors).run(tick_ms)
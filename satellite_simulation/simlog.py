@@ -0,0 +1,186 @@
+import atexit
+import html
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOG_NAME = "satsim"
+LOG_LEVEL = logging.INFO
+#at most LOG_RATE_BURST records with the same message template per window, the rest are counted
+LOG_RATE_WINDOW_SEC = 1.0
+LOG_RATE_BURST = 10
+#same layout as the simulation_log.html prototype, under its own name so the prototype is kept
+LOG_HTML_FILENAME = "simulation_run_log.html"
+
+#record kinds of the HTML log, picked from the level when a record carries none
+LOG_KINDS = ["INIT", "START", "END", "CONNECT", "DISCONNECT", "QUEUE", "DATA_TX", "ERROR",
+             "MAINTENANCE", "INFO", "WARNING"]
+
+_listener = None
+
+
+def get_logger(name):
+    return logging.getLogger(f"{LOG_NAME}.{name}")
+
+
+def event(kind, sim_ms=None):
+    """ extra= for a record: its HTML log kind and, when known, the simulation time it happened at. """
+    return {"kind": kind, "sim_ms": sim_ms}
+
+
+class RateLimitFilter(logging.Filter):
+    """ Drops records past the burst limit for each message template and window. """
+
+    def __init__(self, window_sec=LOG_RATE_WINDOW_SEC, burst=LOG_RATE_BURST):
+        super().__init__()
+        self.window_sec = window_sec
+        self.burst = burst
+        #(logger, template) -> [window start, passed, suppressed]
+        self._windows = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.msg)
+        now = record.created
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.window_sec:
+            suppressed = window[2] if window else 0
+            self._windows[key] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+        if window[1] < self.burst:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class _ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        message = record.getMessage()
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            message += f" (+{suppressed} similar suppressed)"
+        return message
+
+
+class HtmlLogHandler(logging.Handler):
+    """ Writes records as log entries in the format of the simulation_log.html prototype. """
+
+    HEADER = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Satellite Communication Simulation Log</title>
+    <style>
+        body { font-family: sans-serif; line-height: 1.4; padding: 20px; background-color: #f4f4f4; }
+        h1 { text-align: center; color: #333; }
+        .log-entry {
+            border-left: 5px solid #ccc;
+            padding: 8px 15px;
+            margin-bottom: 8px;
+            background-color: #fff;
+            border-radius: 4px;
+            box-shadow: 1px 1px 3px rgba(0,0,0,0.1);
+        }
+        .log-entry .time { font-weight: bold; color: #555; min-width: 50px; display: inline-block;}
+        .log-entry .type { font-weight: bold; margin: 0 10px; padding: 2px 6px; border-radius: 3px; color: white; }
+        .log-INIT { border-left-color: #777; } .type-INIT { background-color: #777; }
+        .log-START { border-left-color: #2a9fd6; } .type-START { background-color: #2a9fd6; }
+        .log-END { border-left-color: #2a9fd6; } .type-END { background-color: #2a9fd6; }
+        .log-CONNECT { border-left-color: #4CAF50; } .type-CONNECT { background-color: #4CAF50; }
+        .log-DISCONNECT { border-left-color: #ff9800; } .type-DISCONNECT { background-color: #ff9800; }
+        .log-QUEUE { border-left-color: #607d8b; } .type-QUEUE { background-color: #607d8b; }
+        .log-DATA_TX { border-left-color: #00bcd4; } .type-DATA_TX { background-color: #00bcd4; color: #333; }
+        .log-ERROR { border-left-color: #f44336; } .type-ERROR { background-color: #f44336; }
+        .log-MAINTENANCE { border-left-color: #9c27b0; } .type-MAINTENANCE { background-color: #9c27b0; }
+        .log-INFO { border-left-color: #bdbdbd; } .type-INFO { background-color: #bdbdbd; color: #333;}
+        .log-WARNING { border-left-color: #ffeb3b; } .type-WARNING { background-color: #ffeb3b; color: #333;}
+
+    </style>
+</head>
+<body>
+    <h1>Satellite Communication Simulation Log</h1>
+    <div id="log-container">
+"""
+    FOOTER = """
+    </div>
+</body>
+</html>
+"""
+    ENTRY = """        <div class="log-entry log-{kind}">
+            <span class="time">{time}</span>
+            <span class="type type-{kind}">{kind}</span>
+            <span class="message">{message}</span>
+        </div>
+"""
+
+    def __init__(self, filename=LOG_HTML_FILENAME):
+        super().__init__()
+        self.file = open(filename, "w", encoding="utf-8")
+        self.file.write(self.HEADER)
+        self.setFormatter(_ConsoleFormatter())
+
+    def emit(self, record):
+        kind = getattr(record, "kind", None)
+        if kind not in LOG_KINDS:
+            kind = "ERROR" if record.levelno >= logging.ERROR else "WARNING" if record.levelno >= logging.WARNING else "INFO"
+        sim_ms = getattr(record, "sim_ms", None)
+        seconds = int((sim_ms if sim_ms is not None else record.relativeCreated) // 1000)
+        self.file.write(self.ENTRY.format(kind=kind, time=f"{seconds // 60:02d}:{seconds % 60:02d}",
+                                          message=html.escape(self.format(record))))
+
+    def close(self):
+        if not self.file.closed:
+            self.file.write(self.FOOTER)
+            self.file.close()
+        super().close()
+
+
+def setup_logging(level=LOG_LEVEL, console=True, html_filename=None, rate_limit=True):
+    """ Routes the simulation loggers through a queue to a background listener thread.
+
+    The calling thread only filters and enqueues records; console and HTML output
+    are written on the listener thread, so ticks never wait on I/O.
+    """
+    global _listener
+    shutdown_logging()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(_ConsoleFormatter())
+        handlers.append(stream)
+    if html_filename:
+        handlers.append(HtmlLogHandler(html_filename))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter())
+    root = logging.getLogger(LOG_NAME)
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """ Drains the queue and closes the output handlers. """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(shutdown_logging)
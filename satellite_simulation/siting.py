@@ -0,0 +1,278 @@
+""" Ground-station siting search on a coverage surrogate.
+
+Satellites move on circular orbits at constant angular speed and a rim station sees a
+satellite only through the angle between them, so one precomputed table of contact
+windows (how many satellites a station at each angle bin and radius level sees at each
+sampled time) scores any placement without running a simulation.
+
+    python siting.py N [delivered|outage] [workers]    sites N stations next to a random setup
+"""
+import math
+import os
+import random
+import sys
+import numpy as np
+from config import *
+from simlog import get_logger
+
+log = get_logger("siting")
+
+SITING_ANGLE_BINS = 720
+SITING_RADIUS_LEVELS = 8
+SITING_TIME_SAMPLES = 600
+SITING_HORIZON_SEC = 600.0
+SITING_RESTARTS = 4
+SITING_OBJECTIVES = ("delivered", "outage")
+
+#surrogate and fixed stations of a worker process, set once by the pool initializer
+_worker_state = None
+
+
+def _window(orbit, ground, radius, bins):
+    """ Station.is_satellite_in_range for a station at angle 0 and a satellite at every bin centre. """
+    d = (np.arange(bins) + 0.5) * (2 * math.pi / bins)
+    dx = orbit * np.cos(d) - ground
+    dy = orbit * np.sin(d)
+    close = np.hypot(dx, dy) <= radius
+    diff = (np.arctan2(dy, dx) + math.pi) % (2 * math.pi) - math.pi
+    return close & (np.abs(diff) <= math.radians(STATION_COMM_ANGLE_DEG) / 2)
+
+
+class CoverageTable:
+    """ Contact windows of a fleet over a time horizon. """
+
+    def __init__(self, satellites, horizon_sec=SITING_HORIZON_SEC, samples=SITING_TIME_SAMPLES,
+                 angle_bins=SITING_ANGLE_BINS, radius_levels=SITING_RADIUS_LEVELS):
+        sats = [sat for sat in satellites if sat.status == 'operational']
+        self.bins = angle_bins
+        self.radii = np.linspace(MIN_STATION_COMM_RADIUS, MAX_STATION_COMM_RADIUS, radius_levels)
+        self.dt_sec = horizon_sec / samples
+        self.transfer_rate = sum(sat.transfer_rate for sat in sats) / len(sats) if sats else 0.0
+        self.orbits = sorted({round(sat.orbit_radius_pixels, 6) for sat in sats})
+
+        shell_of = {orbit: i for i, orbit in enumerate(self.orbits)}
+        shell = np.array([shell_of[round(sat.orbit_radius_pixels, 6)] for sat in sats], dtype=np.int64)
+        times = (np.arange(samples) + 0.5) * self.dt_sec
+        angle0 = np.array([sat.angle for sat in sats])
+        speed = np.array([sat.angular_speed_rad_per_sec for sat in sats])
+        angles = (angle0[None, :] + speed[None, :] * times[:, None]) % (2 * math.pi)
+        b = np.minimum((angles * (angle_bins / (2 * math.pi))).astype(np.int64), angle_bins - 1)
+        flat = (shell[None, :] * samples + np.arange(samples)[:, None]) * angle_bins + b
+        shape = (len(self.orbits), samples, angle_bins)
+        self.hist = np.bincount(flat.ravel(), minlength=math.prod(shape)).reshape(shape).astype(np.float64)
+        self.total = self.hist.sum(axis=(0, 2))
+
+        self.windows = np.zeros((len(self.orbits), radius_levels, angle_bins), dtype=bool)
+        for i, orbit in enumerate(self.orbits):
+            for k, radius in enumerate(self.radii):
+                self.windows[i, k] = _window(orbit, EARTH_RADIUS_PIXELS, radius, angle_bins)
+
+        #cover[k, a, t] = sum over shells and d of hist[t, a + d] * windows[k, d], a circular correlation
+        spectrum = np.fft.rfft(self.hist, axis=2)
+        cover = np.zeros((radius_levels, samples, angle_bins))
+        for i in range(len(self.orbits)):
+            window_spectrum = np.conj(np.fft.rfft(self.windows[i].astype(np.float64), axis=1))
+            cover += np.fft.irfft(spectrum[i][None, :, :] * window_spectrum[:, None, :], n=angle_bins, axis=2)
+        self.cover = np.ascontiguousarray(np.rint(cover).transpose(0, 2, 1))
+
+    def angle_bin(self, angle):
+        return int((angle % (2 * math.pi)) * self.bins / (2 * math.pi)) % self.bins
+
+    def bin_angle(self, a):
+        return (a + 0.5) * 2 * math.pi / self.bins
+
+    def built(self, stations):
+        """ Union masks, capacity-limited coverage and angle bins of already built stations. """
+        masks = np.zeros((len(self.orbits), self.bins), dtype=bool)
+        served = np.zeros(len(self.total))
+        for st in stations:
+            ground = math.hypot(st.x - EARTH_POSITION[0], st.y - EARTH_POSITION[1])
+            a = self.angle_bin(st.base_angle_rad)
+            seen = np.zeros(len(self.total))
+            for i, orbit in enumerate(self.orbits):
+                window = np.roll(_window(orbit, ground, st.comm_radius, self.bins), a)
+                masks[i] |= window
+                seen += self.hist[i] @ window
+            served += np.minimum(seen, st.capacity)
+        return masks, served, [self.angle_bin(st.base_angle_rad) for st in stations]
+
+
+def _score(state, placement):
+    """ Surrogate value of adding stations at placement, a tuple of (angle bin, radius level).
+
+    delivered: transfer rate times the satellite-time in contact, each station capped at its
+    capacity; outage: minus the satellite-seconds without any station in range. Satellites
+    are assumed never to run dry, so delivered is an upper bound of what a run achieves.
+    """
+    table, objective, radius_cost, min_gap, masks, served, taken = state
+    angles = sorted(taken + [a for a, _ in placement])
+    for i, a in enumerate(angles):
+        gap = (angles[(i + 1) % len(angles)] - a) % table.bins
+        if len(angles) > 1 and gap < min_gap:
+            return -math.inf
+    masks = masks.copy()
+    served = served.copy()
+    for a, k in placement:
+        masks |= np.roll(table.windows[:, k], a, axis=1)
+        served += np.minimum(table.cover[k, a], STATION_MAX_CAPACITY)
+    union = np.einsum('stb,sb->t', table.hist, masks.astype(np.float64))
+    cost = radius_cost * sum(table.radii[k] for _, k in placement)
+    if objective == "outage":
+        return -float((table.total - union).sum()) * table.dt_sec - cost
+    return float(np.minimum(union, served).sum()) * table.transfer_rate * table.dt_sec - cost
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _score_in_worker(placement):
+    return _score(_worker_state, placement)
+
+
+def optimize_stations(satellites, count, stations=(), objective="delivered", horizon_sec=SITING_HORIZON_SEC,
+                      radius_cost=0.0, workers=None, seed=None, restarts=SITING_RESTARTS):
+    """ Searches angles and comm radii for count new rim stations next to the existing ones.
+
+    Local search from several random starts: every round scores all single moves of one
+    station (angle by the current step, radius by one level) for every start as one batch,
+    spread over a process pool; the angle step halves whenever no move improves. radius_cost
+    is subtracted per pixel of comm radius, without it the widest radius always wins.
+    """
+    if objective not in SITING_OBJECTIVES:
+        raise ValueError(f"Unknown siting objective {objective!r}")
+    table = CoverageTable(satellites, horizon_sec)
+    masks, served, taken = table.built(stations)
+    min_gap = math.ceil(STATION_MIN_DISTANCE / EARTH_RADIUS_PIXELS * table.bins / (2 * math.pi))
+    state = (table, objective, radius_cost, min_gap, masks, served, taken)
+    rng = random.Random(seed)
+    levels = len(table.radii)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,))
+    evaluations = 0
+
+    def evaluate(batch):
+        nonlocal evaluations
+        evaluations += len(batch)
+        if pool is None:
+            return [_score(state, placement) for placement in batch]
+        return list(pool.map(_score_in_worker, batch, chunksize=max(1, len(batch) // (workers * 4))))
+
+    try:
+        starts = []
+        for _ in range(max(1, restarts)):
+            #spread evenly from a random offset, each station nudged to the nearest free bin
+            offset = rng.randrange(table.bins)
+            used = list(taken)
+            placement = []
+            for i in range(count):
+                a = (offset + i * table.bins // max(1, count)) % table.bins
+                for shift in range(table.bins):
+                    c = (a + (shift + 1) // 2 * (1 if shift % 2 else -1)) % table.bins
+                    if all(min((c - u) % table.bins, (u - c) % table.bins) >= min_gap for u in used):
+                        a = c
+                        break
+                used.append(a)
+                placement.append((a, rng.randrange(levels)))
+            starts.append(tuple(placement))
+        current = list(zip(starts, evaluate(starts)))
+        steps = [max(1, table.bins // (4 * max(1, count)))] * len(current)
+        while any(step for step in steps):
+            batch, owners = [], []
+            for j, (placement, _) in enumerate(current):
+                if not steps[j]:
+                    continue
+                for i, (a, k) in enumerate(placement):
+                    moves = [((a + steps[j]) % table.bins, k), ((a - steps[j]) % table.bins, k)]
+                    moves += [(a, k + dk) for dk in (-1, 1) if 0 <= k + dk < levels]
+                    for move in moves:
+                        batch.append(placement[:i] + (move,) + placement[i + 1:])
+                        owners.append(j)
+            best = {}
+            for j, placement, score in zip(owners, batch, evaluate(batch)):
+                if score > best.get(j, (None, current[j][1]))[1]:
+                    best[j] = (placement, score)
+            for j in range(len(current)):
+                if j in best:
+                    current[j] = best[j]
+                elif steps[j]:
+                    steps[j] //= 2
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    placement, score = max(current, key=lambda item: item[1])
+    return {
+        "objective": objective,
+        "angles": [table.bin_angle(a) for a, _ in placement],
+        "radii": [float(table.radii[k]) for _, k in placement],
+        "score": score,
+        "evaluations": evaluations,
+    }
+
+
+def surrogate_score(satellites, new_stations, stations=(), objective="delivered", horizon_sec=SITING_HORIZON_SEC):
+    """ Surrogate value of already placed new_stations, to compare against an optimized result. """
+    table = CoverageTable(satellites, horizon_sec)
+    masks, served, taken = table.built(stations)
+    levels = [int(abs(table.radii - st.comm_radius).argmin()) for st in new_stations]
+    placement = tuple((table.angle_bin(st.base_angle_rad), k) for st, k in zip(new_stations, levels))
+    return _score((table, objective, 0.0, 0, masks, served, taken), placement)
+
+
+def apply_siting(result, stations_list, ctx):
+    """ Builds the stations of an optimize_stations result on the Earth rim. """
+    from station import Station
+
+    built = []
+    for angle, radius in zip(result["angles"], result["radii"]):
+        station = Station(EARTH_POSITION[0] + EARTH_RADIUS_PIXELS * math.cos(angle),
+                          EARTH_POSITION[1] + EARTH_RADIUS_PIXELS * math.sin(angle), ctx)
+        station.comm_radius = radius
+        stations_list.append(station)
+        built.append(station)
+    return built
+
+
+if __name__ == "__main__":
+    import time
+    from engine import setup_simulation
+    from simlog import setup_logging
+
+    setup_logging()
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    objective = sys.argv[2] if len(sys.argv) > 2 else "delivered"
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    params = {"duration": 10, "duration_seconds": 0, "num_satellites": 27, "num_stations": 4,
+              "satellite_damage_prob": 0.0, "station_damage_prob": 0.0}
+
+    def run(sim):
+        while sim.remaining_ms() > 0:
+            sim.step(sim.elapsed_simulation_time_ms, 1000.0)
+        sim.close_active_losses()
+        return sim.ctx.stats.summary()
+
+    horizon = (params["duration"] * 60 + params["duration_seconds"])
+    sim = setup_simulation(params, seed=1)
+    start = time.perf_counter()
+    result = optimize_stations(sim.satellites, count, sim.stations, objective, horizon, workers=workers, seed=1)
+    log.info("Siting search: %d candidates in %.2fs", result["evaluations"], time.perf_counter() - start)
+    for angle, radius in zip(result["angles"], result["radii"]):
+        log.info("  station at %.1f deg, comm radius %.0f", math.degrees(angle) % 360, radius)
+
+    random_sim = setup_simulation(params, seed=1)
+    rng = random.Random(2)
+    random_result = {"angles": [rng.uniform(0, 2 * math.pi) for _ in range(count)], "radii": [250.0] * count}
+    random_stations = apply_siting(random_result, random_sim.stations, random_sim.ctx)
+    random_score = surrogate_score(random_sim.satellites, random_stations, random_sim.stations[:-count],
+                                   objective, horizon)
+    apply_siting(result, sim.stations, sim.ctx)
+    optimized, baseline = run(sim), run(random_sim)
+    log.info("Surrogate %s: optimized %.1f, random %.1f", objective, result["score"], random_score)
+    for key in ("total_delivered_gb", "outages", "outage_mean_sec"):
+        log.info("Simulated %s: optimized %.1f, random %.1f", key, optimized[key], baseline[key])
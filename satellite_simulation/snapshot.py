@@ -0,0 +1,595 @@
+import itertools
+import math
+import struct
+import sys
+import zlib
+from array import array
+
+from config import KUIPER_ALTITUDES_KM
+from contacts import ContactCache
+from debris import DebrisField
+from draws import DamageDraws
+from engine import Simulation
+from jamming import JammerField
+from orbit import orbit_shell
+from routing import LinkRouter
+from satellite import Satellite
+from station import Station
+from weather import WeatherField
+
+SNAPSHOT_MAGIC = b"KSNP"
+SNAPSHOT_VERSION = 1
+
+FLAG_ZLIB = 1
+FLAG_BIG_ENDIAN = 2
+
+_HEADER = struct.Struct("<4sHH")
+
+SATELLITE_STATUSES = ['operational', 'damaging', 'destroyed']
+STATION_STATUSES = ['operational', 'damaged']
+
+NONE = float('nan')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _opt(value):
+    return NONE if value is None else float(value)
+
+
+def _unopt(value):
+    return None if math.isnan(value) else value
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _generator_state(rng):
+    """ PCG64 state of a NumPy generator as six unsigned 64-bit words. """
+    state = rng.bit_generator.state
+    value, inc = state['state']['state'], state['state']['inc']
+    return [value >> 64, value & _MASK64, inc >> 64, inc & _MASK64, state['has_uint32'], state['uinteger']]
+
+
+def _generator(words):
+    import numpy as np
+
+    rng = np.random.default_rng()
+    rng.bit_generator.state = {'bit_generator': 'PCG64',
+                               'state': {'state': words[0] << 64 | words[1], 'inc': words[2] << 64 | words[3]},
+                               'has_uint32': words[4], 'uinteger': words[5]}
+    return rng
+
+
+def _floats(values):
+    import numpy as np
+
+    return np.array(values, dtype=np.float64)
+
+
+class _Writer:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, fmt, *values):
+        self.parts.append(struct.pack(fmt, *values))
+
+    def array(self, typecode, values):
+        data = array(typecode, values)
+        self.parts.append(struct.pack("<I", len(data)))
+        self.parts.append(data.tobytes())
+
+    def strings(self, values):
+        encoded = [v.encode("utf-8") for v in values]
+        self.array('I', [len(v) for v in encoded])
+        self.parts.append(b"".join(encoded))
+
+    def getvalue(self):
+        return b"".join(self.parts)
+
+
+class _Reader:
+    def __init__(self, data, swap):
+        self.view = memoryview(data)
+        self.pos = 0
+        self.swap = swap
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        values = struct.unpack_from(fmt, self.view, self.pos)
+        self.pos += size
+        return values
+
+    def array(self, typecode):
+        count, = self.unpack("<I")
+        data = array(typecode)
+        size = count * data.itemsize
+        data.frombytes(self.view[self.pos:self.pos + size])
+        if self.swap:
+            data.byteswap()
+        self.pos += size
+        return data
+
+    def strings(self):
+        lengths = self.array('I')
+        values = []
+        for length in lengths:
+            values.append(bytes(self.view[self.pos:self.pos + length]).decode("utf-8"))
+            self.pos += length
+        return values
+
+
+class _Interner:
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def __call__(self, value):
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+
+def _encode(sim, current_ticks, logs):
+    strings = _Interner()
+    colors = _Interner()
+    live = set(sim.satellites)
+    ctx = sim.ctx
+    destroyed = ctx.destroyed_satellites_log if logs else []
+    all_sats = list(sim.satellites) + [s for s in destroyed if s not in live]
+    sat_index = {sat: i for i, sat in enumerate(all_sats)}
+    st_index = {st: i for i, st in enumerate(sim.stations)}
+
+    w = _Writer()
+    w.pack("<ddd ii ddddd",
+           sim.elapsed_simulation_time_ms, sim.total_duration_ms, float(current_ticks),
+           ctx.station_id_counter, ctx.satellite_counter,
+           ctx.station_damage_probability, float(ctx.station_repair_time_ms),
+           ctx.satellite_damage_probability, float(ctx.satellite_repair_time_seconds),
+           ctx.simulation_speed)
+
+    rng_version, rng_state, gauss_next = ctx.rng.getstate()
+    w.pack("<iBd", rng_version, gauss_next is not None, _opt(gauss_next))
+    w.array('I', rng_state)
+
+    #satellites, live ones first
+    w.pack("<I", len(sim.satellites))
+    w.array('i', [strings(s.name) for s in all_sats])
+    w.array('i', [strings(s.priority_class) for s in all_sats])
+    w.array('i', [colors(tuple(s.initial_color)) for s in all_sats])
+    w.array('i', [colors(tuple(s.color)) for s in all_sats])
+    w.array('d', [s.altitude_km for s in all_sats])
+    w.array('d', [s.angle for s in all_sats])
+    w.array('d', [s.x for s in all_sats])
+    w.array('d', [s.y for s in all_sats])
+    w.array('b', [SATELLITE_STATUSES.index(s.status) for s in all_sats])
+    w.array('b', [s.is_blinking | (s.blink_on << 1) | (s.transferring << 2) | (s.is_in_burst << 3) for s in all_sats])
+    w.array('d', [float(s.blink_start_time) for s in all_sats])
+    w.array('d', [_opt(s.burst_start_time) for s in all_sats])
+    w.array('d', [_opt(s.destroyed_time) for s in all_sats])
+    w.array('i', [s.slot for s in all_sats])
+    w.array('d', [s.delivered_data for s in all_sats])
+    w.array('i', [st_index.get(s.connected_to, -1) for s in all_sats])
+    visited = []
+    for i, s in enumerate(all_sats):
+        for st in s.connected_stations_set:
+            if st in st_index:
+                visited += (i, st_index[st])
+    w.array('i', visited)
+
+    stations = sim.stations
+    w.array('i', [st.id for st in stations])
+    w.array('d', [st.x for st in stations])
+    w.array('d', [st.y for st in stations])
+    w.array('d', [st.comm_radius for st in stations])
+    w.array('i', [st.capacity for st in stations])
+    w.array('d', [st.received_data for st in stations])
+    w.array('d', [st.max_data_capacity for st in stations])
+    w.array('d', [st.stored_data for st in stations])
+    w.array('b', [STATION_STATUSES.index(st.status) for st in stations])
+    w.array('d', [float(st.damage_start_time) for st in stations])
+    links = []
+    for i, st in enumerate(stations):
+        for sat in st.connected_satellites:
+            links += (i, sat_index[sat])
+    w.array('i', links)
+    dmg_station, dmg_start, dmg_end, dmg_lost = [], [], [], []
+    for i, st in enumerate(stations):
+        for entry in st.damage_log:
+            dmg_station.append(i)
+            dmg_start.append(entry[0])
+            dmg_end.append(_opt(entry[1]))
+            dmg_lost.append(_opt(entry[2] if len(entry) > 2 else None))
+    w.array('i', dmg_station)
+    w.array('d', dmg_start)
+    w.array('d', dmg_end)
+    w.array('d', dmg_lost)
+
+    jammers = ctx.jammers
+    w.array('d', [v for jammer in jammers.jammers for v in jammer])
+    w.array('d', jammers.lost)
+    w.array('q', jammers.events)
+
+    losses = [(key, info) for key, info in sim.active_losses.items() if key[0] in sat_index and key[1] in st_index]
+    w.array('i', [sat_index[sat] for (sat, _), _ in losses])
+    w.array('i', [st_index[st] for (_, st), _ in losses])
+    w.array('d', [info['start_time'] for _, info in losses])
+    w.array('d', [v for _, info in losses for v in (*info['sat_pos'], *info['st_pos'])])
+
+    log = sim.connection_loss_log if logs else []
+    w.array('i', [strings(ev['sat']) for ev in log])
+    w.array('i', [ev['station'] if isinstance(ev['station'], int) else -1 for ev in log])
+    w.array('d', [ev['start_time'] for ev in log])
+    w.array('d', [ev['duration'] for ev in log])
+
+    scheduler = sim.scheduler
+    metrics = list(scheduler.metrics.values())
+    w.array('i', [strings(m.name) for m in metrics])
+    w.array('i', [v for m in metrics for v in (m.connections, m.preempted, m.wait_samples)])
+    w.array('d', [v for m in metrics for v in (m.total_wait_ms, m.max_wait_ms)])
+    waiting = [(sat, since) for sat, since in scheduler._waiting_since.items() if sat in sat_index]
+    w.array('i', [sat_index[sat] for sat, _ in waiting])
+    w.array('d', [since for _, since in waiting])
+
+    stats = ctx.stats
+    w.array('d', [stats.now_ms, stats.total_delivered, stats.jamming_lost, stats.repair_lost,
+                  stats.outage_total_sec, stats.outage_max_sec])
+    w.array('i', [stats.jamming_events, stats.station_damage_events, stats.satellites_damaged,
+                  stats.satellites_destroyed, stats.outage_count, *stats.outage_histogram])
+    w.array('i', list(stats.station_downtime_ms))
+    w.array('d', list(stats.station_downtime_ms.values()))
+    w.array('i', list(stats.station_down_since))
+    w.array('d', list(stats.station_down_since.values()))
+    w.array('i', [strings(name) for name in stats.satellite_drained])
+    w.array('d', list(stats.satellite_drained.values()))
+    w.array('d', [stats.generated, stats.overflow_lost, stats.routed, stats.debris_hits])
+    #the whole fleet, so keyed damage draws find every satellite on its slot again
+    fleet = ctx.fleet
+    for column in (fleet.data, fleet.capacity, fleet.rate, fleet.overflow):
+        w.array('d', column)
+    w.array('Q', [jammers.masks[s.slot] if s.slot < len(jammers.masks) else 0 for s in all_sats])
+    _encode_features(w, sim, strings)
+
+    w.strings(strings.values)
+    w.array('B', [c for color in colors.values for c in color])
+    return w.getvalue()
+
+
+def _encode_features(w, sim, strings):
+    """ Keyed damage draws, ISL router, weather, debris and contact cache; an empty header array for each one that is off. """
+    draws = sim.ctx.draws
+    keyed = isinstance(draws, DamageDraws)
+    proposal = draws.proposal if keyed and draws.proposal is not None else None
+    w.array('d', [draws.antithetic, proposal is not None, *(proposal or (0.0, 0.0)), draws.log_weight] if keyed else [])
+    w.array('q', [draws.seed, draws.tick] if keyed else [])
+
+    router = sim.router
+    w.array('d', [router.range_pixels, router.neighbours, router.rate_gbps, router.relay_rate_gbps,
+                  router._links is not None] if router else [])
+    w.array('q', [router.version, router.rebuilds, router.links_added, router.links_removed] if router else [])
+    w.array('q', router._links.tolist() if router and router._links is not None else [])
+
+    weather = sim.weather
+    grids = []
+    if weather:
+        frames = weather.frames
+        w.array('d', [weather.left, weather.top, weather.size, weather.cell_w, weather.cell_h, *weather.wind,
+                      weather.change_sec, weather.frame_sec, weather.elapsed_sec, weather._since_change,
+                      *weather.offset, weather.rows, weather.cols, 0 if frames is None else len(frames)])
+        w.array('Q', _generator_state(weather.rng))
+        grids = [weather.cover] + ([weather._target] if frames is None else list(frames))
+    else:
+        w.array('d', [])
+        w.array('Q', [])
+    w.array('d', [v for grid in grids for v in grid.ravel().tolist()])
+
+    debris = sim.debris
+    if debris is not None:
+        w.array('d', [debris.shell_width_km, debris.speed_spread, debris.hit_km, debris.fragments,
+                      debris.hits, debris.spawned])
+        w.array('Q', _generator_state(debris.rng))
+    else:
+        w.array('d', [])
+        w.array('Q', [])
+    w.array('I', [len(angle) for angle in debris.angle] if debris is not None else [])
+    for column in ('angle', 'offset', 'speed'):
+        w.array('d', [v for values in getattr(debris, column) for v in values.tolist()] if debris is not None else [])
+
+    cache = sim.contact_cache
+    w.array('d', [cache.max_bytes] if cache else [])
+    w.array('i', [-1 if cache.directory is None else strings(cache.directory)] if cache else [])
+
+
+def _restore_features(t, sim, strings, seed):
+    draws = t['draws']
+    if len(draws):
+        antithetic, has_proposal, q_sat, q_st, log_weight = draws
+        draws_seed, tick = t['draws_key']
+        keyed = DamageDraws(draws_seed if seed is None else seed, bool(antithetic),
+                            (q_sat, q_st) if has_proposal else None)
+        keyed.tick = tick
+        keyed.log_weight = log_weight
+        sim.ctx.draws = keyed
+
+    sim.router = None
+    if len(t['router']):
+        import numpy as np
+
+        range_pixels, neighbours, rate, relay, has_links = t['router']
+        router = sim.router = LinkRouter(range_pixels, int(neighbours), rate, relay)
+        router.version, router.rebuilds, router.links_added, router.links_removed = t['router_counts']
+        if has_links:
+            router._links = np.array(t['router_links'], dtype=np.int64)
+            for key in t['router_links']:
+                a, b = key >> 32, key & 0xFFFFFFFF
+                router.adjacency.setdefault(a, set()).add(b)
+                router.adjacency.setdefault(b, set()).add(a)
+
+    sim.weather = None
+    if len(t['weather']):
+        (left, top, size, cell_w, cell_h, wind_x, wind_y, change_sec, frame_sec, elapsed_sec, since_change,
+         offset_row, offset_col, rows, cols, frame_count) = t['weather']
+        rows, cols, frame_count = int(rows), int(cols), int(frame_count)
+        grids = _floats(t['weather_grids']).reshape(-1, rows, cols)
+        weather = sim.weather = WeatherField.__new__(WeatherField)
+        weather.rng = _generator(t['weather_rng'])
+        weather.left, weather.top, weather.size = left, top, size
+        weather.rows, weather.cols, weather.cell_w, weather.cell_h = rows, cols, cell_w, cell_h
+        weather.wind = (wind_x, wind_y)
+        weather.change_sec, weather.frame_sec = change_sec, frame_sec
+        weather.elapsed_sec, weather._since_change = elapsed_sec, since_change
+        weather.offset = (offset_row, offset_col)
+        weather.cover = grids[0]
+        weather.frames = grids[1:] if frame_count else None
+        if not frame_count:
+            weather._target = grids[1]
+        weather._cells = {}
+
+    sim.debris = None
+    if len(t['debris']):
+        shell_width_km, speed_spread, hit_km, fragments, hits, spawned = t['debris']
+        debris = sim.debris = DebrisField.__new__(DebrisField)
+        debris.rng = _generator(t['debris_rng'])
+        debris.shell_width_km, debris.speed_spread, debris.hit_km = shell_width_km, speed_spread, hit_km
+        debris.fragments, debris.hits, debris.spawned = int(fragments), int(hits), int(spawned)
+        debris.shells = [orbit_shell(altitude) for altitude in KUIPER_ALTITUDES_KM]
+        debris._shell_index = {shell.altitude_km: k for k, shell in enumerate(debris.shells)}
+        ends = list(itertools.accumulate(t['debris_counts'], initial=0))
+        for column in ('angle', 'offset', 'speed'):
+            values = _floats(t['debris_' + column])
+            setattr(debris, column, [values[a:b] for a, b in zip(ends, ends[1:])])
+
+    sim.contact_cache = None
+    if len(t['contact_cache']):
+        directory = t['contact_dir'][0]
+        sim.contact_cache = ContactCache(None if directory < 0 else strings[directory], int(t['contact_cache'][0]))
+
+
+def _decode(body, swap):
+    r = _Reader(body, swap)
+    t = {}
+    (t['elapsed_ms'], t['total_duration_ms'], t['captured_ticks'],
+     t['station_id_counter'], t['satellite_counter'],
+     t['station_damage_probability'], t['station_repair_time_ms'],
+     t['satellite_damage_probability'], t['satellite_repair_time_seconds'],
+     t['simulation_speed']) = r.unpack("<ddd ii ddddd")
+    rng_version, has_gauss, gauss_next = r.unpack("<iBd")
+    t['rng'] = (rng_version, tuple(r.array('I')), gauss_next if has_gauss else None)
+
+    t['live_count'], = r.unpack("<I")
+    for key, code in [('sat_name', 'i'), ('sat_class', 'i'), ('sat_initial_color', 'i'), ('sat_color', 'i'),
+                      ('sat_altitude', 'd'), ('sat_angle', 'd'), ('sat_x', 'd'), ('sat_y', 'd'),
+                      ('sat_status', 'b'), ('sat_flags', 'b'), ('sat_blink_start', 'd'), ('sat_burst_start', 'd'),
+                      ('sat_destroyed_time', 'd'), ('sat_slot', 'i'), ('sat_delivered', 'd'),
+                      ('sat_connected', 'i'), ('sat_visited', 'i'),
+                      ('st_id', 'i'), ('st_x', 'd'), ('st_y', 'd'), ('st_radius', 'd'), ('st_capacity', 'i'),
+                      ('st_received', 'd'), ('st_max_data', 'd'), ('st_stored', 'd'), ('st_status', 'b'),
+                      ('st_damage_start', 'd'), ('st_links', 'i'),
+                      ('dmg_station', 'i'), ('dmg_start', 'd'), ('dmg_end', 'd'), ('dmg_lost', 'd')]:
+        t[key] = r.array(code)
+    for key, code in [('jammers', 'd'), ('jammer_lost', 'd'), ('jammer_events', 'q'),
+                      ('loss_sat', 'i'), ('loss_station', 'i'), ('loss_start', 'd'), ('loss_pos', 'd'),
+                      ('log_sat', 'i'), ('log_station', 'i'), ('log_start', 'd'), ('log_duration', 'd'),
+                      ('metric_class', 'i'), ('metric_counts', 'i'), ('metric_waits', 'd'),
+                      ('waiting_sat', 'i'), ('waiting_since', 'd'),
+                      ('stats_totals', 'd'), ('stats_counts', 'i'), ('stats_down_id', 'i'), ('stats_down_ms', 'd'),
+                      ('stats_since_id', 'i'), ('stats_since_ms', 'd'), ('stats_drain_name', 'i'), ('stats_drain', 'd'),
+                      ('stats_generation', 'd'), ('fleet_data', 'd'), ('fleet_capacity', 'd'),
+                      ('fleet_rate', 'd'), ('fleet_overflow', 'd'), ('sat_jam_mask', 'Q'),
+                      ('draws', 'd'), ('draws_key', 'q'), ('router', 'd'), ('router_counts', 'q'), ('router_links', 'q'),
+                      ('weather', 'd'), ('weather_rng', 'Q'), ('weather_grids', 'd'),
+                      ('debris', 'd'), ('debris_rng', 'Q'), ('debris_counts', 'I'),
+                      ('debris_angle', 'd'), ('debris_offset', 'd'), ('debris_speed', 'd'),
+                      ('contact_cache', 'd'), ('contact_dir', 'i')]:
+        t[key] = r.array(code)
+    t['strings'] = r.strings()
+    rgb = r.array('B')
+    t['colors'] = [tuple(rgb[i:i + 3]) for i in range(0, len(rgb), 3)]
+    return t
+
+
+class Snapshot:
+    """ Versioned, immutable capture of a Simulation that can be restored into any number of forks. """
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        magic, version, flags = _HEADER.unpack_from(self.data)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("Not a simulation snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+        self.version = version
+        self.flags = flags
+        self._tables = None
+
+    @classmethod
+    def capture(cls, sim, current_ticks=0, compress=True, logs=True):
+        body = _encode(sim, current_ticks, logs)
+        flags = FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0
+        if compress:
+            body = zlib.compress(body, 1)
+            flags |= FLAG_ZLIB
+        return cls(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags) + body)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, "rb") as f:
+            return cls(f.read())
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.data)
+
+    @property
+    def elapsed_ms(self):
+        return self.tables()['elapsed_ms']
+
+    def tables(self):
+        if self._tables is None:
+            body = self.data[_HEADER.size:]
+            if self.flags & FLAG_ZLIB:
+                body = zlib.decompress(body)
+            swap = bool(self.flags & FLAG_BIG_ENDIAN) != (sys.byteorder == 'big')
+            self._tables = _decode(body, swap)
+        return self._tables
+
+    def restore(self, current_ticks=None, sim=None, **overrides):
+        """ Rebuilds a Simulation from the snapshot.
+
+        current_ticks shifts the stored tick timestamps (blink, burst, repair) onto the
+        caller's clock. Overrides replace the stored run parameters: station_damage_probability,
+        station_repair_time_ms, satellite_damage_probability, satellite_repair_time_seconds,
+        simulation_speed, and seed (reseeds the RNG and keyed damage draws instead of restoring them).
+        """
+        t = self.tables()
+        strings = t['strings']
+        colors = t['colors']
+        shift = 0.0 if current_ticks is None else current_ticks - t['captured_ticks']
+
+        if sim is None:
+            sim = Simulation()
+        sim.reset()
+        ctx = sim.ctx
+
+        stations = []
+        for i, station_id in enumerate(t['st_id']):
+            st = Station(t['st_x'][i], t['st_y'][i], ctx)
+            st.id = station_id
+            st.comm_radius = t['st_radius'][i]
+            st.capacity = t['st_capacity'][i]
+            st.received_data = t['st_received'][i]
+            st.max_data_capacity = t['st_max_data'][i]
+            st.stored_data = t['st_stored'][i]
+            st.status = STATION_STATUSES[t['st_status'][i]]
+            st.damage_start_time = t['st_damage_start'][i] + shift
+            stations.append(st)
+        for i, station_idx in enumerate(t['dmg_station']):
+            entry = [t['dmg_start'][i], _unopt(t['dmg_end'][i])]
+            lost = _unopt(t['dmg_lost'][i])
+            if lost is not None:
+                entry.append(lost)
+            stations[station_idx].damage_log.append(entry)
+
+        geometry = t['jammers']
+        ctx.jammers = JammerField([geometry[i:i + 4] for i in range(0, len(geometry), 4)])
+        ctx.jammers.lost[:] = t['jammer_lost']
+        ctx.jammers.events[:] = t['jammer_events']
+
+        fleet = ctx.fleet
+        fleet.data[:] = t['fleet_data']
+        fleet.capacity[:] = t['fleet_capacity']
+        fleet.rate[:] = t['fleet_rate']
+        fleet.overflow[:] = t['fleet_overflow']
+        ctx.jammers.reserve(len(fleet.data))
+        sats = []
+        for i in range(len(t['sat_name'])):
+            sat = Satellite.__new__(Satellite)
+            sat._setup(orbit_shell(t['sat_altitude'][i]), strings[t['sat_name'][i]], colors[t['sat_initial_color'][i]],
+                       t['sat_angle'][i], t['sat_x'][i], t['sat_y'][i], strings[t['sat_class'][i]], ctx)
+            sat.slot = t['sat_slot'][i]
+            sat.color = colors[t['sat_color'][i]]
+            sat.status = SATELLITE_STATUSES[t['sat_status'][i]]
+            flags = t['sat_flags'][i]
+            sat.is_blinking = bool(flags & 1)
+            sat.blink_on = bool(flags & 2)
+            sat.transferring = bool(flags & 4)
+            sat.is_in_burst = bool(flags & 8)
+            sat.blink_start_time = t['sat_blink_start'][i] + shift
+            burst_start = _unopt(t['sat_burst_start'][i])
+            sat.burst_start_time = None if burst_start is None else burst_start + shift
+            sat.destroyed_time = _unopt(t['sat_destroyed_time'][i])
+            sat.delivered_data = t['sat_delivered'][i]
+            ctx.jammers.masks[sat.slot] = t['sat_jam_mask'][i]
+            sats.append(sat)
+        visited = t['sat_visited']
+        for i in range(0, len(visited), 2):
+            sats[visited[i]].connected_stations_set.add(stations[visited[i + 1]])
+        links = t['st_links']
+        for i in range(0, len(links), 2):
+            sim.scheduler.link(stations[links[i]], sats[links[i + 1]])
+
+        live_count = t['live_count']
+        sim.satellites.extend(sats[:live_count])
+        sim.stations.extend(stations)
+        sim.elapsed_simulation_time_ms = t['elapsed_ms']
+        sim.total_duration_ms = t['total_duration_ms']
+
+        ctx.destroyed_satellites_log[:] = sats[live_count:]
+
+        pos = t['loss_pos']
+        for i, (sat_idx, st_idx) in enumerate(zip(t['loss_sat'], t['loss_station'])):
+            sim.active_losses[(sats[sat_idx], stations[st_idx])] = {
+                'start_time': t['loss_start'][i],
+                'sat_pos': (pos[4 * i], pos[4 * i + 1]),
+                'st_pos': (pos[4 * i + 2], pos[4 * i + 3]),
+            }
+        for name, station_id, start, duration in zip(t['log_sat'], t['log_station'], t['log_start'], t['log_duration']):
+            sim.connection_loss_log.append({'sat': strings[name], 'station': station_id if station_id >= 0 else 'None',
+                                            'start_time': start, 'duration': duration})
+
+        scheduler = sim.scheduler
+        counts, waits = t['metric_counts'], t['metric_waits']
+        for i, name in enumerate(t['metric_class']):
+            metrics = scheduler.class_metrics(strings[name])
+            metrics.connections, metrics.preempted, metrics.wait_samples = counts[3 * i:3 * i + 3]
+            metrics.total_wait_ms, metrics.max_wait_ms = waits[2 * i:2 * i + 2]
+        for sat_idx, since in zip(t['waiting_sat'], t['waiting_since']):
+            scheduler._waiting_since[sats[sat_idx]] = since
+
+        stats = ctx.stats
+        (stats.now_ms, stats.total_delivered, stats.jamming_lost, stats.repair_lost,
+         stats.outage_total_sec, stats.outage_max_sec) = t['stats_totals']
+        counts = t['stats_counts']
+        (stats.jamming_events, stats.station_damage_events, stats.satellites_damaged,
+         stats.satellites_destroyed, stats.outage_count) = counts[:5]
+        stats.outage_histogram = list(counts[5:])
+        stats.station_downtime_ms = dict(zip(t['stats_down_id'], t['stats_down_ms']))
+        stats.station_down_since = dict(zip(t['stats_since_id'], t['stats_since_ms']))
+        stats.satellite_drained = {strings[n]: v for n, v in zip(t['stats_drain_name'], t['stats_drain'])}
+        stats.generated, stats.overflow_lost, stats.routed, debris_hits = t['stats_generation']
+        stats.debris_hits = int(debris_hits)
+        _restore_features(t, sim, strings, overrides.get('seed'))
+
+        ctx.station_id_counter = t['station_id_counter']
+        ctx.satellite_counter = t['satellite_counter']
+        ctx.station_damage_probability = overrides.get('station_damage_probability', t['station_damage_probability'])
+        ctx.station_repair_time_ms = overrides.get('station_repair_time_ms', t['station_repair_time_ms'])
+        ctx.satellite_damage_probability = overrides.get('satellite_damage_probability', t['satellite_damage_probability'])
+        ctx.satellite_repair_time_seconds = overrides.get('satellite_repair_time_seconds', t['satellite_repair_time_seconds'])
+        ctx.simulation_speed = overrides.get('simulation_speed', t['simulation_speed'])
+        if 'seed' in overrides:
+            ctx.rng.seed(overrides['seed'])
+        else:
+            ctx.rng.setstate(t['rng'])
+        return sim
+
+    def fork(self, **overrides):
+        """ New, independent Simulation branching from this snapshot with the given parameter overrides.
+
+        A fork is a full restore: it shares the decoded tables with other forks, but builds
+        its own entities rather than sharing them copy-on-write.
+        """
+        return self.restore(**overrides)
@@ -0,0 +1,120 @@
+import math
+from config import *
+
+SPRITE_ANGLE_STEPS = 64
+SATELLITE_BODY_RADIUS = 5
+SATELLITE_PANEL_LENGTH = 10
+SATELLITE_PANEL_WIDTH = 2
+TRANSFER_BLINK_MS = 250
+#data labels are cached per whole GB value, at most this many at a time
+LABEL_CACHE_LIMIT = 4096
+
+
+class SpriteAtlas:
+    """ Pre-rendered satellite sprites and label surfaces. """
+
+    def __init__(self):
+        import pygame
+
+        self.half = SATELLITE_BODY_RADIUS + SATELLITE_PANEL_LENGTH + 2
+        self._sprites = {}
+        self._names = {}
+        self._data = {}
+        self._data_font = pygame.font.SysFont(None, 16)
+        self._name_font = pygame.font.SysFont(None, 14)
+
+    def sprite(self, body_color, panel_color, angle):
+        step = round(angle * SPRITE_ANGLE_STEPS / (2 * math.pi)) % SPRITE_ANGLE_STEPS
+        key = (body_color, panel_color, step)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = self._sprites[key] = self._render(body_color, panel_color, step * 2 * math.pi / SPRITE_ANGLE_STEPS)
+        return sprite
+
+    def _render(self, body_color, panel_color, angle):
+        import pygame
+
+        size = self.half * 2
+        sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+        center = (self.half, self.half)
+        pygame.draw.circle(sprite, body_color, center, SATELLITE_BODY_RADIUS)
+        reach = SATELLITE_BODY_RADIUS + SATELLITE_PANEL_LENGTH
+        for side in (math.pi / 4, -math.pi / 4):
+            end = (int(self.half + math.cos(angle + side) * reach), int(self.half + math.sin(angle + side) * reach))
+            pygame.draw.line(sprite, panel_color, center, end, SATELLITE_PANEL_WIDTH)
+        return sprite
+
+    def name_label(self, name):
+        label = self._names.get(name)
+        if label is None:
+            label = self._names[name] = self._name_font.render(name, True, WHITE)
+        return label
+
+    def data_label(self, amount):
+        gb = int(amount)
+        label = self._data.get(gb)
+        if label is None:
+            if len(self._data) >= LABEL_CACHE_LIMIT:
+                self._data.clear()
+            label = self._data[gb] = self._data_font.render(f"{gb}GB", True, WHITE)
+        return label
+
+
+_atlas = None
+
+
+def get_atlas():
+    """ The shared atlas; needs pygame fonts to be initialised. """
+    global _atlas
+    if _atlas is None:
+        _atlas = SpriteAtlas()
+    return _atlas
+
+
+def draw_satellites(surface, satellites, view=None, labels=True):
+    """ Draws satellites with their links and labels in a few batched calls.
+
+    Sprites and labels each go through one Surface.blits; the links of a station in one
+    colour are one pygame.draw.lines polyline that returns to the station after every
+    satellite, so it only traces the links themselves.
+    """
+    import pygame
+
+    atlas = get_atlas()
+    half = atlas.half
+    blink = pygame.time.get_ticks() // TRANSFER_BLINK_MS % 2 == 0
+    sprites, texts, links = [], [], {}
+    for sat in satellites:
+        if sat.status == 'destroyed':
+            continue
+        x, y = view.to_screen(sat.x, sat.y) if view else (int(sat.x), int(sat.y))
+
+        body_color = sat.initial_color
+        panel_color = OPERATIONAL_PANEL_COLOR
+        if sat.status == 'damaging':
+            body_color = BLINK_RED if sat.blink_on else DAMAGED_SATELLITE_COLOR
+            panel_color = BLINK_RED if sat.blink_on else DAMAGED_PANEL_COLOR
+        elif sat.transferring and blink:
+            body_color = sat.color
+        sprites.append((atlas.sprite(body_color, panel_color, sat.angle), (x - half, y - half)))
+
+        station = sat.connected_to
+        if station:
+            key = (station, YELLOW if sat.is_in_burst else COMM_LINE_COLOR)
+            points = links.get(key)
+            if points is None:
+                points = links[key] = [view.to_screen(station.x, station.y) if view else (int(station.x), int(station.y))]
+            points.append((x, y))
+            points.append(points[0])
+
+        if labels:
+            data_label = atlas.data_label(sat.data_amount)
+            texts.append((data_label, (x + SATELLITE_BODY_RADIUS + 2, y - data_label.get_height() // 2)))
+            name_label = atlas.name_label(sat.name)
+            texts.append((name_label, name_label.get_rect(center=(x, y - SATELLITE_BODY_RADIUS - 8))))
+
+    surface.blits(sprites, doreturn=False)
+    for (_, color), points in links.items():
+        pygame.draw.lines(surface, color, False, points, 1)
+    if texts:
+        surface.blits(texts, doreturn=False)
@@ -1,43 +1,35 @@
 from satellite import Satellite
 from station import Station
 from config import *
+from context import default_context
+from simlog import get_logger, event as log_event
 import math
-import random
 import time
-from inputbox import InputBox
-from button import Button
-import pygame
+
+log = get_logger("setup")
 
 POPUP_WIDTH, POPUP_HEIGHT = 500, 600
 popup_screen = None
-popup_clock = pygame.time.Clock()
-popup_font = pygame.font.Font(None, 26)
-satellite_counter = 0
-def start_simulation(satellites_list, stations_list, disable_manual_controls_callback, params):
-    global satellite_counter
+
+def start_simulation(satellites_list, stations_list, disable_manual_controls_callback, params, ctx=None):
+    if ctx is None:
+        ctx = default_context
+    rng = ctx.rng
 
     duration_minutes = int(params["duration"])
     duration_seconds = int(params["duration_seconds"])
     num_satellites = int(params["num_satellites"])
     num_stations = int(params["num_stations"])
-    station_damage_prob = float(params.get("station_damage_prob", Station.station_damage_probability))
-    station_recovery_sec = float(params.get("station_recovery_time_sec", Station.station_repair_time_ms / 1000.0))
-    satellite_damage_prob = float(params.get("satellite_damage_prob", Satellite.satellite_damage_probability))
-    satellite_recovery_sec = float(params.get("satellite_recovery_time_sec", Satellite.satellite_repair_time_seconds))
-
-    Station.station_damage_probability = station_damage_prob
-    Station.station_repair_time_ms = station_recovery_sec * 1000
-    Satellite.satellite_damage_probability = satellite_damage_prob
-    Satellite.satellite_repair_time_seconds = satellite_recovery_sec
+    ctx.apply_params(params)
 
     #stations creatinon
     stations_list.clear()
-    Station._id_counter = 0
+    ctx.station_id_counter = 0
     for i in range(num_stations):
         max_attempts = 50
         placed = False
         for _ in range(max_attempts):
-            angle = random.uniform(0, 2 * math.pi)
+            angle = rng.uniform(0, 2 * math.pi)
             station_x = EARTH_POSITION[0] + EARTH_RADIUS_PIXELS * math.cos(angle)
             station_y = EARTH_POSITION[1] + EARTH_RADIUS_PIXELS * math.sin(angle)
             can_place = True
@@ -46,49 +38,60 @@ def start_simulation(satellites_list, stations_list, disable_manual_controls_cal
                     can_place = False
                     break
             if can_place:
-                stations_list.append(Station(station_x, station_y))
+                stations_list.append(Station(station_x, station_y, ctx))
                 placed = True
                 break
         if not placed:
-            print(f"Warning: Could not place station {i+1} without overlap after {max_attempts} attempts.")
+            log.warning("Could not place station %d without overlap after %d attempts.", i + 1, max_attempts)
 
 
     satellites_list.clear()
     altitudes_km = KUIPER_ALTITUDES_KM
 
+    #satellites interleave the shells; each shell is built in one batch
+    names, colors = [], []
     for i in range(num_satellites):
-        altitude = altitudes_km[i % len(altitudes_km)]
-        initial_angle = (2 * math.pi / num_satellites) * i if num_satellites > 0 else 0
-
-        sat_type = random.choice(['A', 'B'])
-        color = SATELLITE_BLUE if sat_type == 'A' else SATELLITE_GREEN
+        sat_type = rng.choice(['A', 'B'])
+        colors.append(SATELLITE_BLUE if sat_type == 'A' else SATELLITE_GREEN)
         prefix = "COM" if sat_type == 'A' else "MIL"
+        names.append(f"{prefix}-{ctx.satellite_counter}")
+        ctx.satellite_counter += 1
 
-        name = f"{prefix}-{satellite_counter}"
-
-        satellites_list.append(Satellite(altitude_km=altitude, name=name, color=color, initial_angle=initial_angle))
-
-        satellite_counter += 1
+    satellites_list.extend([None] * num_satellites)
+    for k, altitude in enumerate(altitudes_km):
+        indices = range(k, num_satellites, len(altitudes_km))
+        shell = Satellite.create_shell(altitude, [names[i] for i in indices], [colors[i] for i in indices],
+                                       [(2 * math.pi / num_satellites) * i for i in indices], ctx=ctx)
+        satellites_list[k::len(altitudes_km)] = shell
 
     disable_manual_controls_callback()
     start_time = time.time()
     simulation_end_time = start_time + (duration_minutes * 60) + duration_seconds
-    print(f"--- Simulation Setup ---")
-    print(f"Duration: {duration_minutes}m {duration_seconds}s")
-    print(f"Satellites: {len(satellites_list)} (Altitudes: {KUIPER_ALTITUDES_KM} km)")
-    print(f"Stations: {len(stations_list)}")
-    print(f"Station Damage Prob: {Station.station_damage_probability:.4f}, Repair Time: {Station.station_repair_time_ms / 1000.0:.1f}s")
-    print(f"Satellite Damage Prob: {Satellite.satellite_damage_probability:.4f}, Repair Time: {Satellite.satellite_repair_time_seconds:.1f}s")
-    print(f"------------------------")
+    setup = log_event("INIT", 0.0)
+    log.info("--- Simulation Setup ---", extra=setup)
+    log.info("Duration: %dm %ds", duration_minutes, duration_seconds, extra=setup)
+    log.info("Satellites: %d (Altitudes: %s km)", len(satellites_list), KUIPER_ALTITUDES_KM, extra=setup)
+    log.info("Stations: %d", len(stations_list), extra=setup)
+    log.info("Station Damage Prob: %.4f, Repair Time: %.1fs", ctx.station_damage_probability, ctx.station_repair_time_ms / 1000.0, extra=setup)
+    log.info("Satellite Damage Prob: %.4f, Repair Time: %.1fs", ctx.satellite_damage_probability, ctx.satellite_repair_time_seconds, extra=setup)
+    log.info("------------------------", extra=setup)
 
     return simulation_end_time
 
-def show_simulation_popup():
+def show_simulation_popup(defaults=None):
     global popup_screen
+    import pygame
+    from inputbox import InputBox
+    from button import Button
+
+    popup_clock = pygame.time.Clock()
+    popup_font = pygame.font.Font(None, 26)
+    if defaults is None:
+        defaults = default_context
 
     main_screen = pygame.display.get_surface()
     if not main_screen:
-         print("Error: Main display surface not found.")
+         log.error("Main display surface not found.")
          return None
 
     overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -102,10 +105,10 @@ def show_simulation_popup():
         InputBox(popup_rect.x + 250, popup_rect.y + 50, 140, 32, "Duration (sec):", "0"),
         InputBox(popup_rect.x + 50, popup_rect.y + 120, 140, 32, "Num Satellites:", "27"),
         InputBox(popup_rect.x + 250, popup_rect.y + 120, 140, 32, "Num Stations:", "12"),
-        InputBox(popup_rect.x + 50, popup_rect.y + 220, 200, 32, "Station Recover Time (s):", f"{Station.station_repair_time_ms / 1000.0:.1f}", is_float=True),
-        InputBox(popup_rect.x + 50, popup_rect.y + 280, 200, 32, "Station Damage Prob (%):", f"{Station.station_damage_probability * 100:.2f}", is_float=True),
-        InputBox(popup_rect.x + 50, popup_rect.y + 340, 200, 32, "Satellite Recover Time (s):", f"{Satellite.satellite_repair_time_seconds:.1f}", is_float=True),
-        InputBox(popup_rect.x + 50, popup_rect.y + 400, 200, 32, "Satellite Damage Prob (%):", f"{Satellite.satellite_damage_probability * 100:.2f}", is_float=True),
+        InputBox(popup_rect.x + 50, popup_rect.y + 220, 200, 32, "Station Recover Time (s):", f"{defaults.station_repair_time_ms / 1000.0:.1f}", is_float=True),
+        InputBox(popup_rect.x + 50, popup_rect.y + 280, 200, 32, "Station Damage Prob (%):", f"{defaults.station_damage_probability * 100:.2f}", is_float=True),
+        InputBox(popup_rect.x + 50, popup_rect.y + 340, 200, 32, "Satellite Recover Time (s):", f"{defaults.satellite_repair_time_seconds:.1f}", is_float=True),
+        InputBox(popup_rect.x + 50, popup_rect.y + 400, 200, 32, "Satellite Damage Prob (%):", f"{defaults.satellite_damage_probability * 100:.2f}", is_float=True),
     ]
 
     confirmed = False
@@ -120,7 +123,7 @@ def show_simulation_popup():
              int(input_boxes[3].get_value())
              confirmed = True
         except ValueError:
-             print("Invalid input. Please enter numbers for duration, satellites, and stations.")
+             log.warning("Invalid input. Please enter numbers for duration, satellites, and stations.")
 
     def cancel():
         nonlocal cancelled
@@ -178,16 +181,16 @@ def show_simulation_popup():
 
     # convert probabilities and handle defaults
     sim_params_st_dmg_prob = simulation_params["station_damage_prob"]
-    simulation_params["station_damage_prob"] = sim_params_st_dmg_prob / 100.0 if sim_params_st_dmg_prob else Station.station_damage_probability
+    simulation_params["station_damage_prob"] = sim_params_st_dmg_prob / 100.0 if sim_params_st_dmg_prob else defaults.station_damage_probability
 
     sim_params_sat_dmg_prob = simulation_params["satellite_damage_prob"]
-    simulation_params["satellite_damage_prob"] = sim_params_sat_dmg_prob / 100.0 if sim_params_sat_dmg_prob else Satellite.satellite_damage_probability
+    simulation_params["satellite_damage_prob"] = sim_params_sat_dmg_prob / 100.0 if sim_params_sat_dmg_prob else defaults.satellite_damage_probability
 
     sim_params_st_rec_time = simulation_params["station_recovery_time_sec"]
-    simulation_params["station_recovery_time_sec"] = sim_params_st_rec_time if sim_params_st_rec_time > 0 else Station.station_repair_time_ms / 1000.0
+    simulation_params["station_recovery_time_sec"] = sim_params_st_rec_time if sim_params_st_rec_time > 0 else defaults.station_repair_time_ms / 1000.0
 
     sim_params_sat_rec_time = simulation_params["satellite_recovery_time_sec"]
-    simulation_params["satellite_recovery_time_sec"] = sim_params_sat_rec_time if sim_params_sat_rec_time > 0 else Satellite.satellite_repair_time_seconds
+    simulation_params["satellite_recovery_time_sec"] = sim_params_sat_rec_time if sim_params_sat_rec_time > 0 else defaults.satellite_repair_time_seconds
 
-    print("Simulation parameters:", simulation_params)
+    log.info("Simulation parameters: %s", simulation_params, extra=log_event("START", 0.0))
     return simulation_params
\ No newline at end of file
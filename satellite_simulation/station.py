@@ -1,20 +1,20 @@
-import pygame
 import math
 from config import *
+from context import default_context
+from simlog import get_logger, event
 import time
 
+log = get_logger("station")
+
 class Station:
-    _id_counter = 0
-    station_damage_probability = 0.001
-    station_repair_time_ms = 5000
-    def __init__(self, x, y):
-        self.id = Station._id_counter
-        Station._id_counter += 1
+    def __init__(self, x, y, ctx=None):
+        self.ctx = ctx if ctx is not None else default_context
+        self.id = self.ctx.next_station_id()
         self.x = x
         self.y = y
         self.comm_radius = 250
         self.size = 25
-        self.surface = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        self.surface = None
         self.capacity = STATION_MAX_CAPACITY
         self.connected_satellites = []
         self.received_data = 0.0
@@ -23,6 +23,8 @@ class Station:
         self.status = 'operational'
         self.damage_start_time = 0
         self.stored_data = 0.0  
+        #share of the link rate the weather over the station leaves, set each tick
+        self.weather_factor = 1.0
 
         dx = self.x - EARTH_POSITION[0]
         dy = self.y - EARTH_POSITION[1]
@@ -35,7 +37,10 @@ class Station:
         self.received_data = min(self.received_data + amount, self.max_data_capacity)
 
 
-    def draw(self, screen_surface, is_selected, capacity_font):
+    def draw(self, screen_surface, is_selected, capacity_font, view=None):
+        import pygame
+        if self.surface is None:
+            self.surface = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
         radius_color_tuple = COMM_RADIUS_SELECTED_COLOR if is_selected else COMM_RADIUS_COLOR
 
         if is_selected:
@@ -45,11 +50,16 @@ class Station:
 
         radius_color = pygame.Color(*radius_color_tuple)
 
-        if self.comm_radius > 0:
-            radius_surface_size = int(self.comm_radius * 2) + 4
-            radius_surface = pygame.Surface((radius_surface_size, radius_surface_size), pygame.SRCALPHA)
-            arc_center_x = radius_surface_size // 2
-            arc_center_y = radius_surface_size // 2
+        center_x, center_y = view.to_screen(self.x, self.y) if view else (int(self.x), int(self.y))
+        comm_radius = self.comm_radius * view.zoom if view else self.comm_radius
+        #the arc surface only covers the part of the range that is on screen
+        arc_rect = pygame.Rect(center_x - int(comm_radius) - 2, center_y - int(comm_radius) - 2,
+                               int(comm_radius * 2) + 4, int(comm_radius * 2) + 4).clip(screen_surface.get_rect())
+
+        if self.comm_radius > 0 and arc_rect.width and arc_rect.height:
+            radius_surface = pygame.Surface(arc_rect.size, pygame.SRCALPHA)
+            arc_center_x = center_x - arc_rect.x
+            arc_center_y = center_y - arc_rect.y
             center_point_on_surface = (arc_center_x, arc_center_y)
 
             total_arc_angle_rad = math.radians(STATION_COMM_ANGLE_DEG)
@@ -63,15 +73,15 @@ class Station:
 
             for i in range(num_segments + 1):
                 current_math_angle = angle_start_math + i * angle_step
-                px = arc_center_x + self.comm_radius * math.cos(current_math_angle)
-                py = arc_center_y + self.comm_radius * math.sin(current_math_angle)
+                px = arc_center_x + comm_radius * math.cos(current_math_angle)
+                py = arc_center_y + comm_radius * math.sin(current_math_angle)
                 polygon_points.append((int(px), int(py)))
 
             if len(polygon_points) >= 3:
                 try:
                     pygame.draw.polygon(radius_surface, radius_color, polygon_points)
                 except Exception as e:
-                    print(f"Warning: Could not draw polygon for station {self.id} - {e}")        
+                    log.warning("Could not draw polygon for station %s - %s", self.id, e)
             outline_color = (20, 70, 20)
 
             for i in range(1, len(polygon_points) - 1):
@@ -80,8 +90,7 @@ class Station:
                     end = polygon_points[i + 1]
                     pygame.draw.line(radius_surface, outline_color, start, end, 3)
 
-            arc_blit_pos = (int(self.x - arc_center_x), int(self.y - arc_center_y))
-            screen_surface.blit(radius_surface, arc_blit_pos)
+            screen_surface.blit(radius_surface, arc_rect.topleft)
 
         self.surface.fill((0, 0, 0, 0)) 
         body_width, body_height = 10, 10
@@ -102,7 +111,7 @@ class Station:
 
         alpha = STATION_ALPHA_SELECTED if is_selected else STATION_ALPHA_NORMAL
         self.surface.set_alpha(alpha)
-        blit_pos = (int(self.x - self.size // 2), int(self.y - self.size // 2))
+        blit_pos = (center_x - self.size // 2, center_y - self.size // 2)
         screen_surface.blit(self.surface, blit_pos)
 
         capacity_text = f"{len(self.connected_satellites)}/{self.capacity}"
@@ -119,16 +128,17 @@ class Station:
     
 
     def update(self, current_ticks):
-        if self.status == 'operational' and random.random() < Station.station_damage_probability:
+        if self.status == 'operational' and self.ctx.draws.station(self.id, self.ctx.station_damage_probability):
             self.status = 'damaged'
             self.damage_start_time = current_ticks
             self.damage_log.append([time.time(), None])  # Record start
 
             self.disconnect_all()
-            print(f"Station {self.id} damaged!")
+            self.ctx.stats.on_station_damaged(self)
+            log.warning("Station %s damaged!", self.id, extra=event("ERROR", self.ctx.stats.now_ms))
 
         elif self.status == 'damaged':
-            if current_ticks - self.damage_start_time > Station.station_repair_time_ms:
+            if current_ticks - self.damage_start_time > self.ctx.station_repair_time_ms:
                 self.status = 'operational'
 
                 lost_data = self.received_data / STATION_DATA_LOSS_ON_REPAIR
@@ -136,8 +146,9 @@ class Station:
 
                 self.damage_log[-1][1] = time.time()
                 self.damage_log[-1].append(lost_data)  
+                self.ctx.stats.on_station_repaired(self, lost_data)
 
-                print(f"Station {self.id} repaired, lost {lost_data:.1f} GB")
+                log.info("Station %s repaired, lost %.1f GB", self.id, lost_data, extra=event("MAINTENANCE", self.ctx.stats.now_ms))
 
     def is_near(self, other_station):
         return math.dist((self.x, self.y), (other_station.x, other_station.y)) < STATION_MIN_DISTANCE
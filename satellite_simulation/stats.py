@@ -0,0 +1,169 @@
+import bisect
+import heapq
+from array import array
+from config import LOAD_SAMPLE_INTERVAL_MS
+
+#upper bucket edges in seconds, the last bucket is open-ended
+OUTAGE_HISTOGRAM_EDGES_SEC = [0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+
+
+class RunStats:
+    """ Streaming aggregates of a run, updated as events happen. """
+
+    def __init__(self):
+        self.now_ms = 0.0
+        self.total_delivered = 0.0
+        self.generated = 0.0
+        self.overflow_lost = 0.0
+        self.routed = 0.0
+        self.jamming_lost = 0.0
+        self.jamming_events = 0
+        self.repair_lost = 0.0
+        self.station_damage_events = 0
+        self.satellites_damaged = 0
+        self.satellites_destroyed = 0
+        self.debris_hits = 0
+
+        self.outage_count = 0
+        self.outage_total_sec = 0.0
+        self.outage_max_sec = 0.0
+        self.outage_histogram = [0] * (len(OUTAGE_HISTOGRAM_EDGES_SEC) + 1)
+
+        #station id -> accumulated downtime ms, and the start of an ongoing outage
+        self.station_downtime_ms = {}
+        self.station_down_since = {}
+        #satellite name -> GB drained to stations
+        self.satellite_drained = {}
+
+    def on_transfer(self, satellite, station, amount):
+        self.total_delivered += amount
+        self.satellite_drained[satellite.name] = self.satellite_drained.get(satellite.name, 0.0) + amount
+
+    def on_routed(self, satellite, station, amount):
+        """ Data that reached a station over inter-satellite links. """
+        self.on_transfer(satellite, station, amount)
+        self.routed += amount
+
+    def on_generation(self, generated, overflow_lost):
+        self.generated += generated
+        self.overflow_lost += overflow_lost
+
+    def on_jamming(self, lost, events):
+        """ Data jammers took from ground links in a tick, and how many links entered a footprint. """
+        self.jamming_lost += lost
+        self.jamming_events += events
+
+    def on_satellite_damaged(self, satellite):
+        self.satellites_damaged += 1
+
+    def on_debris_hit(self, satellite):
+        self.debris_hits += 1
+
+    def on_satellite_destroyed(self, satellite):
+        self.satellites_destroyed += 1
+
+    def on_station_damaged(self, station):
+        self.station_damage_events += 1
+        self.station_down_since[station.id] = self.now_ms
+
+    def on_station_repaired(self, station, lost_data):
+        self.repair_lost += lost_data
+        since = self.station_down_since.pop(station.id, None)
+        if since is not None:
+            self.station_downtime_ms[station.id] = self.station_downtime_ms.get(station.id, 0.0) + self.now_ms - since
+
+    def on_outage(self, duration_sec):
+        self.outage_count += 1
+        self.outage_total_sec += duration_sec
+        self.outage_max_sec = max(self.outage_max_sec, duration_sec)
+        self.outage_histogram[bisect.bisect_left(OUTAGE_HISTOGRAM_EDGES_SEC, duration_sec)] += 1
+
+    def station_uptime(self, station_id, elapsed_ms=None):
+        elapsed_ms = self.now_ms if elapsed_ms is None else elapsed_ms
+        if elapsed_ms <= 0:
+            return 1.0
+        down = self.station_downtime_ms.get(station_id, 0.0)
+        since = self.station_down_since.get(station_id)
+        if since is not None:
+            down += elapsed_ms - since
+        return max(0.0, 1.0 - down / elapsed_ms)
+
+    def drain_rate(self, satellite_name, elapsed_ms=None):
+        elapsed_ms = self.now_ms if elapsed_ms is None else elapsed_ms
+        return self.satellite_drained.get(satellite_name, 0.0) / (elapsed_ms / 1000.0) if elapsed_ms > 0 else 0.0
+
+    def top_drain_rates(self, n, elapsed_ms=None):
+        top = heapq.nlargest(n, self.satellite_drained.items(), key=lambda item: item[1])
+        return [(name, self.drain_rate(name, elapsed_ms)) for name, _ in top]
+
+    def histogram_rows(self):
+        rows = []
+        lower = 0
+        for i, count in enumerate(self.outage_histogram):
+            upper = OUTAGE_HISTOGRAM_EDGES_SEC[i] if i < len(OUTAGE_HISTOGRAM_EDGES_SEC) else None
+            label = f"{lower:g}-{upper:g} s" if upper is not None else f">= {lower:g} s"
+            rows.append((label, count))
+            lower = upper
+        return rows
+
+    def summary(self):
+        elapsed_sec = self.now_ms / 1000.0
+        return {
+            'elapsed_sec': elapsed_sec,
+            'total_delivered_gb': self.total_delivered,
+            'delivery_rate_gbps': self.total_delivered / elapsed_sec if elapsed_sec > 0 else 0.0,
+            'generated_gb': self.generated,
+            'overflow_lost_gb': self.overflow_lost,
+            'routed_gb': self.routed,
+            'repair_lost_gb': self.repair_lost,
+            'jamming_lost_gb': self.jamming_lost,
+            'station_damage_events': self.station_damage_events,
+            'stations_down': len(self.station_down_since),
+            'satellites_damaged': self.satellites_damaged,
+            'satellites_destroyed': self.satellites_destroyed,
+            'debris_hits': self.debris_hits,
+            'outages': self.outage_count,
+            'outage_mean_sec': self.outage_total_sec / self.outage_count if self.outage_count else 0.0,
+            'outage_max_sec': self.outage_max_sec,
+        }
+
+
+class LoadSeries:
+    """ Connected-satellite count of every station, sampled at a fixed sim-time interval. """
+
+    def __init__(self, interval_ms=LOAD_SAMPLE_INTERVAL_MS):
+        self.interval_ms = interval_ms
+        self.next_sample_ms = 0.0
+        self.times = array('d')
+        self.values = array('d')
+        self.offsets = array('q', [0])
+
+    def sample(self, now_ms, stations):
+        if now_ms < self.next_sample_ms or not stations:
+            return
+        self.next_sample_ms = now_ms + self.interval_ms
+        self.times.append(now_ms)
+        self.values.extend([len(station.connected_satellites) for station in stations])
+        self.offsets.append(len(self.values))
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        for i, t in enumerate(self.times):
+            yield t, self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def to_arrays(self):
+        """ (times, loads) as NumPy arrays; rows are NaN-padded when stations were added mid-run. """
+        import numpy as np
+
+        times = np.frombuffer(self.times, dtype=np.float64) if self.times else np.empty(0)
+        values = np.frombuffer(self.values, dtype=np.float64) if self.values else np.empty(0)
+        widths = np.diff(np.frombuffer(self.offsets, dtype=np.int64))
+        if len(widths) and (widths == widths[0]).all():
+            return times, values.reshape(len(times), int(widths[0]))
+        loads = np.full((len(times), int(widths.max()) if len(widths) else 0), np.nan)
+        rows = np.repeat(np.arange(len(times)), widths)
+        cols = np.arange(len(values)) - np.repeat(np.frombuffer(self.offsets, dtype=np.int64)[:-1], widths)
+        loads[rows, cols] = values
+        return times, loads
@@ -0,0 +1,47 @@
+from array import array
+from config import SATELLITE_DATA_RATE_GBPS, SATELLITE_STORAGE_GB, DEFAULT_SATELLITE_CLASS
+
+
+class FleetStorage:
+    """ Onboard data of every satellite of a run, one slot per satellite in flat arrays. """
+
+    def __init__(self):
+        self.data = array('d')
+        self.capacity = array('d')
+        self.rate = array('d')
+        self.overflow = array('d')
+
+    def add(self, priority_class, initial_gb):
+        default_class = DEFAULT_SATELLITE_CLASS
+        capacity = SATELLITE_STORAGE_GB.get(priority_class, SATELLITE_STORAGE_GB[default_class])
+        slot = len(self.data)
+        self.data.append(min(initial_gb, capacity))
+        self.capacity.append(capacity)
+        self.rate.append(SATELLITE_DATA_RATE_GBPS.get(priority_class, SATELLITE_DATA_RATE_GBPS[default_class]))
+        self.overflow.append(0.0)
+        return slot
+
+    def extend(self, priority_classes, initial_gb):
+        """ Adds a slot per satellite of a batch; returns the first slot, the rest follow in order. """
+        first = len(self.data)
+        for priority_class, initial in zip(priority_classes, initial_gb):
+            self.add(priority_class, initial)
+        return first
+
+    def stop(self, slot):
+        """ A destroyed satellite generates nothing more. """
+        self.rate[slot] = 0.0
+
+    def generate(self, delta_time_ms):
+        """ Adds one tick of generated data to every slot; returns (generated GB, GB lost to full storage). """
+        if not self.data:
+            return 0.0, 0.0
+        import numpy as np
+
+        data = np.frombuffer(self.data)
+        generated = np.frombuffer(self.rate) * (delta_time_ms / 1000.0)
+        data += generated
+        lost = np.maximum(data - np.frombuffer(self.capacity), 0.0)
+        data -= lost
+        np.frombuffer(self.overflow)[:] += lost
+        return float(generated.sum()), float(lost.sum())
@@ -0,0 +1,158 @@
+""" Variance reduction for Monte Carlo comparisons of damage parameters.
+
+Satellite and station damage are rare, so naive replicas need many runs before a
+confidence interval on their effect gets narrow. Three techniques cut that down and
+combine freely:
+
+- common random numbers: the damage draw of a satellite or station on a tick is a fixed
+  function of (seed, tick, slot), so configurations run on the same seeds see the same
+  uniforms for as long as their entities live, and differences between them lose the
+  noise the configurations share;
+- antithetic pairs: every seed also runs on 1 - u for each uniform, and the mean of the
+  pair is one observation;
+- importance sampling: damage is drawn with probabilities raised by a tilt, and each run
+  carries the likelihood ratio of its draws under its real probabilities, by which its
+  outcome is reweighted; the ratio doubles as a control variate.
+
+    python variance.py [seeds] [metric]    compares naive and variance-reduced interval widths
+"""
+import math
+from statistics import NormalDist
+from engine import HEADLESS_TICK_MS, run_simulations
+
+DEFAULT_METRIC = "total_delivered_gb"
+CONFIDENCE = 0.95
+#seeds of independent configurations are shifted apart by this much
+INDEPENDENT_SEED_STRIDE = 1000003
+
+
+def _damage(params):
+    return float(params.get("satellite_damage_prob", 0.0)), float(params.get("station_damage_prob", 0.0))
+
+
+def tilt_for(params, target_events=1.0, tick_ms=HEADLESS_TICK_MS):
+    """ The tilt that brings the expected damage events of a run to about target_events.
+
+    Likelihood ratios of long runs degenerate when every tick is tilted hard, so the tilt
+    aims at a handful of events per run rather than at a fixed factor; it is never below 1.
+    """
+    ticks = (int(params["duration"]) * 60 + int(params["duration_seconds"])) * 1000.0 / tick_ms
+    satellite, station = _damage(params)
+    expected = ticks * (satellite * int(params["num_satellites"]) + station * int(params["num_stations"]))
+    return max(1.0, target_events / expected) if expected > 0 else 1.0
+
+
+def proposal_for(param_sets, tilt):
+    """ One importance proposal for all param_sets: their highest damage probabilities times tilt.
+
+    Sharing it keeps the runs of every set on the same sample path under common random
+    numbers, so they differ only in their likelihood ratios.
+    """
+    return tuple(tilt * max(pair[kind] for pair in map(_damage, param_sets)) for kind in (0, 1))
+
+
+def interval(values, confidence=CONFIDENCE):
+    """ Mean and confidence half-width of independent observations, by the normal approximation. """
+    n = len(values)
+    mean = math.fsum(values) / n
+    if n < 2:
+        return mean, math.inf
+    variance = math.fsum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(variance / n)
+
+
+def controlled(values, controls, expected):
+    """ values - beta * (controls - expected), beta the regression slope of the values on the controls.
+
+    Likelihood ratios have a known mean, 1 for a run and 0 for the difference of two, so
+    they make a control variate that takes out the noise the weights put on the part of
+    the metric that damage does not touch.
+    """
+    n = len(values)
+    mean_c = math.fsum(controls) / n
+    mean_v = math.fsum(values) / n
+    var_c = math.fsum((c - mean_c) ** 2 for c in controls)
+    if var_c <= 0:
+        return list(values)
+    beta = math.fsum((c - mean_c) * (v - mean_v) for c, v in zip(controls, values)) / var_c
+    return [v - beta * (c - expected) for v, c in zip(values, controls)]
+
+
+def observations(params, seeds, metric=DEFAULT_METRIC, antithetic=False, proposal=None, max_workers=None):
+    """ (weighted metric, likelihood ratio) per seed, the means over the pair with antithetic draws.
+
+    Antithetic draws or a proposal switch the runs to keyed DamageDraws; so does a true
+    'common_random_numbers' in params.
+    """
+    keyed = antithetic or proposal is not None or params.get("common_random_numbers", False)
+    param_sets = [dict(params, common_random_numbers=keyed, importance_proposal=proposal)] * len(seeds)
+    run_seeds = list(seeds)
+    if antithetic:
+        param_sets = param_sets + [dict(param_sets[0], antithetic=True)] * len(seeds)
+        run_seeds = run_seeds * 2
+    sims = run_simulations(param_sets, run_seeds, max_workers)
+    weights = [sim.ctx.draws.weight for sim in sims]
+    values = [sim.ctx.stats.summary()[metric] * w for sim, w in zip(sims, weights)]
+    if antithetic:
+        n = len(seeds)
+        values = [(a + b) / 2 for a, b in zip(values[:n], values[n:])]
+        weights = [(a + b) / 2 for a, b in zip(weights[:n], weights[n:])]
+    return values, weights
+
+
+def compare(param_sets, seeds, metric=DEFAULT_METRIC, common=True, antithetic=False, tilt=1.0,
+            confidence=CONFIDENCE, max_workers=None):
+    """ Estimates metric for each parameter set, and its difference from the first one.
+
+    With common, every set runs on the same seeds and common random numbers, so the
+    differences are paired; otherwise each set gets its own seeds. A tilt above 1 draws
+    damage from proposal_for(param_sets, tilt) and reweights. Returns one dict per set with
+    'mean', 'half_width', 'runs' and, past the first, 'difference' and 'difference_half_width'.
+    """
+    proposal = proposal_for(param_sets, tilt) if tilt != 1.0 else None
+    results, baseline = [], None
+    for k, params in enumerate(param_sets):
+        run_seeds = seeds if common else [seed + k * INDEPENDENT_SEED_STRIDE for seed in seeds]
+        values, weights = observations(dict(params, common_random_numbers=common), run_seeds, metric,
+                                       antithetic, proposal, max_workers)
+        estimates = controlled(values, weights, 1.0) if proposal else values
+        mean, half_width = interval(estimates, confidence)
+        result = {"mean": mean, "half_width": half_width, "runs": len(values) * (2 if antithetic else 1)}
+        if baseline is None:
+            baseline = (values, weights)
+        else:
+            differences = [v - b for v, b in zip(values, baseline[0])]
+            if proposal:
+                differences = controlled(differences, [w - b for w, b in zip(weights, baseline[1])], 0.0)
+            result["difference"], result["difference_half_width"] = interval(differences, confidence)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from simlog import get_logger, setup_logging
+
+    setup_logging()
+    log = get_logger("variance")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    metric = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_METRIC
+    base = {"duration": 0, "duration_seconds": 30, "num_satellites": 40, "num_stations": 4,
+            "satellite_damage_prob": 2e-6, "station_damage_prob": 1e-6}
+    param_sets = [base, dict(base, satellite_damage_prob=4 * base["satellite_damage_prob"])]
+    seeds = list(range(1, count + 1))
+    methods = [("naive", {"common": False}),
+               ("common random numbers", {}),
+               ("common + antithetic", {"antithetic": True}),
+               ("common + importance", {"tilt": tilt_for(param_sets[1])})]
+    naive = None
+    for name, options in methods:
+        start = time.perf_counter()
+        result = compare(param_sets, seeds, metric, **options)[1]
+        width = result["difference_half_width"]
+        naive = naive or (width, result["runs"])
+        #runs a naive comparison needs for the same width, over the runs this one took
+        saving = naive[0] ** 2 * naive[1] / (width ** 2 * result["runs"]) if width else math.inf
+        log.info("%-22s %s difference %9.4f +- %8.4f, %6.1fx fewer runs for this width, %.1fs", name, metric,
+                 result["difference"], width, saving, time.perf_counter() - start)
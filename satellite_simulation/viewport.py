@@ -0,0 +1,238 @@
+import math
+from operator import attrgetter
+import numpy as np
+from config import *
+from frames import SatelliteRows
+
+VIEW_MIN_ZOOM = 0.5
+VIEW_MAX_ZOOM = 16.0
+VIEW_ZOOM_STEP = 1.25
+VIEW_PAN_STEP = 60
+#culling margin in screen pixels, so icons and labels at the edge are not cut off
+VIEW_CULL_MARGIN = 30
+#level of detail by the number of satellites on screen: full icons, single pixels, density cells
+VIEW_DETAIL_LIMIT = 400
+VIEW_PIXEL_LIMIT = 20000
+VIEW_LABEL_ZOOM = 1.0
+VIEW_DENSITY_CELL = 4
+VIEW_DENSITY_COLOR = (255, 200, 60)
+#the Earth texture is rescaled up to this size, beyond it a plain disc is drawn
+VIEW_EARTH_IMAGE_LIMIT = 2400
+EARTH_FALLBACK_COLOR = (0, 80, 180)
+JAMMER_COLOR = (255, 60, 60)
+WEATHER_COLOR = (210, 215, 225)
+DEBRIS_COLOR = (150, 150, 150)
+WEATHER_MAX_ALPHA = 120
+
+_x = attrgetter('x')
+_y = attrgetter('y')
+
+
+class Viewport:
+    """ Pan and zoom over the simulation plane; screen = (world - origin) * zoom. """
+
+    def __init__(self, width=WIDTH, height=HEIGHT):
+        self.width = width
+        self.height = height
+        self.zoom = 1.0
+        self.origin = (0.0, 0.0)
+        self._earth_cache = (None, None)
+        self._dragging = False
+
+    def reset(self):
+        self.zoom = 1.0
+        self.origin = (0.0, 0.0)
+
+    def to_screen(self, x, y):
+        return (int((x - self.origin[0]) * self.zoom), int((y - self.origin[1]) * self.zoom))
+
+    def to_world(self, sx, sy):
+        return (sx / self.zoom + self.origin[0], sy / self.zoom + self.origin[1])
+
+    def zoom_at(self, screen_pos, factor):
+        """ Zooms by factor keeping the world point under screen_pos in place. """
+        wx, wy = self.to_world(*screen_pos)
+        self.zoom = min(VIEW_MAX_ZOOM, max(VIEW_MIN_ZOOM, self.zoom * factor))
+        self.origin = (wx - screen_pos[0] / self.zoom, wy - screen_pos[1] / self.zoom)
+
+    def pan(self, dx, dy):
+        """ Moves the view by dx, dy screen pixels. """
+        self.origin = (self.origin[0] - dx / self.zoom, self.origin[1] - dy / self.zoom)
+
+    def handle_event(self, event):
+        """ Mouse wheel zooms, middle drag and arrow keys pan, Home resets; True if the event was used. """
+        import pygame
+
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_at(pygame.mouse.get_pos(), VIEW_ZOOM_STEP ** event.y)
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 2:
+            self._dragging = True
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 2:
+            self._dragging = False
+            return True
+        if event.type == pygame.MOUSEMOTION and self._dragging:
+            self.pan(*event.rel)
+            return True
+        if event.type == pygame.KEYDOWN:
+            keys = {pygame.K_LEFT: (VIEW_PAN_STEP, 0), pygame.K_RIGHT: (-VIEW_PAN_STEP, 0),
+                    pygame.K_UP: (0, VIEW_PAN_STEP), pygame.K_DOWN: (0, -VIEW_PAN_STEP)}
+            if event.key in keys:
+                self.pan(*keys[event.key])
+                return True
+            if event.key == pygame.K_HOME:
+                self.reset()
+                return True
+        return False
+
+    def world_rect(self, margin=VIEW_CULL_MARGIN):
+        """ (left, top, right, bottom) of the world area on screen, widened by margin screen pixels. """
+        left, top = self.to_world(-margin, -margin)
+        right, bottom = self.to_world(self.width + margin, self.height + margin)
+        return left, top, right, bottom
+
+    def draw_background(self, surface):
+        import pygame
+
+        surface.fill(DARK_SPACE)
+        for x, y, r in get_stars(): pygame.draw.circle(surface, STAR_COLOR, (int(x), int(y)), int(r))
+        center = self.to_screen(*EARTH_POSITION)
+        earth_image = get_earth_image()
+        if earth_image and max(earth_image.get_size()) * self.zoom <= VIEW_EARTH_IMAGE_LIMIT:
+            zoom, scaled = self._earth_cache
+            if zoom != self.zoom:
+                if self.zoom == 1.0:
+                    scaled = earth_image
+                else:
+                    w, h = earth_image.get_size()
+                    scaled = pygame.transform.smoothscale(earth_image, (max(1, int(w * self.zoom)), max(1, int(h * self.zoom))))
+                self._earth_cache = (self.zoom, scaled)
+            surface.blit(scaled, scaled.get_rect(center=center))
+        else:
+            pygame.draw.circle(surface, EARTH_FALLBACK_COLOR, center, int(EARTH_RADIUS_PIXELS * self.zoom))
+
+    def draw_stations(self, surface, stations, selected_station, capacity_font):
+        for station in stations:
+            reach = station.comm_radius + station.size
+            sx, sy = self.to_screen(station.x, station.y)
+            r = reach * self.zoom
+            if sx + r < 0 or sy + r < 0 or sx - r > self.width or sy - r > self.height:
+                continue
+            station.draw(surface, station == selected_station, capacity_font, self)
+
+    def draw_weather(self, surface, weather):
+        """ Cloud cells over the rim, more opaque where the cover slows links more. """
+        import pygame
+
+        rows, cols = np.mgrid[0:weather.rows, 0:weather.cols]
+        #cell centres, shifted by the drift so cells follow the cover
+        rows = (rows + weather.offset[0]) % weather.rows
+        cols = (cols + weather.offset[1]) % weather.cols
+        alpha = 1.0 - weather.factors(weather.cover_at(rows, cols))
+        alpha = (alpha / max(WEATHER_MAX_ATTENUATION, 1e-9) * WEATHER_MAX_ALPHA).astype(np.int64)
+        overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        w, h = int(math.ceil(weather.cell_w * self.zoom)), int(math.ceil(weather.cell_h * self.zoom))
+        for row, col, a in zip(rows.ravel().tolist(), cols.ravel().tolist(), alpha.ravel().tolist()):
+            if a <= 0:
+                continue
+            x, y = self.to_screen(weather.left + col * weather.cell_w, weather.top + row * weather.cell_h)
+            if x + w < 0 or y + h < 0 or x > self.width or y > self.height:
+                continue
+            overlay.fill((*WEATHER_COLOR, a), (x, y, w, h))
+        surface.blit(overlay, (0, 0))
+
+    def draw_jammers(self, surface, jammers):
+        """ Jammer footprints as outlines, the emitter as a dot sized by its power; jammers are (x, y, power, radius). """
+        import pygame
+
+        for x, y, power, radius in jammers:
+            center = self.to_screen(x, y)
+            pygame.draw.circle(surface, JAMMER_COLOR, center, max(1, int(radius * self.zoom)), 1)
+            pygame.draw.circle(surface, JAMMER_COLOR, center, max(2, int((2 + 6 * power) * self.zoom)))
+
+    def draw_debris(self, surface, positions):
+        """ Fragments as single pixels, culled to the screen; positions are x, y arrays. """
+        import pygame
+
+        x, y = positions
+        sx = ((x - self.origin[0]) * self.zoom).astype(np.int64)
+        sy = ((y - self.origin[1]) * self.zoom).astype(np.int64)
+        inside = (sx >= 0) & (sx < self.width) & (sy >= 0) & (sy < self.height)
+        sx, sy = sx[inside], sy[inside]
+        if surface.get_bytesize() == 3:
+            for point in zip(sx.tolist(), sy.tolist()):
+                surface.set_at(point, DEBRIS_COLOR)
+            return
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            pixels[sx, sy] = surface.map_rgb(DEBRIS_COLOR)
+        finally:
+            del pixels
+
+    def draw_satellites(self, surface, satellites):
+        """ Draws the on-screen satellites, a list or a frame's SatelliteRows; returns the level of detail used. """
+        #the engine drops destroyed satellites from the list every tick
+        live = satellites
+        if isinstance(live, SatelliteRows):
+            x, y = live.x, live.y
+        else:
+            x = np.fromiter(map(_x, live), np.float64, len(live))
+            y = np.fromiter(map(_y, live), np.float64, len(live))
+        sx = (x - self.origin[0]) * self.zoom
+        sy = (y - self.origin[1]) * self.zoom
+        m = VIEW_CULL_MARGIN
+        shown = np.flatnonzero((sx >= -m) & (sx < self.width + m) & (sy >= -m) & (sy < self.height + m))
+        if len(shown) <= VIEW_DETAIL_LIMIT:
+            from sprites import draw_satellites
+            draw_satellites(surface, [live[i] for i in shown.tolist()], self, self.zoom >= VIEW_LABEL_ZOOM)
+            return "detail"
+        sx, sy = sx[shown].astype(np.int64), sy[shown].astype(np.int64)
+        inside = (sx >= 0) & (sx < self.width) & (sy >= 0) & (sy < self.height)
+        sx, sy, shown = sx[inside], sy[inside], shown[inside]
+        if len(shown) <= VIEW_PIXEL_LIMIT:
+            if isinstance(live, SatelliteRows):
+                colors = live.pixel_colors(shown, BLINK_RED)
+            else:
+                colors = [BLINK_RED if live[i].status == 'damaging' else live[i].initial_color for i in shown.tolist()]
+            self._draw_pixels(surface, colors, sx, sy)
+            return "pixels"
+        self._draw_density(surface, sx, sy)
+        return "density"
+
+    def _draw_pixels(self, surface, colors, sx, sy):
+        import pygame
+
+        if surface.get_bytesize() == 3:
+            #24-bit surfaces have no 2D pixel view
+            for x, y, color in zip(sx.tolist(), sy.tolist(), colors):
+                surface.set_at((x, y), color)
+            return
+        mapped = {color: surface.map_rgb(color) for color in set(colors)}
+        codes = np.fromiter((mapped[color] for color in colors), np.int64, len(colors))
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            pixels[sx, sy] = codes
+        finally:
+            del pixels
+
+    def _draw_density(self, surface, sx, sy):
+        import pygame
+
+        cell = VIEW_DENSITY_CELL
+        cols, rows = -(-self.width // cell), -(-self.height // cell)
+        counts = np.bincount((sx // cell) * rows + sy // cell, minlength=cols * rows).reshape(cols, rows)
+        if not counts.any():
+            return
+        #log scale so sparse cells stay visible next to dense ones; black cells are keyed out
+        level = np.log1p(counts) / np.log1p(counts.max())
+        rgb = (level[:, :, None] * np.array(VIEW_DENSITY_COLOR)[None, None, :]).astype(np.uint8)
+        rgb[counts > 0] = np.maximum(rgb[counts > 0], 1)
+        cells = pygame.surfarray.make_surface(rgb)
+        cells.set_colorkey((0, 0, 0))
+        surface.blit(pygame.transform.scale(cells, (cols * cell, rows * cell)), (0, 0))
+
+    def draw_loss_line(self, surface, sat_pos, st_pos):
+        import pygame
+
+        pygame.draw.line(surface, BLINK_RED, self.to_screen(*st_pos), self.to_screen(*sat_pos), 2)
@@ -0,0 +1,138 @@
+import math
+from config import *
+
+
+def _smooth_noise(rng, rows, cols):
+    """ Random cover in [0, 1] with cloud-sized blobs: white noise under two periodic box blurs. """
+    import numpy as np
+
+    cover = rng.random((rows, cols))
+    for _ in range(2):
+        cover = sum(np.roll(cover, (dy, dx), axis=(0, 1)) for dy in (-1, 0, 1) for dx in (-1, 0, 1)) / 9.0
+    low, high = cover.min(), cover.max()
+    return (cover - low) / (high - low) if high > low else np.zeros_like(cover)
+
+
+def _sample(grid, rows, cols):
+    """ Bilinear samples of a periodic grid at fractional cell positions. """
+    import numpy as np
+
+    n_rows, n_cols = grid.shape
+    r0, c0 = np.floor(rows).astype(np.int64), np.floor(cols).astype(np.int64)
+    fr, fc = rows - r0, cols - c0
+    r0, c0 = r0 % n_rows, c0 % n_cols
+    r1, c1 = (r0 + 1) % n_rows, (c0 + 1) % n_cols
+    top = grid[r0, c0] * (1 - fc) + grid[r0, c1] * fc
+    bottom = grid[r1, c0] * (1 - fc) + grid[r1, c1] * fc
+    return top * (1 - fr) + bottom * fr
+
+
+class WeatherField:
+    """ Cloud cover over the station rim and the link rate it leaves each station. """
+
+    def __init__(self, seed=None, frames=None, cell_pixels=WEATHER_CELL_PIXELS,
+                 wind=WEATHER_WIND_PIXELS_PER_SEC, change_sec=WEATHER_CHANGE_SEC, frame_sec=WEATHER_FRAME_SEC):
+        import numpy as np
+
+        self.rng = np.random.default_rng(seed)
+        half = EARTH_RADIUS_PIXELS + 2 * cell_pixels
+        self.left, self.top, self.size = EARTH_POSITION[0] - half, EARTH_POSITION[1] - half, 2 * half
+        if frames is None:
+            n = int(math.ceil(self.size / cell_pixels))
+            self.frames = None
+            self.cover = _smooth_noise(self.rng, n, n)
+            self._target = _smooth_noise(self.rng, n, n)
+        else:
+            frames = np.clip(np.asarray(frames, dtype=np.float64), 0.0, 1.0)
+            self.frames = frames[None] if frames.ndim == 2 else frames
+            self.cover = self.frames[0].copy()
+        self.rows, self.cols = self.cover.shape
+        self.cell_w, self.cell_h = self.size / self.cols, self.size / self.rows
+        self.wind = wind
+        self.change_sec = change_sec
+        self.frame_sec = frame_sec
+        self.elapsed_sec = 0.0
+        self._since_change = 0.0
+        #drift of the cover in cells, (rows, cols)
+        self.offset = (0.0, 0.0)
+        #station -> (row, col), its fractional cell in the unshifted grid
+        self._cells = {}
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """ Weather from a .npy grid or stack of grids, or a comma-separated grid, of cover in [0, 1]. """
+        import numpy as np
+
+        frames = np.load(path) if str(path).endswith(".npy") else np.loadtxt(path, delimiter=",", ndmin=2)
+        return cls(frames=frames, **kwargs)
+
+    def cell_of(self, x, y):
+        """ Fractional (row, col) of a point, measured from cell centres. """
+        return ((y - self.top) / self.cell_h - 0.5, (x - self.left) / self.cell_w - 0.5)
+
+    def _advance(self, dt_sec):
+        self.elapsed_sec += dt_sec
+        if self.frames is not None:
+            return
+        dy, dx = self.offset
+        self.offset = ((dy + self.wind[1] * dt_sec / self.cell_h) % self.rows,
+                       (dx + self.wind[0] * dt_sec / self.cell_w) % self.cols)
+        self._since_change += dt_sec
+        if self._since_change >= self.change_sec:
+            self._since_change = 0.0
+            self._target = _smooth_noise(self.rng, self.rows, self.cols)
+        self.cover += (self._target - self.cover) * min(1.0, dt_sec / self.change_sec)
+
+    def cover_at(self, rows, cols):
+        """ Cover at unshifted fractional cells, as the weather stands now. """
+        if self.frames is None:
+            return _sample(self.cover, rows - self.offset[0], cols - self.offset[1])
+        position = self.elapsed_sec / self.frame_sec
+        first = int(position) % len(self.frames)
+        blend = position - math.floor(position)
+        return (_sample(self.frames[first], rows, cols) * (1 - blend)
+                + _sample(self.frames[(first + 1) % len(self.frames)], rows, cols) * blend)
+
+    def frozen(self):
+        """ A copy of the weather as it stands now, for drawing while this one moves on. """
+        import copy
+
+        frozen = copy.copy(self)
+        frozen.cover = self.cover.copy()
+        frozen._cells = {}
+        return frozen
+
+    def factors(self, cover):
+        """ Share of the link rate left under the given cover. """
+        import numpy as np
+
+        thickness = np.clip((cover - WEATHER_CLEAR_COVER) / (1.0 - WEATHER_CLEAR_COVER), 0.0, 1.0)
+        return 1.0 - WEATHER_MAX_ATTENUATION * thickness
+
+    def update(self, stations, delta_time_ms):
+        """ Moves the weather on by a tick and sets every station's weather_factor. """
+        import numpy as np
+
+        self._advance(delta_time_ms / 1000.0)
+        if not stations:
+            return
+        cells = self._cells
+        if len(cells) > 2 * len(stations):
+            #forget deleted stations
+            cells = self._cells = {st: cells[st] for st in stations if st in cells}
+        for st in stations:
+            if st not in cells:
+                cells[st] = self.cell_of(st.x, st.y)
+        n = len(stations)
+        rows = np.fromiter((cells[st][0] for st in stations), np.float64, n)
+        cols = np.fromiter((cells[st][1] for st in stations), np.float64, n)
+        for st, factor in zip(stations, self.factors(self.cover_at(rows, cols)).tolist()):
+            st.weather_factor = factor
+
+
+def weather_for(ctx, source=None):
+    """ Weather loaded from source when it names a file, otherwise generated from the run's random stream. """
+    source = source or WEATHER_FILE
+    if source:
+        return WeatherField.load(source)
+    return WeatherField(seed=ctx.rng.getrandbits(32))
@@ -0,0 +1,177 @@
+""" Steps a simulation on its own thread, so drawing and input never wait on a tick.
+
+While it runs, the worker owns the Simulation. The UI thread sends edits through a
+command queue that the worker applies between ticks, and draws the RenderFrames the
+worker publishes into a FrameBuffer. A stopped worker applies commands and captures
+frames right away on the caller's thread, so the UI has one code path either way.
+"""
+import math
+import queue
+import threading
+import time
+from config import EARTH_POSITION, EARTH_RADIUS_PIXELS, STATION_MIN_DISTANCE
+from engine import HEADLESS_TICK_MS
+from frames import FrameBuffer, RenderFrame
+from simlog import get_logger
+from station import Station
+
+log = get_logger("worker")
+
+RANDOM_STATION_ATTEMPTS = 100
+
+
+def _monotonic_ticks():
+    return int(time.monotonic() * 1000)
+
+
+class SimulationWorker:
+    """ Runs Simulation.step every tick_ms of wall time, or back to back when not realtime, on a daemon thread. """
+
+    def __init__(self, sim, ticks=_monotonic_ticks, tick_ms=HEADLESS_TICK_MS, realtime=True):
+        self.sim = sim
+        self.ticks = ticks
+        self.tick_ms = tick_ms
+        #False steps tick_ms on the simulation clock as fast as it can, like run_simulation
+        self.realtime = realtime
+        self.frames = FrameBuffer()
+        self.error = None
+        self._commands = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.error = None
+        self._stop.clear()
+        self.frames.publish(RenderFrame(self.sim))
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stops the thread after its current tick, then applies the commands it left queued. """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._apply_commands()
+
+    def frame(self):
+        """ The latest published frame while running, a fresh capture otherwise.
+
+        An exception that ended the simulation thread is raised here, on the UI thread.
+        """
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        if self.running:
+            return self.frames.latest()
+        return RenderFrame(self.sim)
+
+    # ——— commands, safe to call from any thread ———
+
+    def add_station(self, x, y):
+        self._submit(self._add_station, x, y)
+
+    def add_random_station(self):
+        self._submit(self._add_random_station)
+
+    def delete_station(self, station_id):
+        self._submit(self._delete_station, station_id)
+
+    def change_radius(self, station_id, delta):
+        self._submit(self._change_radius, station_id, delta)
+
+    def set_speed(self, speed):
+        self._submit(self._set_speed, speed)
+
+    def save_snapshot(self, filename):
+        self._submit(self._save_snapshot, filename)
+
+    def _submit(self, command, *args):
+        if self.running:
+            self._commands.put((command, args))
+        else:
+            command(*args)
+
+    def _apply_commands(self):
+        while True:
+            try:
+                command, args = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            command(*args)
+
+    # ——— simulation thread ———
+
+    def _run(self):
+        sim = self.sim
+        last = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                self._apply_commands()
+                now = time.perf_counter()
+                if self.realtime:
+                    sim.step(self.ticks(), (now - last) * 1000.0 * sim.ctx.simulation_speed)
+                else:
+                    sim.step(sim.elapsed_simulation_time_ms, self.tick_ms * sim.ctx.simulation_speed)
+                last = now
+                if sim.remaining_ms() <= 0:
+                    break
+                if self.frames.wanted():
+                    self.frames.publish(RenderFrame(sim))
+                if self.realtime:
+                    self._stop.wait(max(0.0, self.tick_ms / 1000.0 - (time.perf_counter() - now)))
+        except Exception as e:
+            log.exception("Simulation thread stopped: %s", e)
+            self.error = e
+        self.frames.publish(RenderFrame(sim))
+
+    def _station(self, station_id):
+        for station in self.sim.stations:
+            if station.id == station_id:
+                return station
+        return None
+
+    def _add_station(self, x, y):
+        self.sim.stations.append(Station(x, y, self.sim.ctx))
+
+    def _add_random_station(self):
+        sim = self.sim
+        for _ in range(RANDOM_STATION_ATTEMPTS):
+            angle = sim.ctx.rng.uniform(0, 2 * math.pi)
+            x = EARTH_POSITION[0] + EARTH_RADIUS_PIXELS * math.cos(angle)
+            y = EARTH_POSITION[1] + EARTH_RADIUS_PIXELS * math.sin(angle)
+            if all(math.dist((x, y), (st.x, st.y)) >= STATION_MIN_DISTANCE for st in sim.stations):
+                self._add_station(x, y)
+                log.info("Random station added at angle %.1f deg", math.degrees(angle))
+                return
+        log.warning("Could not find a free spot for a random station after multiple attempts.")
+
+    def _delete_station(self, station_id):
+        station = self._station(station_id)
+        if station is None:
+            log.info("No station selected to delete.")
+            return
+        self.sim.stations.remove(station)
+        station.disconnect_all()
+        log.info("Deleted Station ID %s", station_id)
+
+    def _change_radius(self, station_id, delta):
+        station = self._station(station_id)
+        if station is not None:
+            station.change_radius(delta)
+
+    def _set_speed(self, speed):
+        self.sim.ctx.simulation_speed = speed
+
+    def _save_snapshot(self, filename):
+        from snapshot import Snapshot
+
+        Snapshot.capture(self.sim, self.ticks()).save(filename)
+        log.info("Snapshot saved to %s at %.1fs sim time.", filename, self.sim.elapsed_simulation_time_ms / 1000.0)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+#the simulation modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "satellite_simulation"))
+
+#pygame tests draw to an offscreen surface
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+from contacts import ContactCache, contact_tracker, geometry_key
+from engine import HEADLESS_TICK_MS, setup_simulation
+
+PARAMS = {"duration": 0, "duration_seconds": 60, "num_satellites": 40, "num_stations": 6,
+          "satellite_damage_prob": 0.0, "station_damage_prob": 0.0, "inter_satellite_links": False,
+          "weather": False, "debris": False}
+
+
+def geometry(sim):
+    shells = [sat.shell for sat in sim.satellites]
+    angles = np.array([sat.angle for sat in sim.satellites])
+    stations = np.array([(st.x, st.y, st.comm_radius, st.base_angle_rad) for st in sim.stations]).reshape(-1, 4)
+    return shells, angles, stations
+
+
+def test_schedule_matches_geometry(tmp_path):
+    sim = setup_simulation(dict(PARAMS, contact_cache=str(tmp_path)), seed=3)
+    checked = 0
+    while sim.remaining_ms() > 0:
+        sim.step(sim.elapsed_simulation_time_ms, HEADLESS_TICK_MS)
+        for sat in sim.satellites:
+            expected = [st for st in sim.stations if st.is_satellite_in_range(sat)]
+            assert sim.contacts.stations_for(sat, sim.stations) == expected
+            for st in sim.stations:
+                assert sim.contacts.in_range(st, sat) == (st in expected)
+            checked += len(expected)
+    #the run actually had contacts to compare
+    assert checked > 0
+
+
+def test_cached_schedule_is_reused(tmp_path):
+    first = setup_simulation(dict(PARAMS, contact_cache=str(tmp_path)), seed=3)
+    first.step(0, HEADLESS_TICK_MS)
+    assert first.contact_cache.misses == 1 and len(first.contact_cache.entries()) == 1
+
+    second = setup_simulation(dict(PARAMS, contact_cache=str(tmp_path)), seed=3)
+    second.step(0, HEADLESS_TICK_MS)
+    assert second.contact_cache.hits == 1
+    for name in ("start", "end", "sat", "station"):
+        assert np.array_equal(getattr(first.contacts, name), getattr(second.contacts, name))
+
+
+def test_geometry_change_invalidates_schedule(tmp_path):
+    sim = setup_simulation(dict(PARAMS, contact_cache=str(tmp_path)), seed=3)
+    sim.step(0, HEADLESS_TICK_MS)
+    shells, angles, stations = geometry(sim)
+    key = geometry_key(shells, angles, stations, 60.0)
+    assert key == geometry_key(shells, angles.copy(), stations.copy(), 60.0)
+    moved = stations.copy()
+    moved[0, 0] += 1.0
+    assert geometry_key(shells, angles, moved, 60.0) != key
+    assert geometry_key(shells, angles + 1e-9, stations, 60.0) != key
+    assert geometry_key(shells, angles, stations, 61.0) != key
+
+    #moving a station makes the engine drop its tracker and compute a new schedule
+    tracker = sim.contacts
+    sim.stations[0].x += 25
+    assert not tracker.valid_for(sim.stations, sim.elapsed_simulation_time_ms)
+    sim.step(HEADLESS_TICK_MS, HEADLESS_TICK_MS)
+    assert sim.contacts is not tracker
+    assert sim.contact_cache.misses == 2 and len(os.listdir(tmp_path)) == 2
+    for sat in sim.satellites:
+        assert sim.contacts.stations_for(sat, sim.stations) == [st for st in sim.stations if st.is_satellite_in_range(sat)]
+
+
+def test_cache_evicts_past_max_bytes(tmp_path):
+    sim = setup_simulation(PARAMS, seed=3)
+    cache = ContactCache(str(tmp_path), max_bytes=1)
+    contact_tracker(sim.satellites, sim.stations, 0.0, 60000.0, cache)
+    assert cache.entries() == [] and cache.evictions == 1
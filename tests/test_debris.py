@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+from debris import TWO_PI, sweep_pairs
+
+
+def brute_force(sorted_angles, angles, reach):
+    pairs = set()
+    for q, angle in enumerate(angles):
+        for f, fragment in enumerate(sorted_angles):
+            gap = abs(angle - fragment)
+            if min(gap, TWO_PI - gap) <= reach:
+                pairs.add((q, f))
+    return pairs
+
+
+def swept(sorted_angles, angles, reach):
+    queries, fragments = sweep_pairs(sorted_angles, angles, reach)
+    pairs = list(zip(queries.tolist(), fragments.tolist()))
+    assert len(pairs) == len(set(pairs))
+    return set(pairs)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("reach", [0.001, 0.05, 0.4])
+def test_sweep_pairs_matches_brute_force(seed, reach):
+    rng = np.random.default_rng(seed)
+    #crowd both ends of the circle so the wrap at 0 / 2 pi is exercised
+    edges = np.concatenate((rng.uniform(0.0, 2 * reach, 20), rng.uniform(TWO_PI - 2 * reach, TWO_PI, 20)))
+    sorted_angles = np.sort(np.concatenate((rng.uniform(0.0, TWO_PI, 200), edges)))
+    angles = np.concatenate((rng.uniform(0.0, TWO_PI, 50), edges[::4]))
+    assert swept(sorted_angles, angles, reach) == brute_force(sorted_angles, angles, reach)
+
+
+def test_sweep_pairs_wraps_at_zero():
+    sorted_angles = np.array([0.01, 1.0, TWO_PI - 0.01])
+    assert swept(sorted_angles, np.array([TWO_PI - 0.005]), 0.02) == {(0, 0), (0, 2)}
+    assert swept(sorted_angles, np.array([0.0]), 0.02) == {(0, 0), (0, 2)}
+    assert swept(sorted_angles, np.array([math.pi]), 0.02) == set()
+
+
+def test_sweep_pairs_empty():
+    assert swept(np.zeros(0), np.array([1.0]), 0.1) == set()
+    assert swept(np.array([1.0]), np.zeros(0), 0.1) == set()
@@ -0,0 +1,72 @@
+import csv
+
+import pytest
+
+from engine import HEADLESS_TICK_MS, setup_simulation
+from export import EVENT_COLUMNS, RUN_COLUMNS, ResultsExporter
+
+PARAMS = {"duration": 0, "duration_seconds": 20, "num_satellites": 30, "num_stations": 4,
+          "satellite_damage_prob": 0.0005, "station_damage_prob": 0.0005}
+
+
+def exported(directory, fmt, chunk_rows=50):
+    """ A seeded run exported to directory as it goes, like run_simulation with export_dir. """
+    sim = setup_simulation(PARAMS, seed=11)
+    sim.exporter = ResultsExporter(str(directory), chunk_rows=chunk_rows, fmt=fmt)
+    sim.exporter.start(sim)
+    while sim.remaining_ms() > 0:
+        sim.step(sim.elapsed_simulation_time_ms, HEADLESS_TICK_MS)
+    sim.close_active_losses()
+    sim.exporter.finish(sim)
+    return sim
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_export_reads_back(tmp_path):
+    sim = exported(tmp_path, "csv")
+    assert sim.exporter.format == "csv"
+    summary = sim.ctx.stats.summary()
+
+    run = read_csv(tmp_path / "run.csv")
+    assert len(run) == 1 and list(run[0]) == RUN_COLUMNS
+    for column in ("total_delivered_gb", "outages", "outage_mean_sec", "outage_max_sec"):
+        assert float(run[0][column]) == pytest.approx(summary[column])
+
+    #the event log went out in many chunks and came back whole
+    events = read_csv(tmp_path / "events.csv")
+    assert list(events[0]) == EVENT_COLUMNS
+    assert len(events) == sim.exporter.event_count > 50
+    outages = [float(ev["value"]) for ev in events if ev["event"] == "outage"]
+    assert outages == pytest.approx([ev["duration"] for ev in sim.connection_loss_log])
+    assert outages and any(ev["event"] == "connect" for ev in events)
+
+    stations = read_csv(tmp_path / "stations.csv")
+    satellites = read_csv(tmp_path / "satellites.csv")
+    assert sorted(int(st["station"]) for st in stations) == sorted(st.id for st in sim.stations)
+    assert len(satellites) == PARAMS["num_satellites"]
+    assert sum(float(sat["delivered_gb"]) for sat in satellites) == pytest.approx(summary["total_delivered_gb"])
+
+
+def test_parquet_export_matches_csv(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    exported(tmp_path / "csv", "csv")
+    sim = exported(tmp_path / "parquet", "parquet")
+    assert sim.exporter.format == "parquet"
+    for name in ("events", "run", "stations", "satellites"):
+        table = pyarrow.parquet.read_table(tmp_path / "parquet" / f"{name}.parquet").to_pylist()
+        rows = read_csv(tmp_path / "csv" / f"{name}.csv")
+        assert len(table) == len(rows)
+        assert [str(v) for v in table[0].values()] == list(rows[0].values())
+
+
+def test_parquet_format_needs_pyarrow(monkeypatch):
+    monkeypatch.setattr("export._pyarrow", lambda: None)
+    with pytest.raises(ImportError):
+        ResultsExporter(fmt="parquet")
+    assert ResultsExporter().format == "csv"
@@ -0,0 +1,52 @@
+""" The simulation core imports without display, plotting or PDF backends and within the startup budget. """
+import os
+import subprocess
+import sys
+
+import pytest
+
+CORE_MODULES = ["config", "context", "satellite", "station", "scheduler", "startsimulation",
+                "engine", "snapshot", "replay", "report", "export", "simlog"]
+HEAVY_MODULES = ["pygame", "matplotlib", "reportlab"]
+IMPORT_TIME_BUDGET_MS = 150
+RUNS = 5
+
+SIMULATION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "satellite_simulation")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+{imports}
+elapsed_ms = (time.perf_counter() - start) * 1000
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed_ms, ",".join(heavy))
+"""
+
+
+def measure():
+    """ Best core import time over RUNS fresh interpreters, and the heavy modules any of them loaded. """
+    probe = _PROBE.format(imports="\n".join(f"import {m}" for m in CORE_MODULES), heavy=HEAVY_MODULES)
+    env = dict(os.environ)
+    env.pop("DISPLAY", None)
+    timings = []
+    heavy = set()
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", probe], cwd=SIMULATION_DIR,
+                             env=env, capture_output=True, text=True, check=True).stdout.split()
+        timings.append(float(out[0]))
+        if len(out) > 1:
+            heavy.update(out[1].split(","))
+    return min(timings), sorted(heavy)
+
+
+@pytest.fixture(scope="module")
+def measured():
+    return measure()
+
+
+def test_core_import_loads_no_heavy_backends(measured):
+    assert measured[1] == []
+
+
+def test_core_import_time_within_budget(measured):
+    assert measured[0] <= IMPORT_TIME_BUDGET_MS, f"core import took {measured[0]:.1f} ms"
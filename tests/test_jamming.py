@@ -0,0 +1,85 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from jamming import JammerField, link_factors, loss_shares
+from stats import RunStats
+
+#one link from (0, 0) to (100, 0)
+LINK = tuple(np.array([v]) for v in (0.0, 0.0, 100.0, 0.0))
+
+
+def factors(*jammers):
+    return link_factors(np.array(jammers, dtype=np.float64), *LINK)[:, 0]
+
+
+def test_link_geometry():
+    #through the centre the link loses the jammer's power, outside the footprint nothing
+    assert factors((50.0, 0.0, 0.6, 20.0)) == pytest.approx([0.6])
+    assert factors((50.0, 30.0, 0.6, 20.0)) == pytest.approx([0.0])
+    #past the end of the link the distance is to the satellite or the station
+    assert factors((130.0, 0.0, 0.6, 20.0)) == pytest.approx([0.0])
+    #halfway to the edge the power fades to a quarter
+    assert factors((50.0, 10.0, 0.6, 20.0)) == pytest.approx([0.6 * 0.25])
+
+
+def link(slot, x, y):
+    return SimpleNamespace(slot=slot, x=x, y=y, status='operational', connected_to=SimpleNamespace(x=x + 100.0, y=y))
+
+
+def test_two_jammers_combine():
+    field = JammerField([(50.0, 0.0, 0.5, 20.0), (60.0, 0.0, 0.3, 20.0)])
+    field.evaluate([link(0, 0.0, 0.0), link(1, 0.0, 500.0)], 2)
+    f = factors((50.0, 0.0, 0.5, 20.0), (60.0, 0.0, 0.3, 20.0))
+    assert 1.0 - field.factor(0) == pytest.approx(1.0 - np.prod(1.0 - f))
+    assert field.factor(1) == 1.0
+
+
+def test_settle_splits_the_loss_between_jammers():
+    field = JammerField([(50.0, 0.0, 0.5, 20.0), (60.0, 0.0, 0.3, 20.0), (50.0, 300.0, 0.9, 20.0)])
+    stats = RunStats()
+    field.evaluate([link(0, 0.0, 0.0), link(1, 0.0, 300.0)], 2)
+    #what Satellite.update takes from the transfers of the tick
+    field.taken[0], field.taken[1] = 2.0, 0.5
+    field.settle(stats)
+    assert sum(field.lost) == pytest.approx(stats.jamming_lost) and stats.jamming_lost == pytest.approx(2.5)
+    #each jammer's part of a link's loss follows its log kept share
+    weights = [-math.log(1 - 0.5), -math.log(1 - 0.3)]
+    assert field.lost[0] == pytest.approx(2.0 * weights[0] / sum(weights))
+    assert field.lost[1] == pytest.approx(2.0 * weights[1] / sum(weights))
+    assert field.lost[2] == pytest.approx(0.5)
+    #taken and the kept shares are reset for the next tick
+    assert list(field.taken) == [0.0, 0.0] and field.factor(0) == 1.0
+
+
+def test_loss_shares_sum_to_one_per_jammed_link():
+    shares = loss_shares(np.array([[0.5, 0.0, 0.2], [0.3, 0.0, 0.0]]))
+    assert shares.sum(axis=0) == pytest.approx([1.0, 0.0, 1.0])
+
+
+def test_events_count_entries_into_a_footprint():
+    field = JammerField([(50.0, 0.0, 0.5, 20.0)])
+    stats = RunStats()
+    sat = link(0, 0.0, 0.0)
+    #outside, inside for three ticks, outside, inside again
+    for y in (100.0, 0.0, 5.0, 0.0, 100.0, 0.0):
+        sat.y = sat.connected_to.y = y
+        field.evaluate([sat], 1)
+        field.settle(stats)
+    assert list(field.events) == [2] and stats.jamming_events == 2
+
+
+def test_ended_links_leave_their_footprints():
+    field = JammerField([(50.0, 0.0, 0.5, 20.0)])
+    stats = RunStats()
+    sat = link(0, 0.0, 0.0)
+    field.evaluate([sat], 1)
+    field.settle(stats)
+    sat.connected_to = None
+    field.evaluate([sat], 1)
+    field.settle(stats)
+    sat.connected_to = SimpleNamespace(x=100.0, y=0.0)
+    field.evaluate([sat], 1)
+    assert list(field.events) == [2]
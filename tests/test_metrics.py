@@ -0,0 +1,33 @@
+from engine import HEADLESS_TICK_MS, setup_simulation
+from metrics import METRICS, METRICS_PREFIX, MetricsServer, fetch_metrics
+
+
+def test_server_serves_published_metrics_and_stops():
+    sim = setup_simulation({"duration": 0, "duration_seconds": 5, "num_satellites": 20, "num_stations": 3}, seed=2)
+    server = MetricsServer(port=0, publish_interval_ms=0).start()
+    try:
+        assert server.port != 0
+        sim.metrics = server
+        for _ in range(60):
+            sim.step(sim.elapsed_simulation_time_ms, HEADLESS_TICK_MS)
+
+        data = fetch_metrics(server.port)
+        assert list(data) == [name for name, _, _ in METRICS]
+        assert data["ticks_total"] == 60
+        assert data["sim_time_seconds"] == sim.elapsed_simulation_time_ms / 1000.0
+        assert data["satellites"] == len(sim.satellites)
+        assert data["stations"] == 3
+        assert data["active_links"] == sum(len(st.connected_satellites) for st in sim.stations)
+        assert data["data_delivered_gb_total"] == sim.ctx.stats.total_delivered
+
+        text = fetch_metrics(server.port, path="/metrics")
+        samples = {}
+        for line in text.splitlines():
+            if not line.startswith("#"):
+                name, value = line.split()
+                samples[name[len(METRICS_PREFIX):]] = float(value)
+        assert f"# TYPE {METRICS_PREFIX}ticks_total counter" in text
+        assert samples == {name: float(value) for name, value in data.items()}
+    finally:
+        server.stop()
+    assert not server._thread.is_alive()
@@ -0,0 +1,50 @@
+import math
+import random
+
+from engine import setup_simulation
+from replay import ReplayPlayer, ReplayRecorder
+
+TICK_MS = 16
+KEYFRAME_MS = 2000
+
+
+def state(sim):
+    satellites = {sat.name: (sat.status, sat.connected_to.id if sat.connected_to else None, sat.angle)
+                  for sat in sim.satellites}
+    return satellites, {st.id: st.status for st in sim.stations}
+
+
+def assert_same(got, expected):
+    assert got[1] == expected[1]
+    assert got[0].keys() == expected[0].keys()
+    for name, (status, station, angle) in expected[0].items():
+        got_status, got_station, got_angle = got[0][name]
+        assert (got_status, got_station) == (status, station), name
+        assert abs((got_angle - angle + math.pi) % (2 * math.pi) - math.pi) < 1e-6, name
+
+
+def test_seek_matches_the_recorded_run(tmp_path):
+    params = {"duration": 0, "duration_seconds": 30, "num_satellites": 60, "num_stations": 6,
+              "satellite_damage_prob": 0.0005, "station_damage_prob": 0.001}
+    sim = setup_simulation(params, seed=11)
+    sim.recorder = ReplayRecorder(KEYFRAME_MS)
+    sim.recorder.start(sim, 0)
+    recorded = {}
+    ticks = 1500
+    for i in range(1, ticks + 1):
+        sim.step(i * TICK_MS, TICK_MS)
+        if i % 37 == 0:
+            recorded[int(sim.elapsed_simulation_time_ms)] = state(sim)
+    sim.recorder.finish(sim, ticks * TICK_MS)
+    sim.recorder.save(tmp_path / "run.krpl")
+    assert len(sim.recorder.keyframes) > 5
+    assert sim.recorder.event_count > 0
+
+    player = ReplayPlayer(tmp_path / "run.krpl")
+    times = sorted(recorded)
+    #forwards within and across keyframes, then backwards and in random order
+    shuffled = list(times)
+    random.Random(3).shuffle(shuffled)
+    for time_ms in times + times[::-1] + shuffled:
+        assert_same(state(player.seek(time_ms)), recorded[time_ms])
+    assert player.seek(player.duration_ms).satellites
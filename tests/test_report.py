@@ -0,0 +1,46 @@
+import io
+
+import pytest
+
+from report import ReportWriter, _report_backends
+
+
+@pytest.fixture
+def writer(tmp_path):
+    plt, canvas, LETTER, ImageReader = _report_backends()
+    out = ReportWriter(tmp_path / "report.txt", str(tmp_path / "report.pdf"), canvas, LETTER, "Report")
+    fig = plt.figure()
+    plt.plot([0, 1], [1, 0])
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    plt.close(fig)
+    yield out, ImageReader(buf)
+    out.close()
+
+
+def pages(out):
+    return out.pdf.getPageNumber()
+
+
+def test_images_share_a_page_when_they_fit(writer):
+    out, chart = writer
+    #under the title there is room for one chart, a fresh page takes two
+    placed = []
+    for caption in ("first", "second", "third", "fourth"):
+        out.image(chart, caption)
+        placed.append(pages(out))
+    assert placed == [1, 2, 2, 3]
+
+
+def test_no_blank_page_after_a_full_page_of_lines(writer):
+    out, chart = writer
+    for n in range(out.room):
+        out.line(f"line {n}")
+    assert pages(out) == 1
+    out.image(chart, "chart")
+    assert pages(out) == 2
+    #lines after an image go below it
+    room = out.room
+    out.line("after")
+    out.image(chart, "chart")
+    assert pages(out) == 3 and room < out.page_lines
@@ -0,0 +1,132 @@
+import math
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from routing import LinkRouter
+from stats import RunStats
+
+
+class Ground:
+    def __init__(self, weather_factor=1.0):
+        self.status = 'operational'
+        self.weather_factor = weather_factor
+        self.received = 0.0
+
+    def receive_data(self, amount):
+        self.received += amount
+
+
+def place(sat, angle, radius):
+    sat.angle = angle % (2 * math.pi)
+    sat.x, sat.y = radius * math.cos(angle), radius * math.sin(angle)
+
+
+def fleet(angles, radii, ctx=None):
+    ctx = ctx or SimpleNamespace(stats=RunStats())
+    sats = []
+    for slot, (angle, radius) in enumerate(zip(angles, radii)):
+        sat = SimpleNamespace(slot=slot, name=f"COM-{slot}", status='operational', connected_to=None, data_amount=10.0,
+                              delivered_data=0.0, transferring=False, ctx=ctx)
+        place(sat, angle, radius)
+        sats.append(sat)
+    return sats
+
+
+def brute_force_hops(sats, range_pixels, gateways):
+    """ Fewest hops from every satellite to a gateway, links between every pair in range. """
+    live = [sat for sat in sats if sat.status == 'operational']
+    adjacency = {sat.slot: {other.slot for other in live if other is not sat
+                            and math.dist((sat.x, sat.y), (other.x, other.y)) <= range_pixels} for sat in live}
+    hops = {slot: 0 for slot in gateways}
+    queue = deque(gateways)
+    while queue:
+        slot = queue.popleft()
+        for other in adjacency[slot]:
+            if other not in hops:
+                hops[other] = hops[slot] + 1
+                queue.append(other)
+    return adjacency, hops
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_paths_match_brute_force_bfs(seed):
+    rng = np.random.default_rng(seed)
+    sats = fleet(rng.uniform(0, 2 * math.pi, 30), rng.uniform(280, 320, 30))
+    for sat in sats[:3]:
+        sat.connected_to = Ground()
+    sats[5].status = 'damaging'
+    #every pair is a neighbour candidate, so range alone decides the links
+    router = LinkRouter(range_pixels=80, neighbours=len(sats))
+    router.update(sats)
+    adjacency, hops = brute_force_hops(sats, 80, [sat.slot for sat in sats[:3]])
+    assert {slot: linked for slot, linked in router.adjacency.items() if linked} == \
+           {slot: linked for slot, linked in adjacency.items() if linked}
+    for sat in sats:
+        path = router.path(sat.slot)
+        if sat.slot not in hops:
+            assert path is None
+            continue
+        assert len(path) == hops[sat.slot] + 1
+        assert path[0] == sat.slot and path[-1] in hops and hops[path[-1]] == 0
+        assert all(b in adjacency[a] for a, b in zip(path, path[1:]))
+
+
+def test_incremental_links_match_a_fresh_router():
+    rng = np.random.default_rng(7)
+    angles, radii = rng.uniform(0, 2 * math.pi, 40), rng.uniform(280, 320, 40)
+    sats = fleet(angles, radii)
+    router = LinkRouter(range_pixels=60)
+    for step in range(1, 6):
+        for sat, angle, radius in zip(sats, angles, radii):
+            place(sat, angle + 0.02 * step * (1 + sat.slot % 3), radius)
+        sats[step].status = 'damaging'
+        router.update(sats)
+        fresh = LinkRouter(range_pixels=60)
+        fresh.update(sats)
+        assert {slot: linked for slot, linked in router.adjacency.items() if linked} == \
+               {slot: linked for slot, linked in fresh.adjacency.items() if linked}
+    assert router.links_removed > 0 and router.links_added > router.links_removed
+
+
+def test_routes_rebuild_only_when_topology_or_gateways_change():
+    #evenly spaced ring, each satellite in range of its two neighbours only
+    sats = fleet([2 * math.pi * k / 12 for k in range(12)], [300.0] * 12)
+    sats[0].connected_to = Ground()
+    router = LinkRouter(range_pixels=170)
+    router.update(sats)
+    assert router.path(6) == [6, 5, 4, 3, 2, 1, 0] or router.path(6) == [6, 7, 8, 9, 10, 11, 0]
+    rebuilds = router.rebuilds
+    for _ in range(3):
+        router.update(sats)
+        router.path(3)
+    assert router.rebuilds == rebuilds
+
+    sats[6].connected_to = Ground()
+    router.update(sats)
+    assert router.path(5) == [5, 6] and router.rebuilds == rebuilds + 1
+
+    #cutting the ring next to a gateway changes the routes on that side
+    sats[1].status = 'damaging'
+    router.update(sats)
+    assert router.path(2) == [2, 3, 4, 5, 6] and router.rebuilds == rebuilds + 2
+
+
+@pytest.mark.parametrize("weather_factor", [1.0, 0.4])
+def test_forwarding_stays_within_the_gateway_relay_budget(weather_factor):
+    sats = fleet([2 * math.pi * k / 12 for k in range(12)], [300.0] * 12)
+    station = Ground(weather_factor)
+    sats[0].connected_to = station
+    router = LinkRouter(range_pixels=170, rate_gbps=0.25, relay_rate_gbps=0.5)
+    dt_ms = 1000.0
+    for _ in range(3):
+        before = station.received
+        moved = router.forward(sats, dt_ms, lambda sat: 1.0)
+        assert station.received - before == pytest.approx(moved)
+        assert moved <= 0.5 * weather_factor * dt_ms / 1000.0 + 1e-12
+        #more senders than the gateway can relay, so the budget is used up
+        assert moved == pytest.approx(0.5 * weather_factor)
+    assert sats[0].ctx.stats.routed == pytest.approx(3 * 0.5 * weather_factor)
+    assert sats[0].data_amount == 10.0
@@ -0,0 +1,77 @@
+import pytest
+
+from config import SATELLITE_RELINK_GB
+from context import SimulationContext
+from engine import HEADLESS_TICK_MS, setup_simulation
+from satellite import Satellite
+from scheduler import PriorityScheduler
+from sharded import ShardedSimulation
+from station import Station
+
+
+class EveryStation:
+    def stations_for(self, sat, stations):
+        return stations
+
+
+def test_drained_satellite_frees_its_slot():
+    ctx = SimulationContext(seed=1)
+    ctx.satellite_damage_probability = 0.0
+    station = Station(100.0, 100.0, ctx)
+    station.capacity = 1
+    scheduler = PriorityScheduler()
+    drained, waiting = (Satellite(600, name, (255, 255, 255), initial_angle=0.0, priority_class="COM", ctx=ctx)
+                        for name in ("COM-1", "COM-2"))
+    scheduler.assign([drained, waiting], [station], 0.0, EveryStation())
+    assert drained.connected_to is station and waiting.connected_to is None
+
+    drained.data_amount = 0.01
+    drained.update(0, [station], HEADLESS_TICK_MS)
+    assert drained.data_amount <= 0
+    assert drained.connected_to is None and station.connected_satellites == []
+
+    scheduler.assign([drained, waiting], [station], 20.0, EveryStation())
+    assert waiting.connected_to is station
+
+    #an empty satellite does not take a free slot until it has refilled
+    station.disconnect_satellite(waiting)
+    waiting.data_amount = SATELLITE_RELINK_GB / 2
+    scheduler.assign([drained, waiting], [station], 40.0, EveryStation())
+    assert station.connected_satellites == []
+    drained.data_amount = SATELLITE_RELINK_GB
+    scheduler.assign([drained, waiting], [station], 60.0, EveryStation())
+    assert station.connected_satellites == [drained]
+
+
+PARAMS = {"preemption": False, "duration": 0, "duration_seconds": 6, "num_satellites": 40, "num_stations": 6,
+          "satellite_damage_prob": 0.0, "station_damage_prob": 0.0}
+#what satellites start with: enough to link, drained within a couple of seconds, and not
+#refilled back to SATELLITE_RELINK_GB by generation within the run
+START_GB = 1.5
+
+
+def _single():
+    sim = setup_simulation(PARAMS, seed=3)
+    for sat in sim.satellites:
+        sat.data_amount = START_GB
+    while sim.remaining_ms() > 0:
+        sim.step(sim.elapsed_simulation_time_ms, HEADLESS_TICK_MS)
+    return sim
+
+
+def _sharded():
+    sharded = ShardedSimulation(PARAMS, seed=3, sectors=2)
+    for sat in sharded.sim.satellites:
+        sat.data_amount = START_GB
+    return sharded.run()
+
+
+@pytest.mark.parametrize("run", [_single, _sharded], ids=["single-process", "sharded"])
+def test_drained_satellites_release_their_links(run):
+    sim = run()
+    delivered = [sat for sat in sim.satellites if sat.delivered_data > 0]
+    assert delivered
+    for sat in delivered:
+        assert sat.data_amount < SATELLITE_RELINK_GB
+        assert sat.connected_to is None
+    assert all(sat not in st.connected_satellites for st in sim.stations for sat in delivered)
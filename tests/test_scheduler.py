@@ -0,0 +1,102 @@
+import random
+
+from context import SimulationContext
+from satellite import Satellite
+from scheduler import PriorityScheduler
+from station import Station
+
+
+class EveryStation:
+    """ Contact tracker that puts every satellite in range of every station. """
+
+    def stations_for(self, sat, stations):
+        return stations
+
+
+def make_station(ctx, capacity):
+    station = Station(100.0, 100.0, ctx)
+    station.capacity = capacity
+    return station
+
+
+def make_satellite(ctx, name, priority_class):
+    return Satellite(600, name, (255, 255, 255), initial_angle=0.0, priority_class=priority_class, ctx=ctx)
+
+
+def test_preemption_takes_the_oldest_lowest_priority_link():
+    ctx = SimulationContext(seed=1)
+    scheduler = PriorityScheduler()
+    station = make_station(ctx, 2)
+    first, second = make_satellite(ctx, "COM-1", "COM"), make_satellite(ctx, "COM-2", "COM")
+    scheduler.assign([first, second], [station], 0.0, EveryStation())
+    assert station.connected_satellites == [first, second]
+
+    mil = [make_satellite(ctx, f"MIL-{i}", "MIL") for i in range(3)]
+    scheduler.assign([first, second, mil[0]], [station], 10.0, EveryStation())
+    assert first.connected_to is None and second.connected_to is station and mil[0].connected_to is station
+
+    scheduler.assign([first, second, mil[0], mil[1]], [station], 20.0, EveryStation())
+    assert second.connected_to is None and mil[1].connected_to is station
+
+    #MIL links are never preempted by MIL satellites
+    scheduler.assign([first, second] + mil, [station], 30.0, EveryStation())
+    assert mil[2].connected_to is None
+    assert set(station.connected_satellites) == {mil[0], mil[1]}
+    assert scheduler.class_metrics("COM").preempted == 2
+    assert scheduler.class_metrics("MIL").preempted == 0
+    assert scheduler.class_metrics("MIL").wait_samples == 0
+
+
+def test_reconnect_supersedes_the_old_heap_entry():
+    ctx = SimulationContext(seed=1)
+    scheduler = PriorityScheduler()
+    station = make_station(ctx, 2)
+    first, second = make_satellite(ctx, "COM-1", "COM"), make_satellite(ctx, "COM-2", "COM")
+    scheduler.assign([first, second], [station], 0.0, EveryStation())
+    #first drops out and comes back, so its link is now newer than second's
+    station.disconnect_satellite(first)
+    scheduler.assign([first, second], [station], 10.0, EveryStation())
+    assert first.connected_to is station
+    assert sum(entry[2] is first for entry in scheduler._links[station]) == 2
+
+    mil = make_satellite(ctx, "MIL-1", "MIL")
+    scheduler.assign([first, second, mil], [station], 20.0, EveryStation())
+    assert second.connected_to is None
+    assert first.connected_to is station and mil.connected_to is station
+    #the stale entry of first's old link never resurfaces as a live one
+    assert scheduler._lowest_link(station)[2] is first
+    assert sum(scheduler._live(station, entry) for entry in scheduler._links[station]) == 2
+
+
+def test_link_tracks_restored_connections():
+    ctx = SimulationContext(seed=1)
+    scheduler = PriorityScheduler()
+    station = make_station(ctx, 1)
+    com = make_satellite(ctx, "COM-1", "COM")
+    scheduler.link(station, com)
+    assert station.connected_satellites == [com] and com.connected_to is station
+
+    mil = make_satellite(ctx, "MIL-1", "MIL")
+    scheduler.assign([com, mil], [station], 0.0, EveryStation())
+    assert com.connected_to is None and mil.connected_to is station
+
+
+def test_heap_stays_bounded_and_matches_a_full_scan_under_churn():
+    ctx = SimulationContext(seed=1)
+    rng = random.Random(7)
+    scheduler = PriorityScheduler()
+    station = make_station(ctx, 8)
+    fleet = [make_satellite(ctx, f"SAT-{i}", rng.choice(["MIL", "COM"])) for i in range(40)]
+    for tick in range(500):
+        for sat in list(station.connected_satellites):
+            if rng.random() < 0.3:
+                station.disconnect_satellite(sat)
+        scheduler.assign(fleet, [station], float(tick), EveryStation())
+
+        heap = scheduler._links[station]
+        assert len(heap) <= 4 * station.capacity + 8 + 1
+        lowest = scheduler._lowest_link(station)
+        live = [entry for entry in heap if scheduler._live(station, entry)]
+        assert len(live) == len(station.connected_satellites)
+        assert {entry[2] for entry in live} == set(station.connected_satellites)
+        assert lowest == min(live)
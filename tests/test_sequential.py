@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+import sequential
+from sequential import RunningStat, SequentialExperiment
+
+SAMPLE = [12.5, 9.75, 14.0, 11.25, 10.5, 13.0, 8.0, 12.0, 15.5, 10.0]
+
+
+def test_running_stat_matches_numpy():
+    stat = RunningStat()
+    for value in SAMPLE:
+        stat.add(value)
+    assert stat.n == len(SAMPLE)
+    assert stat.mean == pytest.approx(np.mean(SAMPLE), rel=1e-12)
+    assert stat.variance == pytest.approx(np.var(SAMPLE, ddof=1), rel=1e-12)
+    assert stat.half_width(2.0) == pytest.approx(2.0 * np.std(SAMPLE, ddof=1) / math.sqrt(len(SAMPLE)))
+    assert RunningStat().half_width(2.0) == math.inf
+
+
+def fake_replica(params, seed):
+    #a metric around 100 with the spread given in params, drawn from the seed like a real replica
+    rng = np.random.default_rng(seed)
+    return {"value": 100.0 + params["spread"] * rng.standard_normal()}
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    monkeypatch.setattr(sequential, "_replica", fake_replica)
+
+
+#half-width after each replica of a configuration, recomputed from scratch
+def widths(spread, runs, z):
+    values = [fake_replica({"spread": spread}, seed)["value"] for seed in range(1, runs + 1)]
+    return [z * np.std(values[:n], ddof=1) / math.sqrt(n) for n in range(2, runs + 1)], values
+
+
+@pytest.mark.parametrize("spread", [1.0, 8.0, 20.0])
+def test_stops_once_target_is_reached(replicas, spread):
+    experiment = SequentialExperiment([{"spread": spread}], metrics=("value",), relative=0.02, max_runs=500)
+    result = experiment.run(workers=1)[0]
+    assert result["converged"] and experiment.total_runs == result["runs"]
+
+    #the first replica count at or past min_runs whose interval is within 2% of its mean
+    history, values = widths(spread, result["runs"], experiment.z)
+    reached = [n for n, width in enumerate(history, start=2)
+               if n >= experiment.min_runs and width <= 0.02 * abs(np.mean(values[:n]))]
+    assert reached[0] == result["runs"]
+    assert result["half_width"]["value"] <= 0.02 * result["mean"]["value"]
+
+
+def test_noisy_configuration_stops_at_run_limit(replicas):
+    experiment = SequentialExperiment([{"spread": 1.0}, {"spread": 500.0}], metrics=("value",),
+                                      relative=0.01, max_runs=30)
+    quiet, noisy = experiment.run(workers=1)
+    assert quiet["converged"] and quiet["runs"] < 30
+    assert not noisy["converged"] and noisy["runs"] == 30
+    assert experiment.total_runs == quiet["runs"] + noisy["runs"]
+
+
+def test_seeded_replicas_report_the_same_metrics():
+    params = {"duration": 0, "duration_seconds": 20, "num_satellites": 30, "num_stations": 4,
+              "satellite_damage_prob": 0.0005, "station_damage_prob": 0.0005}
+    first = sequential._replica(params, 7)
+    assert first["outage_sec"] > 0
+    assert sequential._replica(params, 7) == first
@@ -0,0 +1,52 @@
+import pytest
+
+from engine import run_simulation
+from sharded import ShardedSimulation, run_sharded_simulation
+
+#no damage, so neither engine draws random numbers after setup
+PARAMS = {"preemption": False, "duration": 0, "duration_seconds": 10, "num_satellites": 40, "num_stations": 5,
+          "satellite_damage_prob": 0.0, "station_damage_prob": 0.0}
+
+
+def test_sharded_totals_match_the_single_process_engine():
+    single = run_simulation(PARAMS, seed=4).ctx.stats.summary()
+    one, two = (run_sharded_simulation(PARAMS, seed=4, sectors=k).ctx.stats.summary() for k in (1, 2))
+    assert one == pytest.approx(two)
+    #the engines order link assignment and transfer differently within a tick
+    assert one["total_delivered_gb"] == pytest.approx(single["total_delivered_gb"], rel=0.05)
+    assert one["jamming_lost_gb"] == pytest.approx(single["jamming_lost_gb"], rel=0.1)
+    assert one["generated_gb"] == pytest.approx(single["generated_gb"], rel=0.01)
+    assert one["satellites_destroyed"] == single["satellites_destroyed"] == 0
+
+
+@pytest.mark.parametrize("option", [{"preemption": True}, {"inter_satellite_links": True}, {"weather": True},
+                                    {"debris": 50}, {"common_random_numbers": True}])
+def test_unsupported_features_are_refused(option):
+    with pytest.raises(ValueError):
+        ShardedSimulation(dict(PARAMS, **option), seed=4)
+
+
+def test_preemption_is_refused_by_default():
+    params = dict(PARAMS)
+    del params["preemption"]
+    with pytest.raises(ValueError, match="preemption"):
+        ShardedSimulation(params, seed=4)
+
+
+def test_sharded_outages_match_the_single_process_engine():
+    #without damage an outage is a satellite losing its station and linking to it again later
+    params = dict(PARAMS, duration_seconds=60)
+    single = run_simulation(params, seed=4).ctx.stats
+    sharded = run_sharded_simulation(params, seed=4, sectors=2).ctx.stats
+    assert sharded.outage_count == single.outage_count > 0
+    assert sharded.outage_total_sec == pytest.approx(single.outage_total_sec, abs=0.1)
+    assert sharded.outage_histogram == single.outage_histogram
+
+
+def test_sharded_outages_add_up_with_damage():
+    params = dict(PARAMS, duration_seconds=20, satellite_damage_prob=0.0005, station_damage_prob=0.0005)
+    sim = run_sharded_simulation(params, seed=4, sectors=2)
+    stats = sim.ctx.stats
+    assert stats.outage_count == sum(stats.outage_histogram) > 0
+    assert 0 < stats.outage_max_sec <= sim.elapsed_simulation_time_ms / 1000.0
+    assert stats.outage_total_sec <= stats.outage_count * stats.outage_max_sec
@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+import pytest
+
+from config import EARTH_POSITION, EARTH_RADIUS_PIXELS, KUIPER_ALTITUDES_KM
+from context import SimulationContext
+from satellite import Satellite
+from siting import CoverageTable
+from station import Station
+
+BINS = 360
+SAMPLES = 40
+HORIZON_SEC = 200.0
+
+
+class Spot:
+    def __init__(self, angle, radius):
+        self.status = 'operational'
+        self.x = EARTH_POSITION[0] + radius * math.cos(angle)
+        self.y = EARTH_POSITION[1] + radius * math.sin(angle)
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    ctx = SimulationContext(seed=5)
+    rng = np.random.default_rng(5)
+    return [Satellite(KUIPER_ALTITUDES_KM[n % 3], f"COM-{n}", (255, 255, 255), initial_angle=rng.uniform(0, 2 * math.pi),
+                      priority_class="COM", ctx=ctx) for n in range(60)]
+
+
+def contacts(fleet, a, radius, t, snap):
+    """ Satellites a rim station at the lower edge of angle bin a sees at time sample t. """
+    w = 2 * math.pi / BINS
+    station = Station(EARTH_POSITION[0] + EARTH_RADIUS_PIXELS * math.cos(a * w),
+                      EARTH_POSITION[1] + EARTH_RADIUS_PIXELS * math.sin(a * w), SimulationContext(seed=0))
+    station.comm_radius = radius
+    time = (t + 0.5) * HORIZON_SEC / SAMPLES
+    seen = 0
+    for sat in fleet:
+        angle = (sat.angle + sat.angular_speed_rad_per_sec * time) % (2 * math.pi)
+        if snap:
+            angle = (int(angle / w) + 0.5) * w
+        seen += station.is_satellite_in_range(Spot(angle, sat.orbit_radius_pixels))
+    return seen
+
+
+@pytest.mark.parametrize("a, k", [(0, 3), (45, 1), (200, 2), (359, 3)])
+def test_cover_matches_contact_counting(fleet, a, k):
+    table = CoverageTable(fleet, HORIZON_SEC, SAMPLES, BINS, radius_levels=4)
+    radius = table.radii[k]
+    #satellites at the centre of their angle bin, where the surrogate puts them
+    assert list(table.cover[k, a]) == [contacts(fleet, a, radius, t, snap=True) for t in range(SAMPLES)]
+    #at their exact angles only satellites within a bin of a window edge can differ
+    exact = [contacts(fleet, a, radius, t, snap=False) for t in range(SAMPLES)]
+    assert np.abs(table.cover[k, a] - exact).max() <= 1
+    assert table.cover[k, a].sum() > 0
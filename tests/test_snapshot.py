@@ -0,0 +1,61 @@
+import struct
+
+import pytest
+
+from engine import HEADLESS_TICK_MS, setup_simulation
+from snapshot import SNAPSHOT_MAGIC, Snapshot, SnapshotError
+
+PARAMS = {"duration": 0, "duration_seconds": 20, "num_satellites": 30, "num_stations": 4,
+          "satellite_damage_prob": 0.0005, "station_damage_prob": 0.0005}
+#every optional feature a snapshot has to carry
+FEATURES = {"inter_satellite_links": True, "weather": True, "debris": 300, "contact_cache": True,
+            "common_random_numbers": True, "importance_proposal": (0.002, 0.002)}
+
+
+def advance(sim, ticks):
+    for _ in range(ticks):
+        sim.step(sim.elapsed_simulation_time_ms, HEADLESS_TICK_MS)
+
+
+def state(sim):
+    """ What a run has done so far. """
+    summary = sim.ctx.stats.summary()
+    satellites = [(sat.name, sat.status, sat.angle, sat.data_amount, sat.delivered_data,
+                   sat.connected_to.id if sat.connected_to else None) for sat in sim.satellites]
+    return summary, satellites, sim.connection_loss_log, sim.ctx.draws.log_weight
+
+
+def test_round_trip_restores_the_same_snapshot():
+    sim = setup_simulation(dict(PARAMS, **FEATURES), seed=5)
+    advance(sim, 120)
+    snap = Snapshot.capture(sim, sim.elapsed_simulation_time_ms)
+    restored = Snapshot(snap.data).restore()
+    assert state(restored) == state(sim)
+    assert Snapshot.capture(restored, sim.elapsed_simulation_time_ms).data == snap.data
+
+
+@pytest.mark.parametrize("features", [{}, FEATURES], ids=["plain", "all-features"])
+def test_fork_follows_the_original_until_it_changes_course(features):
+    sim = setup_simulation(dict(PARAMS, **features), seed=5)
+    advance(sim, 150)
+    snap = Snapshot.capture(sim, sim.elapsed_simulation_time_ms)
+    at_fork = state(sim)
+
+    same = snap.fork()
+    other = snap.fork(satellite_damage_probability=0.02)
+    assert state(same) == at_fork
+    assert state(other) == at_fork
+
+    for _ in range(10):
+        for run in (sim, same, other):
+            advance(run, 15)
+        assert state(same) == state(sim)
+    assert state(other) != state(sim)
+
+
+def test_other_versions_are_refused():
+    data = Snapshot.capture(setup_simulation(PARAMS, seed=1)).data
+    with pytest.raises(SnapshotError):
+        Snapshot(struct.pack("<4sHH", SNAPSHOT_MAGIC, 4, 0) + data[8:])
+    with pytest.raises(SnapshotError):
+        Snapshot(b"NOPE" + data[4:])
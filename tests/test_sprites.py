@@ -0,0 +1,57 @@
+import math
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+import sprites
+from config import BLINK_RED, WHITE
+from sprites import SPRITE_ANGLE_STEPS, TRANSFER_BLINK_MS
+
+STEP = 2 * math.pi / SPRITE_ANGLE_STEPS
+
+
+@pytest.fixture
+def atlas(monkeypatch):
+    pygame.font.init()
+    monkeypatch.setattr(sprites, "_atlas", None)
+    atlas = sprites.get_atlas()
+    atlas.renders = 0
+    render = atlas._render
+
+    def counted(*args):
+        atlas.renders += 1
+        return render(*args)
+
+    monkeypatch.setattr(atlas, "_render", counted)
+    return atlas
+
+
+def sat(angle, status='operational', blink_on=False, transferring=False):
+    return SimpleNamespace(x=50, y=50, name="COM-1", status=status, initial_color=WHITE, color=BLINK_RED, angle=angle,
+                           transferring=transferring, blink_on=blink_on, connected_to=None, is_in_burst=False,
+                           data_amount=3.0)
+
+
+def test_angles_in_one_bucket_share_a_sprite(atlas):
+    sprite = atlas.sprite(WHITE, BLINK_RED, 3 * STEP)
+    assert atlas.sprite(WHITE, BLINK_RED, 3 * STEP + 0.4 * STEP) is sprite
+    assert atlas.sprite(WHITE, BLINK_RED, 3 * STEP - 0.4 * STEP + 2 * math.pi) is sprite
+    assert atlas.sprite(WHITE, BLINK_RED, 4 * STEP) is not sprite
+    assert atlas.sprite(BLINK_RED, BLINK_RED, 3 * STEP) is not sprite
+    assert atlas.renders == 3
+
+
+def test_frames_reuse_the_atlas(atlas, monkeypatch):
+    surface = pygame.Surface((100, 100))
+    fleet = [sat(0.0), sat(0.1 * STEP), sat(STEP), sat(0.0, 'damaging', blink_on=True),
+             sat(0.0, 'damaging', blink_on=False), sat(0.0, transferring=True)]
+    for frame in range(8):
+        #the transfer blink alternates between frames
+        monkeypatch.setattr(pygame.time, "get_ticks", lambda: frame * TRANSFER_BLINK_MS)
+        for s in fleet:
+            s.angle += 0.01 * STEP
+        sprites.draw_satellites(surface, fleet)
+    #body/panel colours of operational, both damage blinks and the transfer blink, at angle 0 and 1
+    assert len(atlas._sprites) == atlas.renders == 5
+    assert list(atlas._data) == [3] and list(atlas._names) == ["COM-1"]
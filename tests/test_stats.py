@@ -0,0 +1,82 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from engine import HEADLESS_TICK_MS, run_simulation
+from stats import LoadSeries, RunStats
+
+
+def test_streaming_aggregates_match_a_hand_computed_run():
+    stats = RunStats()
+    a, b = SimpleNamespace(name="COM-1"), SimpleNamespace(name="MIL-2")
+    station = SimpleNamespace(id=3)
+
+    stats.on_generation(10.0, 1.5)
+    stats.on_transfer(a, station, 2.0)
+    stats.on_transfer(b, station, 1.0)
+    stats.on_routed(a, station, 0.5)
+    stats.on_jamming(0.25, 2)
+    stats.now_ms = 1000.0
+    stats.on_station_damaged(station)
+    stats.now_ms = 4000.0
+    stats.on_station_repaired(station, 0.75)
+    for duration in (0.2, 0.5, 3.0, 400.0):
+        stats.on_outage(duration)
+    stats.now_ms = 10000.0
+
+    summary = stats.summary()
+    assert summary["total_delivered_gb"] == pytest.approx(3.5)
+    assert summary["delivery_rate_gbps"] == pytest.approx(0.35)
+    assert summary["generated_gb"] == 10.0 and summary["overflow_lost_gb"] == 1.5
+    assert summary["routed_gb"] == 0.5 and summary["jamming_lost_gb"] == 0.25 and stats.jamming_events == 2
+    assert summary["repair_lost_gb"] == 0.75 and summary["station_damage_events"] == 1
+    assert summary["stations_down"] == 0
+    assert summary["outages"] == 4
+    assert summary["outage_mean_sec"] == pytest.approx(403.7 / 4)
+    assert summary["outage_max_sec"] == 400.0
+    #edges are upper bounds: 0.2 and 0.5 fall in 0-0.5 s, 3 in 2-5 s, 400 past the last edge
+    rows = dict(stats.histogram_rows())
+    assert rows["0-0.5 s"] == 2 and rows["2-5 s"] == 1 and rows[">= 300 s"] == 1
+    assert sum(count for _, count in stats.histogram_rows()) == 4
+
+    #down from 1 s to 4 s of 10 s
+    assert stats.station_uptime(3) == pytest.approx(0.7)
+    assert stats.station_uptime(99) == 1.0
+    assert stats.drain_rate("COM-1") == pytest.approx(0.25)
+    assert stats.top_drain_rates(1) == [("COM-1", pytest.approx(0.25))]
+
+
+def test_ongoing_station_outage_counts_as_downtime():
+    stats = RunStats()
+    stats.now_ms = 2000.0
+    stats.on_station_damaged(SimpleNamespace(id=1))
+    stats.now_ms = 8000.0
+    assert stats.summary()["stations_down"] == 1
+    assert stats.station_uptime(1) == pytest.approx(0.25)
+
+
+def test_outages_of_a_run_are_in_simulated_time():
+    params = {"duration": 0, "duration_seconds": 20, "num_satellites": 30, "num_stations": 4,
+              "satellite_damage_prob": 0.0005, "station_damage_prob": 0.0005}
+    sim = run_simulation(params, seed=7)
+    sim.close_active_losses()
+    durations = [ev["duration"] for ev in sim.connection_loss_log]
+    summary = sim.ctx.stats.summary()
+    assert summary["outages"] == len(durations) > 0
+    assert summary["outage_mean_sec"] == pytest.approx(math.fsum(durations) / len(durations))
+    assert summary["outage_max_sec"] == max(durations)
+    #every outage starts and ends on a tick of the simulation clock
+    ticks = np.array(durations) / (HEADLESS_TICK_MS / 1000.0)
+    assert np.allclose(ticks, np.round(ticks)) and ticks.min() >= 1
+
+
+def test_load_series_samples_at_its_interval():
+    series = LoadSeries(interval_ms=100.0)
+    stations = [SimpleNamespace(connected_satellites=[1, 2]), SimpleNamespace(connected_satellites=[])]
+    for now_ms in (0.0, 50.0, 100.0, 150.0, 210.0):
+        series.sample(now_ms, stations)
+    assert list(series.times) == [0.0, 100.0, 210.0]
+    times, loads = series.to_arrays()
+    assert loads.tolist() == [[2, 0]] * 3
@@ -0,0 +1,56 @@
+import importlib.util
+import os
+
+import pygame
+import pytest
+
+import config
+import startsimulation
+from simlog import shutdown_logging
+
+MAIN = os.path.join(os.path.dirname(config.__file__), "main.py")
+PARAMS = {"duration": 0, "duration_seconds": 2, "num_satellites": 6, "num_stations": 2,
+          "station_recovery_time_sec": 5.0, "station_damage_prob": 0.0,
+          "satellite_recovery_time_sec": 5.0, "satellite_damage_prob": 0.0}
+
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+    """ main.py run up to its first frame, which gets a QUIT event; its handlers stay callable. """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pygame.event, "get", lambda: [pygame.event.Event(pygame.QUIT)])
+    monkeypatch.setattr(pygame, "quit", lambda: None)
+    spec = importlib.util.spec_from_file_location("main", MAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(module, "show_simulation_popup", lambda defaults=None: dict(PARAMS))
+    yield module
+    module.worker.stop()
+    shutdown_logging()
+
+
+def test_start_and_stop_handlers(main, tmp_path):
+    main.on_start_simulation_click()
+    assert main.simulation_running and len(main.sim.satellites) == PARAMS["num_satellites"]
+    main.stop_simulation()
+    assert not main.simulation_running and main.manual_controls_enabled
+    assert (tmp_path / main.REPLAY_FILENAME).exists()
+
+
+def test_start_and_terminate_handlers(main):
+    main.on_start_simulation_click()
+    assert main.simulation_running
+    main.terminate_simulation()
+    assert not main.simulation_running and main.sim.satellites == []
+
+
+def test_popup_confirm_returns_params(monkeypatch):
+    config.get_screen()
+    popup_x = (config.WIDTH - startsimulation.POPUP_WIDTH) // 2
+    popup_bottom = (config.HEIGHT - startsimulation.POPUP_HEIGHT) // 2 + startsimulation.POPUP_HEIGHT
+    #the centre of the "Start Sim" button
+    ok = (popup_x + startsimulation.POPUP_WIDTH // 2 - 90, popup_bottom - 50)
+    monkeypatch.setattr(pygame.mouse, "get_pos", lambda: ok)
+    monkeypatch.setattr(pygame.event, "get", lambda: [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=ok, button=1)])
+    params = startsimulation.show_simulation_popup()
+    assert params["duration"] == 10 and params["num_satellites"] == 27
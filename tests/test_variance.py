@@ -0,0 +1,40 @@
+import pytest
+
+from draws import DamageDraws
+from engine import setup_simulation
+from variance import compare
+
+BASE = {"duration": 0, "duration_seconds": 6, "num_satellites": 20, "num_stations": 4,
+        "satellite_damage_prob": 2e-5, "station_damage_prob": 1e-5}
+PARAM_SETS = [BASE, dict(BASE, satellite_damage_prob=4 * BASE["satellite_damage_prob"])]
+SEEDS = list(range(1, 17))
+
+
+def test_importance_sampling_agrees_with_untilted_mean():
+    seeds = list(range(1, 33))
+    #a modest tilt, the likelihood ratios of a hard one are too heavy-tailed for a few dozen seeds
+    untilted = compare([BASE], seeds)[0]
+    weighted = compare([BASE], seeds, tilt=2.0)[0]
+    assert abs(weighted["mean"] - untilted["mean"]) <= weighted["half_width"]
+
+
+def test_common_random_numbers_narrow_the_difference():
+    naive = compare(PARAM_SETS, SEEDS, common=False, max_workers=1)[1]
+    common = compare(PARAM_SETS, SEEDS, max_workers=1)[1]
+    assert common["runs"] == naive["runs"]
+    assert common["difference_half_width"] < naive["difference_half_width"]
+
+
+@pytest.mark.parametrize("proposal", [(-0.1, 0.01), (0.01, 1.5), (float("nan"), 0.01), (0.01,)])
+def test_invalid_proposals_are_refused(proposal):
+    with pytest.raises(ValueError, match="proposal"):
+        setup_simulation(dict(BASE, importance_proposal=proposal), seed=1)
+
+
+def test_zero_proposal_is_refused_for_possible_damage():
+    draws = DamageDraws(1, proposal=(0.0, 0.0))
+    draws.begin_tick(1, 1)
+    #damage that cannot happen needs no proposal
+    assert not draws.station(0, 0.0) and draws.log_weight == 0.0
+    with pytest.raises(ValueError, match="proposal"):
+        draws.satellite(0, 0.01)
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pygame
+import pytest
+
+import sprites
+from config import WHITE
+from viewport import VIEW_CULL_MARGIN, VIEW_LABEL_ZOOM, Viewport
+
+
+def sat(x, y, name="COM-1"):
+    return SimpleNamespace(x=x, y=y, name=name, status='operational', initial_color=WHITE, color=WHITE, angle=0.0,
+                           transferring=False, blink_on=False, connected_to=None, is_in_burst=False, data_amount=12.0)
+
+
+@pytest.fixture
+def atlas(monkeypatch):
+    pygame.font.init()
+    monkeypatch.setattr(sprites, "_atlas", None)
+    return sprites.get_atlas()
+
+
+def test_offscreen_satellites_are_culled(monkeypatch):
+    drawn = []
+    monkeypatch.setattr(sprites, "draw_satellites", lambda surface, sats, view, labels: drawn.extend(sats))
+    view = Viewport(200, 100)
+    inside = [sat(10, 10), sat(190, 90), sat(-VIEW_CULL_MARGIN + 1, 50)]
+    outside = [sat(-VIEW_CULL_MARGIN - 1, 50), sat(100, 100 + VIEW_CULL_MARGIN), sat(500, -500)]
+    assert view.draw_satellites(pygame.Surface((200, 100)), inside + outside) == "detail"
+    assert drawn == inside
+
+    #zoomed in on the top left corner, world points further out leave the screen
+    drawn.clear()
+    view.zoom_at((0, 0), 2.0)
+    view.draw_satellites(pygame.Surface((200, 100)), inside + outside)
+    assert drawn == [inside[0]]
+
+
+def test_offscreen_stations_are_not_drawn():
+    drawn = []
+    station = lambda x, y: SimpleNamespace(x=x, y=y, comm_radius=20, size=5,
+                                           draw=lambda *args: drawn.append((x, y)))
+    view = Viewport(200, 100)
+    #a station off screen still draws while its comm range reaches in
+    view.draw_stations(None, [station(50, 50), station(-20, 50), station(-30, 50), station(50, 300)], None, None)
+    assert drawn == [(50, 50), (-20, 50)]
+
+
+def test_labels_only_from_the_label_zoom(atlas):
+    surface = pygame.Surface((200, 100))
+    view = Viewport(200, 100)
+    view.zoom = VIEW_LABEL_ZOOM / 2
+    view.draw_satellites(surface, [sat(40, 40)])
+    assert not atlas._names and not atlas._data
+    view.zoom = VIEW_LABEL_ZOOM
+    view.draw_satellites(surface, [sat(40, 40)])
+    assert list(atlas._names) == ["COM-1"] and list(atlas._data) == [12]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from config import WEATHER_MAX_ATTENUATION
+from context import SimulationContext
+from engine import HEADLESS_TICK_MS
+from satellite import Satellite
+from station import Station
+from weather import WeatherField
+
+
+class Spot:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def at_cell(weather, row, col, dr=0.0, dc=0.0):
+    """ A station at a cell centre of the unshifted grid, nudged by (dr, dc) cells. """
+    return Spot(weather.left + (col + 0.5 + dc) * weather.cell_w, weather.top + (row + 0.5 + dr) * weather.cell_h)
+
+
+def test_station_cells_sample_the_grid():
+    grid = np.random.default_rng(2).random((12, 12))
+    weather = WeatherField(frames=grid)
+    cells = [(0, 0), (3, 7), (11, 11), (6, 2)]
+    stations = [at_cell(weather, r, c) for r, c in cells]
+    weather.update(stations, HEADLESS_TICK_MS)
+    for st, (r, c) in zip(stations, cells):
+        assert st.weather_factor == pytest.approx(weather.factors(grid[r, c]))
+
+    #between centres the cover is interpolated from the four cells around the station
+    between = at_cell(weather, 3, 7, 0.25, 0.5)
+    weather.update([between], HEADLESS_TICK_MS)
+    cover = (grid[3, 7] * 0.5 + grid[3, 8] * 0.5) * 0.75 + (grid[4, 7] * 0.5 + grid[4, 8] * 0.5) * 0.25
+    assert between.weather_factor == pytest.approx(weather.factors(cover))
+
+
+def test_station_cells_follow_the_wind():
+    weather = WeatherField(seed=3, change_sec=1e9)
+    #one cell to the right per second
+    weather.wind = (weather.cell_w, 0.0)
+    station = at_cell(weather, 5, 6)
+    weather.update([station], 1000.0)
+    cover = weather.cover.copy()
+    weather.update([station], 1000.0)
+    assert weather.offset[1] == pytest.approx(2.0)
+    #the grid itself also relaxes a little towards its next cover each tick
+    assert station.weather_factor == pytest.approx(weather.factors(weather.cover[5, 4]))
+    assert not np.array_equal(cover, weather.cover)
+
+
+def transfer(weather_factor):
+    ctx = SimulationContext(seed=1)
+    ctx.satellite_damage_probability = 0.0
+    station = Station(100.0, 100.0, ctx)
+    sat = Satellite(600, "COM-1", (255, 255, 255), initial_angle=0.0, priority_class="COM", ctx=ctx)
+    sat.data_amount = 100.0
+    sat.connected_to = station
+    station.connected_satellites.append(sat)
+    station.weather_factor = weather_factor
+    sat.update(0, [station], HEADLESS_TICK_MS)
+    return station.received_data
+
+
+def test_full_cover_slows_the_link_by_the_maximum_attenuation():
+    weather = WeatherField(frames=np.ones((4, 4)))
+    station = at_cell(weather, 1, 1)
+    weather.update([station], HEADLESS_TICK_MS)
+    assert station.weather_factor == pytest.approx(1.0 - WEATHER_MAX_ATTENUATION)
+    clear = transfer(1.0)
+    assert clear > 0
+    assert transfer(station.weather_factor) == pytest.approx(clear * (1.0 - WEATHER_MAX_ATTENUATION))
+
+
+def test_clear_sky_leaves_the_link_rate():
+    weather = WeatherField(frames=np.zeros((4, 4)))
+    station = at_cell(weather, 2, 2)
+    weather.update([station], HEADLESS_TICK_MS)
+    assert station.weather_factor == 1.0
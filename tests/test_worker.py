@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+
+from engine import HEADLESS_TICK_MS, run_simulation, setup_simulation
+from frames import FrameBuffer, RenderFrame
+from worker import SimulationWorker
+
+PARAMS = {"duration": 0, "duration_seconds": 8, "num_satellites": 30, "num_stations": 4,
+          "satellite_damage_prob": 0.0005, "station_damage_prob": 0.0005}
+
+
+def rows(frame):
+    satellites = frame.satellites
+    return ([tuple(satellites[i]._replace(connected_to=None)) for i in range(len(satellites))],
+            satellites.link.tolist(),
+            [(st.id, st.received_data, st.status, st.connected_satellites) for st in frame.stations])
+
+
+def test_worker_frames_match_a_synchronous_run():
+    worker = SimulationWorker(setup_simulation(PARAMS, seed=9), tick_ms=HEADLESS_TICK_MS, realtime=False)
+    worker.start()
+    deadline = time.monotonic() + 60
+    seen = []
+    frame = worker.frame()
+    while frame.remaining_ms > 0:
+        assert time.monotonic() < deadline
+        if not seen or frame is not seen[-1]:
+            seen.append(frame)
+        time.sleep(0.001)
+        frame = worker.frame()
+    worker.stop()
+
+    #frames came out in order and were never changed after capture
+    elapsed = [f.elapsed_ms for f in seen]
+    assert elapsed == sorted(elapsed) and len(seen) > 1
+    assert not seen[-1].satellites.x.flags.writeable
+
+    expected = RenderFrame(run_simulation(PARAMS, seed=9))
+    assert frame.elapsed_ms == expected.elapsed_ms
+    assert rows(frame) == rows(expected)
+    assert np.array_equal(frame.satellites.data, expected.satellites.data)
+
+
+def test_frame_buffer_hands_over_the_latest_frame():
+    buffer = FrameBuffer()
+    assert buffer.wanted() and buffer.latest() is None
+    buffer.publish("first")
+    assert not buffer.wanted()
+    buffer.publish("second")
+    assert buffer.latest() == "second" and buffer.wanted()